@@ -0,0 +1,321 @@
+"""
+アルゴリズムのマイクロベンチマーク
+windows/algorithms の全アルゴリズムを run(text) で実行し、入力の大きさ（1KB〜100MB）と
+文字の種類（ASCII・日本語・バイナリ寄り）ごとにスループットと最大メモリ割り当てを測る。
+デコーダ（*_de）には対応するエンコーダ（*_en）の出力を入力として渡す。
+
+結果はベースライン（JSON）と比べ、スループットが --threshold 以上落ちたか、
+最大メモリ割り当てが同じ割合以上増えたアルゴリズムがあれば終了コード 1。
+マシンの速さの違い・揺れを打ち消すため、各計測の直前に決まった処理（較正）の時間も測り、
+ベースラインのスループットはその比でこのマシン・この時点の速さに換算してから比べる。
+
+    python benchmarks/algorithms.py                        # 既定の大きさで測ってベースラインと比べる
+    python benchmarks/algorithms.py --update-baseline      # ベースラインを書き換える
+    python benchmarks/algorithms.py --sizes 1K,1M,100M --only caesar
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from windows.algorithms import load_algorithms  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "baselines", "algorithms.json")
+DEFAULT_SIZES = "1K,64K,1M"
+DEFAULT_THRESHOLD = 0.4      # 40% 以上遅くなる（メモリが増える）と失敗
+MIN_TIME = 0.3               # 1つのケースを繰り返す時間の目安（秒）
+MIN_SAMPLE = 0.01            # 1回の計測がこれより短い入力は、まとめて何回か実行して測る
+MAX_REPEAT = 10
+RETRIES = 2                  # 悪くなったケースを測り直す回数
+SAMPLE_SIZE = 64 * 1024      # 生成する入力の単位。大きな入力はこれを繰り返す
+SEED = 1234
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+# --- 入力の生成 ---
+def _ascii_sample(rng, n):
+    words = ["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "Hello", "World",
+             "flag", "CTF", "2024", "secret", "key"]
+    out, size = [], 0
+    while size < n:
+        word = rng.choice(words) + rng.choice([" ", " ", " ", ", ", ". ", "\n"])
+        out.append(word)
+        size += len(word)
+    return "".join(out)[:n]
+
+
+def _japanese_sample(rng, n):
+    # ひらがな・カタカナ・よく使う漢字と句読点（UTF-8 で1文字3バイト）
+    chars = ([chr(c) for c in range(0x3041, 0x3094)] + [chr(c) for c in range(0x30A1, 0x30F7)]
+             + list("日本語文字変換暗号解析画像認識入力出力結果時間") + ["、", "。", "　"])
+    return "".join(rng.choice(chars) for _ in range(n // 3))
+
+
+def _binary_sample(rng, n):
+    # バイト列を latin-1 として読んだ文字列（制御文字や 0x80〜0xFF を含む）
+    return bytes(rng.getrandbits(8) for _ in range(n)).decode("latin-1")
+
+
+CHAR_CLASSES = {
+    "ascii": _ascii_sample,
+    "japanese": _japanese_sample,
+    "binary": _binary_sample,
+}
+
+
+def make_text(char_class, size):
+    """UTF-8 でおよそ size バイトの文字列（同じ引数なら毎回同じ）"""
+    rng = random.Random(f"{SEED}:{char_class}")
+    sample = CHAR_CLASSES[char_class](rng, min(size, SAMPLE_SIZE))
+    encoded = len(sample.encode("utf-8")) or 1
+    repeat = -(-size // encoded)
+    text = sample * repeat
+    # 1文字あたりのバイト数で割って、ほぼ size バイトに切り詰める
+    return text[:max(1, len(text) * size // (encoded * repeat))]
+
+
+def parse_size(value):
+    value = value.strip().upper().rstrip("B")
+    if value[-1:] in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1]])
+    return int(value)
+
+
+def format_size(size):
+    for unit in ("G", "M", "K"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return str(size)
+
+
+# --- 計測 ---
+_calibration_text = None
+
+
+def calibrate():
+    """アルゴリズムと似た処理（文字ごとのループ・文字列の連結・bytes の変換）1回の時間"""
+    global _calibration_text
+    if _calibration_text is None:
+        _calibration_text = make_text("ascii", 16 * 1024)
+    text = _calibration_text
+    start = time.perf_counter()
+    "".join([chr(ord(c) ^ 1) for c in text])
+    text.encode().hex(" ")
+    return time.perf_counter() - start
+
+
+def encoder_for(entry, entries):
+    """デコーダ（xxx_de）なら対応するエンコーダ（xxx_en）のエントリ"""
+    stem = entry.module_name.rsplit(".", 1)[-1]
+    if not stem.endswith("_de"):
+        return None
+    target = stem[:-3] + "_en"
+    return next((e for e in entries if e.module_name.rsplit(".", 1)[-1] == target), None)
+
+
+def make_input(entry, encoder, char_class, size):
+    """計測に使う入力。デコーダにはエンコード済みで、およそ size バイトの文字列を渡す"""
+    if encoder is None:
+        return make_text(char_class, size)
+    # エンコードで何倍になるかを小さな入力で調べ、エンコード後が size になるよう元の大きさを決める
+    probe = make_text(char_class, min(size, 4096))
+    ratio = max(1e-3, len(encoder.run(probe).encode("utf-8")) / len(probe.encode("utf-8")))
+    return encoder.run(make_text(char_class, max(1, int(size / ratio))))
+
+
+def measure(entry, text, min_time=MIN_TIME, max_repeat=MAX_REPEAT):
+    """
+    {"bytes", "seconds"（1回あたりの最速）, "mb_per_s", "peak_bytes", "calibration"} を返す
+    calibration は各計測の直前に測った較正の時間の最短
+    """
+    size = len(text.encode("utf-8"))
+
+    def sample(number):
+        start = time.perf_counter()
+        for _ in range(number):
+            entry.run(text)
+        return time.perf_counter() - start
+
+    gc.collect()
+    # timeit.autorange と同じく、1回の計測が MIN_SAMPLE 以上になるまで回数を増やす
+    number = 1
+    calibrations = [calibrate()]
+    while (elapsed := sample(number)) < MIN_SAMPLE:
+        number *= 10
+    times = [elapsed / number]
+    total = elapsed
+    while len(times) < max_repeat and total < min_time:
+        calibrations.append(calibrate())
+        elapsed = sample(number)
+        times.append(elapsed / number)
+        total += elapsed
+
+    # メモリは別に1回だけ測る（tracemalloc は実行を遅くするので時間とは分ける）
+    gc.collect()
+    tracemalloc.start()
+    try:
+        entry.run(text)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(times)
+    return {
+        "bytes": size,
+        "seconds": best,
+        "mb_per_s": size / best / 1e6 if best > 0 else float("inf"),
+        "peak_bytes": peak,
+        "calibration": min(calibrations),
+    }
+
+
+def case_key(entry, char_class, size):
+    return f"{entry.module_name.rsplit('.', 1)[-1]}/{char_class}/{format_size(size)}"
+
+
+def plan_cases(sizes, classes, only=None):
+    """{ケース名: (エントリ, エンコーダ, 文字の種類, 大きさ)}"""
+    entries = load_algorithms()
+    cases = {}
+    for entry in entries:
+        stem = entry.module_name.rsplit(".", 1)[-1]
+        if only and not any(o.lower() in stem.lower() or o in entry.name for o in only):
+            continue
+        encoder = encoder_for(entry, entries)
+        for char_class in classes:
+            for size in sizes:
+                cases[case_key(entry, char_class, size)] = (entry, encoder, char_class, size)
+    return cases
+
+
+def run_case(case):
+    """1つのケースを測る。失敗したら {"error": ...}"""
+    entry, encoder, char_class, size = case
+    try:
+        return measure(entry, make_input(entry, encoder, char_class, size))
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def run_all(cases, progress=None):
+    """{ケース名: 計測結果} を返す"""
+    results = {}
+    for key, case in cases.items():
+        results[key] = run_case(case)
+        if progress:
+            progress(key, results[key])
+    return results
+
+
+# --- ベースラインとの比較 ---
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path, results, merge=None):
+    data = dict(merge or {})
+    data.update({
+        key: {"mb_per_s": r["mb_per_s"], "peak_bytes": r["peak_bytes"],
+              "calibration": r["calibration"]}
+        for key, r in results.items() if "error" not in r
+    })
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(data.items())), f, indent=1, ensure_ascii=False)
+        f.write("\n")
+
+
+def compare(results, baseline, threshold):
+    """ベースラインより悪くなったケースの {ケース名: 説明}"""
+    regressions = {}
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if "error" in result:
+            regressions[key] = f"エラーになりました（{result['error']}）"
+            continue
+        # 較正の時間の比で、ベースラインのスループットを今の速さに換算する
+        expected = base["mb_per_s"] * base.get("calibration", 1.0) / result["calibration"]
+        if result["mb_per_s"] < expected * (1 - threshold):
+            regressions[key] = (f"スループット {expected:.2f} → {result['mb_per_s']:.2f} MB/s "
+                                f"（{result['mb_per_s'] / expected - 1:+.0%}）")
+        # 小さな入力のメモリは誤差が大きいので 64KB 未満の増加は数えない
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + threshold) + 64 * 1024:
+            regressions[key] = (f"最大メモリ {base['peak_bytes'] / 1e6:.2f} → "
+                                f"{result['peak_bytes'] / 1e6:.2f} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="アルゴリズムのスループットとメモリを測る")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"入力の大きさ（カンマ区切り、例 1K,1M,100M。既定 {DEFAULT_SIZES}）")
+    parser.add_argument("--classes", default=",".join(CHAR_CLASSES),
+                        help="文字の種類（ascii,japanese,binary）")
+    parser.add_argument("--only", action="append",
+                        help="ファイル名か ALGO_NAME の一部で絞り込む（複数可）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="ベースラインの JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"悪化とみなす割合（既定 {DEFAULT_THRESHOLD}）")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="計測結果でベースラインを書き換える（測らなかったケースは残す）")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+    classes = [c.strip() for c in args.classes.split(",")]
+    unknown = [c for c in classes if c not in CHAR_CLASSES]
+    if unknown:
+        parser.error(f"不明な文字の種類です: {', '.join(unknown)}")
+
+    def progress(key, result):
+        if "error" in result:
+            print(f"  {key:<40} エラー: {result['error']}")
+        else:
+            print(f"  {key:<40} {result['mb_per_s']:10.2f} MB/s  "
+                  f"最大 {result['peak_bytes'] / 1e6:9.2f} MB  ({result['bytes']} バイト)")
+
+    print("アルゴリズム/文字の種類/大きさ               スループット    最大メモリ割り当て")
+    cases = plan_cases(sizes, classes, args.only)
+    results = run_all(cases, progress)
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        save_baseline(args.baseline, results, merge=baseline)
+        print(f"\nベースラインを更新しました: {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"\nベースラインがありません（--update-baseline で作成）: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    # 一時的な揺れで落ちないよう、悪くなったケースだけ測り直して、毎回悪ければ失敗にする
+    for _ in range(RETRIES):
+        if not regressions:
+            break
+        print(f"\n悪くなった {len(regressions)} 件を測り直します")
+        retried = run_all({key: cases[key] for key in regressions}, progress)
+        regressions = compare(retried, baseline, args.threshold)
+    if regressions:
+        print(f"\nNG: ベースラインより {args.threshold:.0%} 以上悪くなったケースがあります")
+        for key, message in regressions.items():
+            print(f"  {key}: {message}")
+        return 1
+    print(f"\nOK: ベースラインとの差は {args.threshold:.0%} 以内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,546 @@
+"""
+OCR と画像解析の通しベンチマーク（画面を使わない）
+決まった乱数で合成した画像（日本語・英語の文章、文字の大きさ・傾き・ノイズ・解像度を変えたもの）を
+一度だけ生成して保存し、GUI と同じ経路の各段の時間と認識の正確さを並べて測る。
+
+- OCR: 読み込み（image_cache）→ 切り出し → 前処理 → 検出（reader.detect）→ 認識（reader.recognize）
+  正解の文章との文字誤り率（CER、空白は無視）と平均の信頼度も出す
+- 設定: --setting 名前=JSON で認識パラメータと前処理（"preprocess" キー）の組を複数比べる
+- キャッシュ: キーの計算（ファイルのハッシュ、初回・2回目）と、メモリ・SQLite のヒットの時間
+- 画像解析: image_analysis.analyze_file（厳密・fast）と image_stats.compute_file
+
+基準の画像は 英語・24px・傾き0・ノイズ無し・2MP で、そこから1つの条件だけを変えた画像を作る。
+日本語の文字は OpenCV の字形に無いので、CJK のフォント（--ja-font か既知の場所）があれば Pillow で描く。
+無ければ日本語の画像は飛ばす。
+
+    python benchmarks/ocr.py                               # 既定の画像・設定で測る
+    python benchmarks/ocr.py --max-mp 12 --no-stats        # 100MP の画像と統計解析を除いて手早く
+    python benchmarks/ocr.py --setting greedy={} --setting beam='{"decoder": "beamsearch"}'
+    python benchmarks/ocr.py --setting pre='{"preprocess": {"contrast": "clahe"}}' -o now.json
+    python benchmarks/ocr.py --compare before.json         # 以前の結果（-o で保存）と比べる
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASE_SPEC = {"lang": "en", "text_px": 24, "rotation": 0, "noise": 0.0, "megapixels": 2}
+VARIATIONS = {
+    "text_px": [12, 48],
+    "rotation": [5, 15],
+    "noise": [0.1, 0.3],
+    "megapixels": [0.5, 12, 100],
+}
+LANGS = ("en", "ja")
+LINES = 5
+WORDS_PER_LINE = 5
+LINE_SPACING = 1.8           # 行の間隔（文字の高さに対する倍率）
+MARGIN = 0.5                 # 文章の周りの余白（文字の高さに対する倍率）
+NOISE_SIGMA = 80             # noise=1.0 の時のガウスノイズの標準偏差
+NOISE_ROWS = 1024            # ノイズは帯ごとに加える（100MP でもメモリを使いすぎない）
+ASPECT = 4 / 3
+SEED = 1234
+
+OCR_STAGES = ("load", "crop", "preprocess", "detect", "recognize")
+CACHE_STAGES = ("key_cold", "key_warm", "memory_hit", "sqlite_hit")
+ANALYSIS_STAGES = ("exact", "fast", "stats")
+
+# 検出（reader.detect）に渡すパラメータ。それ以外は認識（reader.recognize）に渡す
+DETECT_PARAMS = {
+    "min_size", "text_threshold", "low_text", "link_threshold", "canvas_size", "mag_ratio",
+    "slope_ths", "ycenter_ths", "height_ths", "width_ths", "add_margin", "optimal_num_chars",
+}
+
+EN_WORDS = [
+    "the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "image", "text", "sample",
+    "cipher", "secret", "message", "number", "result", "window", "search", "value", "2024",
+]
+JA_WORDS = [
+    "日本語", "文字", "認識", "画像", "解析", "暗号", "変換", "結果", "時間", "東京",
+    "ひらがな", "カタカナ", "漢字", "写真", "入力", "出力", "検索", "設定", "速度", "確認",
+]
+JA_FONT_CANDIDATES = [
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/fonts-japanese-gothic.ttf",
+    "/usr/share/fonts/opentype/ipafont-gothic/ipag.ttf",
+    "/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:/Windows/Fonts/msgothic.ttc",
+    "C:/Windows/Fonts/YuGothM.ttc",
+]
+JA_FONT_PATTERNS = ["/usr/share/fonts/**/*CJK*", "/usr/share/fonts/**/ipa*.ttf",
+                    "/usr/share/fonts/**/*Gothic*"]
+
+
+def default_fixture_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "gooddoctor", "bench_fixtures")
+
+
+def find_ja_font(path=None):
+    if path:
+        return path if os.path.exists(path) else None
+    for candidate in JA_FONT_CANDIDATES:
+        if os.path.exists(candidate):
+            return candidate
+    for pattern in JA_FONT_PATTERNS:
+        found = sorted(glob.glob(pattern, recursive=True))
+        if found:
+            return found[0]
+    return None
+
+
+# --- 合成画像 ---
+def plan_fixtures(langs, max_mp):
+    """基準の条件と、そこから1つだけ変えた条件のリスト"""
+    specs = []
+    for lang in langs:
+        base = dict(BASE_SPEC, lang=lang)
+        specs.append(base)
+        for field, values in VARIATIONS.items():
+            for value in values:
+                specs.append(dict(base, **{field: value}))
+    return [s for s in specs if s["megapixels"] <= max_mp]
+
+
+def spec_name(spec):
+    return (f"{spec['lang']}_{spec['text_px']}px_rot{spec['rotation']}"
+            f"_noise{spec['noise']:g}_{spec['megapixels']:g}mp")
+
+
+def _spec_seed(spec):
+    # 条件ごとに決まった乱数（hash() は実行ごとに変わるので使わない）
+    return SEED + sum(ord(c) * (i + 1) for i, c in enumerate(spec_name(spec)))
+
+
+def make_lines(spec, rng):
+    words = EN_WORDS if spec["lang"] == "en" else JA_WORDS
+    joiner = " " if spec["lang"] == "en" else "　"
+    return [joiner.join(rng.choice(words, WORDS_PER_LINE)) for _ in range(LINES)]
+
+
+def _render_en(lines, text_px):
+    import cv2
+    import numpy as np
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    # 大文字の高さが text_px になる倍率
+    (_, cap), _ = cv2.getTextSize("H", font, 1.0, 1)
+    scale = text_px / cap
+    thickness = max(1, round(text_px / 12))
+    width = max(cv2.getTextSize(line, font, scale, thickness)[0][0] for line in lines)
+    step = round(text_px * LINE_SPACING)
+    margin = round(text_px * MARGIN)
+    patch = np.full((margin * 2 + step * len(lines), margin * 2 + width), 255, np.uint8)
+    for i, line in enumerate(lines):
+        baseline = margin + step * i + round(text_px * 1.3)
+        cv2.putText(patch, line, (margin, baseline), font, scale, 0, thickness, cv2.LINE_AA)
+    return patch
+
+
+def _render_ja(lines, text_px, font_path):
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont
+    font = ImageFont.truetype(font_path, text_px)
+    width = max(round(font.getlength(line)) for line in lines)
+    step = round(text_px * LINE_SPACING)
+    margin = round(text_px * MARGIN)
+    image = Image.new("L", (margin * 2 + width, margin * 2 + step * len(lines)), 255)
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((margin, margin + step * i), line, font=font, fill=0)
+    return np.asarray(image).copy()
+
+
+def _rotate(patch, degrees):
+    """回転して、はみ出さないように広げた画像（余白は白）"""
+    import cv2
+    if not degrees:
+        return patch
+    h, w = patch.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), degrees, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    size = (int(w * cos + h * sin) + 1, int(w * sin + h * cos) + 1)
+    matrix[0, 2] += size[0] / 2 - w / 2
+    matrix[1, 2] += size[1] / 2 - h / 2
+    return cv2.warpAffine(patch, matrix, size, flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+
+
+def _add_noise(page, level, rng):
+    import numpy as np
+    sigma = NOISE_SIGMA * level
+    for top in range(0, page.shape[0], NOISE_ROWS):
+        strip = page[top:top + NOISE_ROWS]
+        noisy = strip + rng.normal(0, sigma, strip.shape).astype(np.float32)
+        np.clip(noisy, 0, 255, out=noisy)
+        strip[...] = noisy.astype(np.uint8)
+
+
+def render_fixture(spec, font_path=None):
+    """(BGR 画像, 文章のある範囲 (x1, y1, x2, y2), 正解の行) を返す"""
+    import cv2
+    import numpy as np
+    rng = np.random.default_rng(_spec_seed(spec))
+    lines = make_lines(spec, rng)
+    if spec["lang"] == "en":
+        patch = _render_en(lines, spec["text_px"])
+    else:
+        patch = _render_ja(lines, spec["text_px"], font_path)
+    patch = _rotate(patch, spec["rotation"])
+
+    pixels = spec["megapixels"] * 1e6
+    width = max(patch.shape[1], round((pixels * ASPECT) ** 0.5))
+    height = max(patch.shape[0], round(pixels / width))
+    page = np.full((height, width), 255, np.uint8)
+    y1 = (height - patch.shape[0]) // 2
+    x1 = (width - patch.shape[1]) // 2
+    page[y1:y1 + patch.shape[0], x1:x1 + patch.shape[1]] = patch
+    if spec["noise"]:
+        _add_noise(page, spec["noise"], rng)
+    region = (x1, y1, x1 + patch.shape[1], y1 + patch.shape[0])
+    return cv2.cvtColor(page, cv2.COLOR_GRAY2BGR), region, lines
+
+
+def ensure_fixture(spec, directory, font_path=None):
+    """
+    合成画像を directory に保存して {"name", "path", "region", "lines", "spec"} を返す
+    同じ条件の画像が既にあれば作り直さない
+    """
+    import cv2
+    name = spec_name(spec)
+    path = os.path.join(directory, name + ".png")
+    manifest = os.path.join(directory, name + ".json")
+    if os.path.exists(path) and os.path.exists(manifest):
+        with open(manifest, encoding="utf-8") as f:
+            fixture = json.load(f)
+        if fixture.get("spec") == spec:
+            fixture["path"] = path
+            return fixture
+    os.makedirs(directory, exist_ok=True)
+    image, region, lines = render_fixture(spec, font_path)
+    # 白地の大きな画像なので、圧縮率より書き出し・読み込みの速さを優先する
+    if not cv2.imwrite(path, image, [cv2.IMWRITE_PNG_COMPRESSION, 1]):
+        raise OSError(f"画像を保存できません: {path}")
+    fixture = {"name": name, "region": list(region), "lines": lines, "spec": spec}
+    with open(manifest, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False, indent=1)
+    fixture["path"] = path
+    return fixture
+
+
+# --- 正確さ ---
+def edit_distance(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def char_error_rate(expected_lines, lines):
+    """文字誤り率（編集距離 / 正解の文字数）。空白・全角空白は比べない"""
+    expected = "".join("".join(expected_lines).split())
+    actual = "".join("".join(lines).split())
+    if not expected:
+        return 0.0 if not actual else 1.0
+    return edit_distance(expected, actual) / len(expected)
+
+
+# --- OCR ---
+def parse_setting(text):
+    """"名前=JSON" を (名前, {"params": {...}, "preprocess": {...} または None}) にする"""
+    name, _, body = text.partition("=")
+    params = json.loads(body) if body.strip() else {}
+    if not isinstance(params, dict):
+        raise ValueError(f"設定は JSON のオブジェクトで指定してください: {text}")
+    preprocess = params.pop("preprocess", None)
+    return name.strip() or "default", {"params": params, "preprocess": preprocess}
+
+
+def split_params(params):
+    detect = {k: v for k, v in params.items() if k in DETECT_PARAMS}
+    recognize = {k: v for k, v in params.items() if k not in DETECT_PARAMS and k != "detail"}
+    return detect, recognize
+
+
+def run_ocr(fixture, setting, reader):
+    """1枚の画像を段階ごとに時間を測りながら認識する"""
+    from windows import image_cache
+    from windows.ocr import crop_region
+    from windows.ocr_preprocess import preprocess
+    from windows.ocr_tiles import reading_order
+
+    detect_params, recognize_params = split_params(setting["params"])
+    ms = {}
+    image_cache.clear()  # 毎回ディスクから読む（デコード込みの時間）
+    start = time.perf_counter()
+    image = image_cache.load(fixture["path"])
+    ms["load"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    cropped = crop_region(image, tuple(fixture["region"]))
+    ms["crop"] = (time.perf_counter() - start) * 1000
+
+    pre_timings = []
+    start = time.perf_counter()
+    cropped = preprocess(cropped, setting["preprocess"], pre_timings)
+    ms["preprocess"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    horizontal, free = reader.detect(cropped, **detect_params)
+    ms["detect"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    results = reader.recognize(cropped, horizontal_list=horizontal[0], free_list=free[0],
+                               detail=1, **recognize_params)
+    ms["recognize"] = (time.perf_counter() - start) * 1000
+
+    boxes = []
+    for points, text, conf in results:
+        xs = [float(p[0]) for p in points]
+        ys = [float(p[1]) for p in points]
+        boxes.append({"box": [min(xs), min(ys), max(xs), max(ys)], "text": str(text),
+                      "confidence": float(conf)})
+    boxes = reading_order(boxes)
+    lines = [b["text"] for b in boxes]
+    confidences = [b["confidence"] for b in boxes]
+    return {
+        "ms": ms,
+        "preprocess_stages": [[stage, t, note] for stage, t, note in pre_timings],
+        "lines": lines,
+        "cer": char_error_rate(fixture["lines"], lines),
+        "confidence": sum(confidences) / len(confidences) if confidences else None,
+    }
+
+
+def run_cache(fixture, lines, directory):
+    """キャッシュのキー計算とヒットの時間（認識結果は run_ocr で得たものを入れておく）"""
+    from windows import ocr_cache
+
+    region = tuple(fixture["region"])
+    ms = {}
+    ocr_cache._file_digests.clear()
+    start = time.perf_counter()
+    key = ocr_cache.make_key(fixture["path"], region)
+    ms["key_cold"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    ocr_cache.make_key(fixture["path"], region)
+    ms["key_warm"] = (time.perf_counter() - start) * 1000
+
+    memory = ocr_cache.OCRCache(None)
+    memory.put(key, lines)
+    start = time.perf_counter()
+    memory.get(key)
+    ms["memory_hit"] = (time.perf_counter() - start) * 1000
+
+    db_path = os.path.join(directory, "ocr_cache.sqlite3")
+    ocr_cache.OCRCache(db_path).put(key, lines)
+    fresh = ocr_cache.OCRCache(db_path)  # 再起動後と同じく、メモリは空で SQLite から読む
+    start = time.perf_counter()
+    fresh.get(key)
+    ms["sqlite_hit"] = (time.perf_counter() - start) * 1000
+    fresh.db.close()
+    return {"ms": ms}
+
+
+def run_analysis(fixture, stats=True):
+    from windows.image_analysis import analyze_file
+    from windows.image_stats import compute_file
+
+    ms = {}
+    start = time.perf_counter()
+    analyze_file(fixture["path"])
+    ms["exact"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    analyze_file(fixture["path"], fast=True)
+    ms["fast"] = (time.perf_counter() - start) * 1000
+    if stats:
+        start = time.perf_counter()
+        compute_file(fixture["path"])
+        ms["stats"] = (time.perf_counter() - start) * 1000
+    return {"ms": ms}
+
+
+def _median_result(results):
+    """繰り返した結果の各段の時間を中央値にする（認識結果は最後の回のもの）"""
+    merged = dict(results[-1])
+    merged["ms"] = {stage: statistics.median(r["ms"][stage] for r in results)
+                    for stage in results[-1]["ms"]}
+    return merged
+
+
+# --- 表示 ---
+def _format_ms(value):
+    if value is None:
+        return "-"
+    return f"{value:.2f}" if value < 10 else f"{value:.0f}"
+
+
+def print_table(title, rows, stages, extra=()):
+    """rows: [(名前, {"ms": {...}, ...}), ...]。extra は (見出し, 関数) の列"""
+    print(f"\n{title}")
+    header = f"  {'画像':<36}" + "".join(f"{s:>11}" for s in stages)
+    header += "".join(f"{label:>10}" for label, _ in extra)
+    print(header)
+    for name, result in rows:
+        line = f"  {name:<36}" + "".join(f"{_format_ms(result['ms'].get(s)):>11}" for s in stages)
+        line += "".join(f"{fn(result):>10}" for _, fn in extra)
+        print(line)
+
+
+def _cer_text(result):
+    return f"{result['cer']:.1%}"
+
+
+def _conf_text(result):
+    return "-" if result["confidence"] is None else f"{result['confidence']:.2f}"
+
+
+def summarize(report):
+    """設定ごとの各段の中央値と平均の文字誤り率"""
+    summary = {}
+    for name, results in report["ocr"].items():
+        values = list(results.values())
+        if not values:
+            continue
+        summary[name] = {
+            "ms": {s: statistics.median(r["ms"][s] for r in values) for s in OCR_STAGES},
+            "cer": statistics.mean(r["cer"] for r in values),
+        }
+    return summary
+
+
+def print_compare(report, old):
+    """以前の結果と同じ画像・段の時間の比（今回 / 以前）"""
+    print("\n以前の結果との比較（今回 / 以前、1 より大きいと遅くなった）")
+    for section, stages in (("analysis", ANALYSIS_STAGES), ("cache", CACHE_STAGES)):
+        for name, result in report.get(section, {}).items():
+            before = old.get(section, {}).get(name)
+            if before:
+                _print_ratios(f"{section}/{name}", result["ms"], before["ms"], stages)
+    for setting, results in report.get("ocr", {}).items():
+        for name, result in results.items():
+            before = old.get("ocr", {}).get(setting, {}).get(name)
+            if before:
+                _print_ratios(f"ocr/{setting}/{name}", result["ms"], before["ms"], OCR_STAGES,
+                              f"  CER {before['cer']:.1%} -> {result['cer']:.1%}")
+
+
+def _print_ratios(label, now, before, stages, suffix=""):
+    parts = []
+    for stage in stages:
+        if now.get(stage) is not None and before.get(stage):
+            parts.append(f"{stage} x{now[stage] / before[stage]:.2f}")
+    if parts:
+        print(f"  {label}: " + ", ".join(parts) + suffix)
+
+
+# --- 実行 ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR と画像解析の各段の時間と正確さを測る")
+    parser.add_argument("--fixtures", default=default_fixture_dir(),
+                        help="合成画像の保存先（既定 ~/.cache/gooddoctor/bench_fixtures）")
+    parser.add_argument("--langs", default=",".join(LANGS), help="言語（en,ja）")
+    parser.add_argument("--max-mp", type=float, default=100,
+                        help="これより大きい（メガピクセル）画像は使わない（既定 100）")
+    parser.add_argument("--only", action="append", help="画像の名前の一部で絞り込む（複数可）")
+    parser.add_argument("--ja-font", help="日本語を描くフォント（TrueType / OpenType）")
+    parser.add_argument("--setting", action="append",
+                        help='比べる設定 名前=JSON（例 beam=\'{"decoder": "beamsearch"}\'、'
+                             '"preprocess" キーで前処理。複数可）')
+    parser.add_argument("--repeat", type=int, default=1, help="各画像を測る回数（中央値を使う）")
+    parser.add_argument("--no-ocr", action="store_true", help="OCR を測らない（画像解析だけ）")
+    parser.add_argument("--no-stats", action="store_true", help="統計・LSB解析を測らない")
+    parser.add_argument("-o", "--output", help="結果を JSON で保存する")
+    parser.add_argument("--compare", help="以前に -o で保存した結果と比べる")
+    args = parser.parse_args(argv)
+
+    langs = [lang.strip() for lang in args.langs.split(",")]
+    unknown = [lang for lang in langs if lang not in LANGS]
+    if unknown:
+        parser.error(f"不明な言語です: {', '.join(unknown)}")
+    try:
+        settings = dict(parse_setting(s) for s in (args.setting or ["default="]))
+    except ValueError as e:  # json.JSONDecodeError も含む
+        parser.error(str(e))
+
+    font_path = None
+    if "ja" in langs:
+        font_path = find_ja_font(args.ja_font)
+        if font_path is None:
+            print("日本語のフォントが見つからないので日本語の画像は飛ばします（--ja-font で指定）")
+            langs.remove("ja")
+
+    specs = plan_fixtures(langs, args.max_mp)
+    if args.only:
+        specs = [s for s in specs if any(part in spec_name(s) for part in args.only)]
+    print(f"合成画像 {len(specs)} 枚を用意しています: {args.fixtures}")
+    fixtures = []
+    for spec in specs:
+        start = time.perf_counter()
+        fixtures.append(ensure_fixture(spec, args.fixtures, font_path))
+        print(f"  {spec_name(spec):<36} {time.perf_counter() - start:6.2f}s")
+
+    report = {"settings": settings, "fixtures": [f["name"] for f in fixtures],
+              "analysis": {}, "cache": {}, "ocr": {}}
+    repeat = max(1, args.repeat)
+    for fixture in fixtures:
+        runs = [run_analysis(fixture, stats=not args.no_stats) for _ in range(repeat)]
+        report["analysis"][fixture["name"]] = _median_result(runs)
+    print_table("画像解析（ミリ秒）", report["analysis"].items(), ANALYSIS_STAGES)
+
+    if not args.no_ocr:
+        from windows.ocr import get_ocr_reader
+        start = time.perf_counter()
+        reader = get_ocr_reader()
+        report["reader_load_ms"] = (time.perf_counter() - start) * 1000
+        print(f"\nEasyOCR の読み込み: {report['reader_load_ms']:.0f} ms")
+
+        for name, setting in settings.items():
+            results = report["ocr"][name] = {}
+            for fixture in fixtures:
+                runs = [run_ocr(fixture, setting, reader) for _ in range(repeat)]
+                results[fixture["name"]] = _median_result(runs)
+            print_table(f"OCR 設定 {name}: {json.dumps(setting, ensure_ascii=False)}（ミリ秒）",
+                        results.items(), OCR_STAGES,
+                        extra=(("CER", _cer_text), ("信頼度", _conf_text)))
+
+        first = next(iter(report["ocr"].values()))
+        with tempfile.TemporaryDirectory() as directory:
+            for fixture in fixtures:
+                lines = first[fixture["name"]]["lines"]
+                runs = [run_cache(fixture, lines, directory) for _ in range(repeat)]
+                report["cache"][fixture["name"]] = _median_result(runs)
+        print_table("OCRキャッシュ（ミリ秒）", report["cache"].items(), CACHE_STAGES)
+
+        report["summary"] = summarize(report)
+        print("\n設定ごとの中央値（ミリ秒）と平均の文字誤り率")
+        print(f"  {'設定':<20}" + "".join(f"{s:>11}" for s in OCR_STAGES) + f"{'CER':>10}")
+        for name, summary in report["summary"].items():
+            print(f"  {name:<20}" + "".join(f"{_format_ms(summary['ms'][s]):>11}"
+                                           for s in OCR_STAGES) + f"{summary['cer']:>10.1%}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"\n結果を保存しました: {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+起動時間のベンチマーク
+main.py と同じ手順（QApplication → MainWindow → show）を別プロセスで実行し、
+プロセスの起動から MainWindow の最初の描画までの時間を測る。
+-X importtime を付けた実行からは、時間のかかったモジュールの内訳を出す。
+予算（--budget-ms）を超えるか、起動時点で重いライブラリが読み込まれていれば終了コード 1。
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget-ms 800 --runs 5
+    python benchmarks/startup.py --window moji    # サブウィンドウを開くまでも測る
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 800
+# 起動時（と各ウィンドウを開いた時点）で読み込まれていてはいけないモジュール
+HEAVY_MODULES = ("numpy", "cv2", "PIL", "easyocr", "torch")
+
+# 子プロセスで実行するコード。最初の描画が終わったら PAINTED、ウィンドウを開いたら WINDOW を出力する
+CHILD = r"""
+import os, sys, time
+sys.path.insert(0, os.getcwd())
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent, QTimer
+
+HEAVY = {heavy!r}
+WINDOW = {window!r}
+
+def heavy_loaded():
+    return ",".join(m for m in HEAVY if m in sys.modules)
+
+class PaintWatcher(QObject):
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+        self.done = False
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not self.done:
+            self.done = True
+            QTimer.singleShot(0, self.callback)  # 描画が終わってから
+        return False
+
+app = QApplication(sys.argv[:1])
+import main
+window = main.MainWindow()
+
+def open_sub_window():
+    start = time.perf_counter()
+    def painted():
+        ms = (time.perf_counter() - start) * 1000
+        print(f"WINDOW {{ms:.1f}} {{heavy_loaded()}}", flush=True)
+        os._exit(0)
+    window.open_window(WINDOW)
+    sub = window.windows[WINDOW]
+    watcher = PaintWatcher(painted)
+    sub.installEventFilter(watcher)
+    sub.update()
+    sub._watcher = watcher
+
+def main_painted():
+    print(f"PAINTED {{heavy_loaded()}}", flush=True)
+    if WINDOW:
+        open_sub_window()
+    else:
+        os._exit(0)
+
+watcher = PaintWatcher(main_painted)
+window.installEventFilter(watcher)
+window.show()
+app.exec_()
+"""
+
+
+def run_once(window=None, importtime=False):
+    """1回起動して {"startup_ms", "heavy", "window_ms", "window_heavy", "importtime"} を返す"""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", CHILD.format(heavy=HEAVY_MODULES, window=window)]
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True)
+    result = {"startup_ms": None, "heavy": [], "window_ms": None, "window_heavy": []}
+    for line in proc.stdout:
+        kind, _, rest = line.rstrip("\n").partition(" ")
+        if kind == "PAINTED":
+            result["startup_ms"] = (time.perf_counter() - start) * 1000
+            result["heavy"] = [m for m in rest.split(",") if m]
+        elif kind == "WINDOW":
+            ms, _, heavy = rest.partition(" ")
+            result["window_ms"] = float(ms)
+            result["window_heavy"] = [m for m in heavy.split(",") if m]
+    stderr = proc.stderr.read()
+    proc.wait()
+    if result["startup_ms"] is None:
+        raise RuntimeError(f"起動に失敗しました:\n{stderr}")
+    result["importtime"] = parse_importtime(stderr) if importtime else []
+    return result
+
+
+def parse_importtime(stderr):
+    """-X importtime の出力を (累積マイクロ秒, モジュール名) のリストにする（トップレベルのみ）"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # 見出し行
+        # 字下げの無いもの（他のモジュールから読み込まれたものではない）だけを数える
+        if name.startswith(" ") and not name.startswith("  "):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="起動から MainWindow の最初の描画までの時間を測る")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"中央値の上限（既定 {DEFAULT_BUDGET_MS}ms）")
+    parser.add_argument("--runs", type=int, default=5, help="計測の回数")
+    parser.add_argument("--window", choices=["decode", "moji", "image"],
+                        help="最初の描画の後に開くウィンドウ（開くまでの時間も測る）")
+    parser.add_argument("--top", type=int, default=10, help="内訳に表示するモジュール数")
+    args = parser.parse_args(argv)
+
+    # 1回目はディスクキャッシュを温めるだけで数えない
+    run_once(args.window)
+    runs = [run_once(args.window) for _ in range(args.runs)]
+    startup = statistics.median(r["startup_ms"] for r in runs)
+    print(f"起動 → 最初の描画: 中央値 {startup:.0f}ms "
+          f"（最小 {min(r['startup_ms'] for r in runs):.0f}ms / "
+          f"最大 {max(r['startup_ms'] for r in runs):.0f}ms、{args.runs}回）")
+    if args.window:
+        opened = statistics.median(r["window_ms"] for r in runs)
+        print(f"{args.window} ウィンドウを開いて描画するまで: 中央値 {opened:.0f}ms")
+
+    profile = run_once(args.window, importtime=True)
+    print(f"\n読み込みに時間のかかったモジュール（-X importtime、上位{args.top}件）:")
+    for cumulative, name in profile["importtime"][:args.top]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    failed = False
+    heavy = sorted({m for r in runs for m in r["heavy"]})
+    if heavy:
+        print(f"\nNG: 起動時に重いライブラリが読み込まれています: {', '.join(heavy)}")
+        failed = True
+    window_heavy = sorted({m for r in runs for m in r["window_heavy"]})
+    if window_heavy:
+        print(f"NG: ウィンドウを開いた時点で重いライブラリが読み込まれています: {', '.join(window_heavy)}")
+        failed = True
+    if startup > args.budget_ms:
+        print(f"NG: 予算 {args.budget_ms:.0f}ms を超えています")
+        failed = True
+    if not failed:
+        print(f"\nOK: 予算 {args.budget_ms:.0f}ms 以内")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
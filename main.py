@@ -1,11 +1,35 @@
 import sys
 import importlib
+import threading
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout,
-    QWidget, QHBoxLayout, QSpacerItem, QSizePolicy
+    QWidget, QHBoxLayout, QSpacerItem, QSizePolicy, QShortcut
 )
-from PyQt5.QtGui import QPixmap, QFont
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QFont, QKeySequence
+from PyQt5.QtCore import Qt, QTimer
+from windows import perf
+
+# 重いライブラリは各機能が初めて使う時に読み込む。メイン画面の表示後、手が空いたら裏で読み込んでおく
+PRELOAD_MODULES = ("numpy", "cv2", "PIL.Image")
+PRELOAD_DELAY_MS = 500
+
+# 計測のオーバーレイ（Ctrl+Shift+P で表示・非表示）
+PERF_SHORTCUT = "Ctrl+Shift+P"
+PERF_REFRESH_MS = 500
+PERF_OVERLAY_STYLE = (
+    "background-color: rgba(0, 0, 0, 200); color: #7CFC00; padding: 6px; border-radius: 4px;"
+)
+
+
+def preload_modules():
+    """PRELOAD_MODULES を別スレッドで読み込む（無いものは飛ばす）"""
+    def run():
+        for name in PRELOAD_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+    threading.Thread(target=run, daemon=True).start()
 
 
 class MainWindow(QMainWindow):
@@ -65,6 +89,21 @@ class MainWindow(QMainWindow):
         central.setLayout(main_layout)
         self.setCentralWidget(central)
 
+        # --- 計測のオーバーレイ（デバッグ用） ---
+        self.perf_overlay = QLabel(self)
+        self.perf_overlay.setStyleSheet(PERF_OVERLAY_STYLE)
+        font = QFont("Consolas", 8)
+        font.setStyleHint(QFont.Monospace)
+        self.perf_overlay.setFont(font)
+        self.perf_overlay.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.perf_overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.perf_overlay.hide()
+        self.perf_timer = QTimer(self)
+        self.perf_timer.setInterval(PERF_REFRESH_MS)
+        self.perf_timer.timeout.connect(self.update_perf_overlay)
+        self.perf_was_enabled = perf.enabled()
+        QShortcut(QKeySequence(PERF_SHORTCUT), self, self.toggle_perf_overlay)
+
     # --- ボタンにカーソルを合わせた時の処理 ---
     def on_hover(self, key):
         self.status_label.setText(self.descriptions.get(key, ""))
@@ -72,6 +111,37 @@ class MainWindow(QMainWindow):
     def on_leave(self):
         self.status_label.setText("ボタンにカーソルを合わせると説明が表示されます。")
 
+    # --- 計測のオーバーレイ ---
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.place_perf_overlay()
+
+    def place_perf_overlay(self):
+        """オーバーレイをウィンドウ全体（周囲8pxを除く）に合わせる"""
+        self.perf_overlay.setGeometry(8, 8, self.width() - 16, self.height() - 16)
+
+    def toggle_perf_overlay(self):
+        """表示している間だけ計測を有効にする（環境変数などで有効にしていればそのまま）"""
+        if self.perf_overlay.isVisible():
+            self.perf_timer.stop()
+            self.perf_overlay.hide()
+            perf.enable(self.perf_was_enabled)
+            return
+        self.perf_was_enabled = perf.enabled()
+        perf.enable()
+        self.update_perf_overlay()
+        self.place_perf_overlay()
+        self.perf_overlay.show()
+        self.perf_overlay.raise_()
+        self.perf_timer.start()
+
+    def update_perf_overlay(self):
+        stats = perf.summary()
+        if not stats and not perf.counters():
+            self.perf_overlay.setText(f"計測中（{PERF_SHORTCUT} で閉じる）: まだ記録がありません")
+            return
+        self.perf_overlay.setText(perf.format_summary(stats))
+
     # --- ウィンドウを開く処理 ---
     def open_window(self, name):
         # すでにウィンドウが存在し、まだ閉じていない場合 → 再利用
@@ -99,6 +169,25 @@ class MainWindow(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    # --trace パス: 計測を有効にして、終了時に Chrome のトレース形式（JSON）で書き出す
+    if "--trace" in sys.argv:
+        index = sys.argv.index("--trace")
+        if index + 1 < len(sys.argv):
+            perf.set_trace_path(sys.argv[index + 1])
+
     window = MainWindow()
     window.show()
+
+    # --perf: 起動直後から計測のオーバーレイを表示する
+    if "--perf" in sys.argv:
+        window.toggle_perf_overlay()
+
+    # --no-preload: 重いライブラリの先読みをしない（起動時間の計測など）
+    if "--no-preload" not in sys.argv:
+        QTimer.singleShot(PRELOAD_DELAY_MS, preload_modules)
+
+    # --prewarm-ocr: 起動直後にOCRサーバーを立ててモデルを読み込んでおく
+    if "--prewarm-ocr" in sys.argv:
+        from windows.ocr_server import get_client
+        get_client().warm_up()
     sys.exit(app.exec_())
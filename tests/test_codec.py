@@ -0,0 +1,156 @@
+"""
+2進数・16進数・数字の符号化（windows/algorithms/_codec.py）のテスト
+1文字ずつ format() / int() する元の実装と同じ出力になること、mode="utf8" の往復、
+ストリーム変換と run() の一致を確かめる。長い入力は NumPy の経路を通る
+"""
+import random
+
+import pytest
+
+from windows.algorithms import (
+    _codec, alpha_num_de, alpha_num_en, binary_de, binary_en, hex_de, hex_en,
+)
+
+LONG = _codec.NUMPY_MIN_CHARS * 3
+
+
+def _random_text(alphabet, length, seed=0):
+    rng = random.Random(seed)
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+TEXTS = {
+    "empty": "",
+    "ascii": "Hello, World!\n\t~",
+    "latin1": "café ÿ naïve",
+    "japanese": "日本語のテキスト、カタカナ",
+    "emoji": "a😀b\U0010FFFF",
+    "long_ascii": _random_text("abcXYZ 019!\n", LONG),
+    "long_latin1": _random_text("aé ÿ\x00", LONG),
+    "long_mixed": _random_text("aé日😀 ", LONG),
+}
+
+
+# --- 元の実装（1文字ずつ） ---
+def reference_binary_en(text):
+    return " ".join(format(ord(c), "08b") for c in text)
+
+
+def reference_hex_en(text):
+    return " ".join(format(ord(c), "02x") for c in text)
+
+
+def reference_binary_de(text):
+    return "".join(chr(int(c, 2)) for c in text.split())
+
+
+def reference_alpha_num_en(text):
+    return "".join(str(ord(c.upper()) - ord("A") + 1) if c.isalpha() else c for c in text)
+
+
+def reference_alpha_num_de(text):
+    result = []
+    for token in text.split():
+        if token.isdigit():
+            if 1 <= int(token) <= 26:
+                result.append(chr(ord("A") + int(token) - 1))
+        else:
+            result.append(token)
+    return "".join(result)
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.fixture
+def utf8_mode(monkeypatch):
+    for module in (binary_en, binary_de, hex_en):
+        monkeypatch.setitem(module.VARIABLES, "mode", "utf8")
+
+
+# --- mode="char"（既定）は元の実装と同じ ---
+@pytest.mark.parametrize("name", TEXTS)
+def test_binary_en_matches_reference(name):
+    assert binary_en.run(TEXTS[name]) == reference_binary_en(TEXTS[name])
+
+
+@pytest.mark.parametrize("name", TEXTS)
+def test_hex_en_matches_reference(name):
+    assert hex_en.run(TEXTS[name]) == reference_hex_en(TEXTS[name])
+
+
+@pytest.mark.parametrize("name", TEXTS)
+def test_binary_round_trip(name):
+    encoded = binary_en.run(TEXTS[name])
+    assert binary_de.run(encoded) == TEXTS[name]
+
+
+@pytest.mark.parametrize("tokens", [
+    "1 10 1000001 0",                      # 桁数がばらばら
+    "01000001\n01000010\t\t01000011",      # 区切りが空白以外
+    "1" * 20 + " 0",                       # 8桁を超えるトークン
+])
+@pytest.mark.parametrize("repeat", [1, LONG // 16])
+def test_binary_de_irregular_tokens(tokens, repeat):
+    text = " ".join([tokens] * repeat)
+    assert binary_de.run(text) == reference_binary_de(text)
+
+
+@pytest.mark.parametrize("text", ["0102", "1 2 x", "1" * 100])
+def test_binary_de_invalid(text):
+    assert binary_de.run(text * (LONG // len(text))) == "無効な2進数"
+
+
+@pytest.mark.parametrize("name", ["ascii", "latin1", "japanese", "long_ascii", "long_mixed"])
+def test_alpha_num_en_matches_reference(name):
+    assert alpha_num_en.run(TEXTS[name]) == reference_alpha_num_en(TEXTS[name])
+
+
+@pytest.mark.parametrize("text", [
+    "8 5 12 12 15",
+    "1 26 27 0 100 abc 3",
+    " ".join(str(random.Random(1).randint(0, 40)) for _ in range(LONG)),
+])
+def test_alpha_num_de_matches_reference(text):
+    assert alpha_num_de.run(text) == reference_alpha_num_de(text)
+
+
+# --- mode="utf8" ---
+def test_utf8_mode_encodes_bytes(utf8_mode):
+    assert hex_en.run("aé日") == "61 c3 a9 e6 97 a5"
+    assert binary_en.run("é") == "11000011 10101001"
+
+
+@pytest.mark.parametrize("name", TEXTS)
+def test_utf8_round_trip(utf8_mode, name):
+    assert binary_de.run(binary_en.run(TEXTS[name])) == TEXTS[name]
+    assert hex_de.run(hex_en.run(TEXTS[name])) == TEXTS[name]
+
+
+@pytest.mark.parametrize("repeat", [1, LONG])
+def test_utf8_decode_is_strict(utf8_mode, repeat):
+    text = " ".join(["11000011"] * repeat)   # 続きのバイトが無い
+    assert binary_de.run(text) == "無効な2進数（UTF-8 として読めません）"
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        _codec.format_codes("a", 2, "latin1")
+
+
+# --- ストリーム変換は mode="utf8" の run() と同じ ---
+@pytest.mark.parametrize("size", [1, 3, 7, 4096])
+@pytest.mark.parametrize("module", [binary_en, hex_en])
+def test_encode_stream_matches_run(utf8_mode, module, size):
+    text = TEXTS["long_mixed"]
+    data = text.encode("utf-8")
+    streamed = b"".join(module.encode_stream(iter(chunked(data, size))))
+    assert streamed.decode("ascii") == module.run(text)
+
+
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_binary_decode_stream_matches_run(utf8_mode, size):
+    encoded = binary_en.run(TEXTS["long_mixed"]).encode("ascii")
+    streamed = b"".join(binary_de.decode_stream(iter(chunked(encoded, size))))
+    assert streamed.decode("utf-8") == binary_de.run(encoded.decode("ascii"))
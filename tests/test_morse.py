@@ -0,0 +1,112 @@
+"""
+モールス信号（windows/algorithms/_morse.py）のテスト
+README に書いた挙動（区切り・記号の正規化・区切りなしの推測）と、
+チャンクに分けた decode_stream() が run() と同じ結果になることを確かめる
+"""
+import random
+
+import pytest
+
+from windows.algorithms import _morse, morse_de, morse_en
+
+CODES = list(_morse.DECODE)
+
+
+def sample(rng, n):
+    """区切りや記号の揺れを混ぜたモールス信号"""
+    parts = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.6:
+            parts.append(rng.choice(CODES))
+        elif r < 0.7:
+            parts.append("".join(rng.choice(CODES) for _ in range(rng.randint(2, 40))))
+        elif r < 0.75:
+            parts.append(rng.choice(["/", "|", "・ー", "—·", "x", "?", "ab.-"]))
+        parts.append(rng.choice([" ", " ", " ", "  ", "   ", "    ", "\n", " / ", "/"]))
+    return "".join(parts)
+
+
+def stream(rng, text, sizes):
+    data = text.encode()
+    chunks = []
+    i = 0
+    while i < len(data):
+        n = rng.choice(sizes)
+        chunks.append(data[i:i + n])
+        i += n
+    return b"".join(morse_de.decode_stream(iter(chunks))).decode()
+
+
+# --- README の例 ---
+def test_encode():
+    assert morse_en.run("SOS HELP") == "... --- ... / .... . .-.. .--."
+    assert morse_en.run("a@b") == ".- ? -..."
+
+
+def test_round_trip():
+    text = "THE QUICK BROWN FOX 0123456789"
+    assert morse_de.run(morse_en.run(text)) == text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("... --- ... / .... . .-.. .--.", "SOS HELP"),
+    ("... --- ... | .- -...", "SOS AB"),
+    ("...   ---", "S O"),                   # 3つ以上のスペースは単語の区切り
+    ("・ー ーー ・・・", "AMS"),            # 全角・中黒の記号
+    ("...---... .-", "?A"),                 # 符号に無いものは "?"（既定）
+])
+def test_decode(text, expected):
+    assert morse_de.run(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("...---...", "[SOS]"),                 # 区切りなしは推測して [ ] で囲む
+    ("...... ....", "[HI]H"),
+    ("...---...x", "[SOS]?"),
+])
+def test_segment_auto(monkeypatch, text, expected):
+    monkeypatch.setitem(morse_de.VARIABLES, "segment", "auto")
+    assert morse_de.run(text) == expected
+
+
+def test_split_symbols():
+    assert _morse.split_symbols("...---...") == "[SOS]"
+
+
+# --- ストリーム変換は run() と同じ ---
+@pytest.fixture(params=["off", "auto"])
+def segment(request, monkeypatch):
+    monkeypatch.setitem(morse_de.VARIABLES, "segment", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_decode_stream_matches_run(segment, seed):
+    rng = random.Random(seed)
+    for _ in range(40):
+        text = sample(rng, rng.randint(0, 60))
+        assert stream(rng, text, [1, 2, 3, 7, 50]) == morse_de.run(text)
+
+
+def test_encode_stream_matches_run():
+    text = "SOS HELP 日本 a@b " * 50
+    data = text.encode()
+    for size in (1, 2, 5, 64):
+        chunks = [data[i:i + size] for i in range(0, len(data), size)]
+        assert b"".join(morse_en.encode_stream(iter(chunks))).decode() == morse_en.run(text)
+
+
+# --- 長いトークンの逐次処理と途中確定は、一括処理と同じ結果 ---
+def test_long_tokens_match_unbounded(segment, monkeypatch):
+    rng = random.Random(1)
+    texts = [
+        sample(rng, 200) + "".join(rng.choice(".-") for _ in range(3000)) + " " + sample(rng, 50)
+        for _ in range(5)
+    ]
+    expected = [morse_de.run(t) for t in texts]
+    monkeypatch.setattr(_morse, "CARRY_LIMIT", 20)
+    monkeypatch.setattr(_morse, "COMMIT_SIZE", 30)
+    for text, ref in zip(texts, expected):
+        assert morse_de.run(text) == ref
+        assert stream(rng, text, [1, 5, 13, 100]) == ref
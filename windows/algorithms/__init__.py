@@ -0,0 +1,180 @@
+"""
+アルゴリズムの共有レジストリ
+algorithmsフォルダを走査して ALGO_NAME / DESCRIPTION / VARIABLES をASTから読み取り、
+ファイルの更新時刻ごとにキャッシュする。モジュール本体は初めて実行される時に読み込む。
+全ウィンドウが同じエントリ（= 同じ VARIABLES）を共有する。
+
+run(text) の他に encode_stream / decode_stream(chunks) を持つアルゴリズムは
+bytes のストリームとしてファイル単位で変換できる（_stream.py 参照）。
+"""
+import ast
+import importlib
+import os
+import threading
+
+from windows.algorithms._stream import CHUNK_SIZE, transform_file
+
+STREAM_FUNCTIONS = ("encode_stream", "decode_stream")
+
+ALGO_PATH = os.path.dirname(__file__)
+
+_lock = threading.RLock()
+_manifest = {}  # ファイル名 -> AlgorithmEntry
+
+
+class AlgorithmEntry:
+    """1つのアルゴリズムファイルのメタ情報と、遅延読み込みされるモジュール"""
+
+    def __init__(self, module_name, mtime, name, description, variables, stream_name=None,
+                 reload=False):
+        self.module_name = module_name
+        self.mtime = mtime
+        self.name = name
+        self.description = description
+        self._variables = variables
+        self.stream_name = stream_name  # "encode_stream" / "decode_stream" / None
+        self._module = None
+        self._reload = reload  # 読み込み済みのファイルが更新された場合
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    @property
+    def module(self):
+        """モジュール本体（初回アクセス時にimport）"""
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    module = importlib.import_module(self.module_name)
+                    if self._reload:
+                        module = importlib.reload(module)
+                    # 読み込み前にGUIで変更された値を引き継ぎ、以後はモジュール側を共有する
+                    if self._variables is not None:
+                        module.VARIABLES.update(self._variables)
+                        self._variables = module.VARIABLES
+                    self._module = module
+        return self._module
+
+    @property
+    def variables(self):
+        """VARIABLES（可変パラメータ）。無いアルゴリズムは None"""
+        return self._variables
+
+    def run(self, text):
+        return self.module.run(text)
+
+    @property
+    def streamable(self):
+        return self.stream_name is not None
+
+    def stream(self, chunks):
+        """bytes のイテレータを変換して bytes を順に返す"""
+        if self.stream_name is None:
+            raise NotImplementedError(f"{self.name} はストリーム変換に対応していません")
+        return getattr(self.module, self.stream_name)(chunks)
+
+    def transform_file(self, src, dst, chunk_size=CHUNK_SIZE, progress=None):
+        """ファイルからファイルへ一定メモリで変換"""
+        transform_file(self.stream, src, dst, chunk_size, progress)
+
+    def __repr__(self):
+        return f"<AlgorithmEntry {self.module_name} ({self.name})>"
+
+
+def _read_manifest(path):
+    """モジュールを実行せずにトップレベルの定数を読み取る"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    values = {}
+    has_run = False
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "run":
+            has_run = True
+        elif isinstance(node, ast.FunctionDef) and node.name in STREAM_FUNCTIONS:
+            values["STREAM"] = node.name
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id in ("ALGO_NAME", "DESCRIPTION", "VARIABLES"):
+                    values[target.id] = ast.literal_eval(node.value)
+    if not has_run or "ALGO_NAME" not in values:
+        return None
+    return values
+
+
+def _import_manifest(module_name, reload):
+    try:
+        module = importlib.import_module(module_name)
+        if reload:
+            module = importlib.reload(module)
+    except Exception as e:
+        print(f"アルゴリズム読み込みエラー ({module_name}): {e}")
+        return None
+    if not hasattr(module, "ALGO_NAME") or not hasattr(module, "run"):
+        return None
+    values = {"ALGO_NAME": module.ALGO_NAME, "DESCRIPTION": getattr(module, "DESCRIPTION", "")}
+    if hasattr(module, "VARIABLES"):
+        values["VARIABLES"] = module.VARIABLES
+    for func in STREAM_FUNCTIONS:
+        if hasattr(module, func):
+            values["STREAM"] = func
+    return values
+
+
+def load_algorithms():
+    """アルゴリズムの一覧をファイル名順で返す。変更のないファイルは再解析しない"""
+    with _lock:
+        seen = set()
+        with os.scandir(ALGO_PATH) as it:
+            files = sorted(
+                (e.name, e.stat().st_mtime_ns) for e in it
+                if e.name.endswith(".py") and not e.name.startswith("_")
+            )
+
+        entries = []
+        for file, mtime in files:
+            seen.add(file)
+            entry = _manifest.get(file)
+            if entry is None or entry.mtime != mtime:
+                entry = _make_entry(file, mtime, previous=entry)
+                _manifest[file] = entry
+            if entry.name is not None:
+                entries.append(entry)
+
+        for file in list(_manifest):
+            if file not in seen:
+                del _manifest[file]
+        return entries
+
+
+def _make_entry(file, mtime, previous=None):
+    module_name = f"{__name__}.{file[:-3]}"
+    reload = previous is not None and previous.loaded
+    try:
+        values = _read_manifest(os.path.join(ALGO_PATH, file))
+    except ValueError:
+        # 定数がリテラルでない場合だけ実際にimportして読む
+        values = _import_manifest(module_name, reload)
+        reload = False
+    except (SyntaxError, OSError) as e:
+        print(f"アルゴリズム読み込みエラー ({file}): {e}")
+        values = None
+    if values is None:
+        # ALGO_NAME と run を持たないファイルはアルゴリズムとして扱わない
+        return AlgorithmEntry(module_name, mtime, None, None, None)
+
+    variables = values.get("VARIABLES")
+    return AlgorithmEntry(
+        module_name, mtime, values["ALGO_NAME"], values.get("DESCRIPTION", ""),
+        dict(variables) if variables is not None else None,
+        stream_name=values.get("STREAM"), reload=reload,
+    )
+
+
+def get_algorithm(name):
+    """ALGO_NAME（またはファイル名 例: base64_de）からエントリを探す"""
+    for entry in load_algorithms():
+        if name in (entry.name, entry.module_name.rsplit(".", 1)[-1]):
+            return entry
+    return None
@@ -0,0 +1,238 @@
+"""
+2進数・16進数・数字の符号化で共有する一括変換
+1文字ずつ format() / int() する代わりに、変換表・bytes.hex・NumPy の配列演算でまとめて変換する。
+出力は1文字ずつの実装と同じ（区切りはスペース、2進数は8桁以上・16進数は2桁以上の小文字）。
+
+mode は "char"（文字コード1つを1トークン）と "utf8"（UTF-8 の1バイトを1トークン、デコードは厳密）。
+NumPy は NUMPY_MIN_CHARS 以上の入力を変換する時に初めて読み込む（短い入力は変換表だけで足りる）。
+"""
+import re
+
+MODES = ("char", "utf8")
+NUMPY_MIN_CHARS = 4096
+BLOCK_SIZE = 1 << 20        # NumPy で一度に変換する文字数（中間の配列の大きさを抑える）
+MAX_CODE = 0x10FFFF
+
+MIN_DIGITS = {2: 8, 16: 2}
+DIGIT_BITS = {2: 1, 16: 4}
+MAX_TOKEN_DIGITS = {2: 62, 10: 18}  # int64 に収まる桁数
+# str.split() が区切りとみなす ASCII の空白
+SEPARATORS = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+_BIN_TABLE = [format(b, "08b") for b in range(256)]
+_SEPARATOR_RE = re.compile(b"[" + re.escape(SEPARATORS) + b"]")
+
+
+def check_mode(mode):
+    if mode not in MODES:
+        raise ValueError(f"mode は {' / '.join(MODES)} のどれかです: {mode}")
+
+
+# --- 符号化 ---
+def binary_bytes(data):
+    """バイト列の各バイトを8桁の2進数にしてスペースで区切った bytes"""
+    if len(data) < NUMPY_MIN_CHARS:
+        return " ".join(map(_BIN_TABLE.__getitem__, data)).encode("ascii")
+    return memoryview(_binary_array(data))[:-1].tobytes()
+
+
+def _binary_array(data):
+    """各バイトを "dddddddd "（9バイト）にして並べた uint8 の配列（最後にも区切りが付く）"""
+    import numpy as np
+    # 9バイトを1要素とする表を引くので、コピーは1回で済む
+    table = np.frombuffer((" ".join(_BIN_TABLE) + " ").encode("ascii"), "V9")
+    return table.take(np.frombuffer(data, np.uint8)).view(np.uint8)
+
+
+def format_bytes(data, base):
+    """バイト列を1バイト1トークンで base 進数にした文字列"""
+    if base == 16:
+        return data.hex(" ")
+    if len(data) < NUMPY_MIN_CHARS:
+        return " ".join(map(_BIN_TABLE.__getitem__, data))
+    return str(memoryview(_binary_array(data))[:-1], "ascii")
+
+
+def format_codes(text, base, mode="char"):
+    """文字列を base（2 / 16）進数のトークンにしてスペースで区切る"""
+    check_mode(mode)
+    if mode == "utf8":
+        return format_bytes(text.encode("utf-8"), base)
+    if text.isascii():
+        return format_bytes(text.encode("ascii"), base)
+    try:
+        return format_bytes(text.encode("latin-1"), base)
+    except UnicodeEncodeError:
+        pass
+    if len(text) < NUMPY_MIN_CHARS:
+        spec = f"0{MIN_DIGITS[base]}{'b' if base == 2 else 'x'}"
+        return " ".join([format(ord(c), spec) for c in text])
+    return _format_wide(text, base)
+
+
+def _format_wide(text, base):
+    """256以上の文字コードを含む文字列（トークンの桁数が文字ごとに違う）"""
+    spec = f"0{MIN_DIGITS[base]}{'b' if base == 2 else 'x'}"
+    return map_codes(text, lambda code: format(code, spec) + " ")[:-1]
+
+
+def map_codes(text, replace):
+    """
+    各文字を replace(文字コード) の文字列に置き換えて連結する（str.translate の一括版）
+    replace は入力に現れる文字の種類ごとに1回だけ呼ぶ。置き換え結果を並べる部分は NumPy で行う
+    """
+    import numpy as np
+    pieces = []
+    for offset in range(0, len(text), BLOCK_SIZE):
+        block = text[offset:offset + BLOCK_SIZE]
+        codes = np.frombuffer(block.encode("utf-32-le", "surrogatepass"), np.uint32)
+        # 現れた文字の一覧と、各文字がその何番目か（np.unique より速い、値の範囲が狭いので）
+        present = np.zeros(int(codes.max()) + 1, bool)
+        present[codes] = True
+        unique = np.flatnonzero(present)
+        index = np.zeros(len(present), np.int32)
+        index[unique] = np.arange(len(unique), dtype=np.int32)
+        table = [replace(int(code)).encode("utf-8", "surrogatepass") for code in unique]
+        pieces.append(_gather(table, index[codes]))
+    return b"".join(pieces).decode("utf-8", "surrogatepass")
+
+
+def _gather(table, indices):
+    """table（UTF-8 の bytes のリスト）から indices の順に取り出して連結した bytes"""
+    import numpy as np
+    lengths = np.fromiter(map(len, table), np.int64, len(table))
+    longest = int(lengths.max())
+    # 表を左詰めの2次元配列にして行を引く。余白は UTF-8 に現れない 0xFF で埋めておき、最後に取り除く
+    # 行の幅は 1/2/4 バイトか 8 の倍数にして、1行を1つの整数（の並び）として take で引く
+    width = next((w for w in (1, 2, 4) if longest <= w), -(-longest // 8) * 8)
+    padded = np.full((len(table), width), 0xFF, np.uint8)
+    padded[np.arange(width) < lengths[:, None]] = np.frombuffer(b"".join(table), np.uint8)
+    rows = padded.view(f"u{min(width, 8)}")
+    data = rows.take(indices, axis=0).tobytes()
+    return data if (lengths == width).all() else data.translate(None, b"\xff")
+
+
+# --- 復号 ---
+def parse_tokens(text, base):
+    """
+    空白区切りの base 進数（符号・接頭辞なし）を int64 の配列にする
+    短い入力、ASCII 以外・数字と空白以外を含む入力、桁の多すぎるトークンは None（1つずつ変換する）
+    """
+    if len(text) < NUMPY_MIN_CHARS or not text.isascii():
+        return None
+    data = text.encode("ascii")
+    if data.translate(None, b"0123456789"[:base] + SEPARATORS):
+        return None
+    import numpy as np
+    pieces = []
+    start = 0
+    while start < len(data):
+        # トークンの途中で切らないよう、区切りの位置までを1ブロックにする
+        end = start + BLOCK_SIZE
+        match = _SEPARATOR_RE.search(data, end) if end < len(data) else None
+        end = match.start() if match else len(data)
+        values = _parse_block(np.frombuffer(data, np.uint8, end - start, start), base)
+        if values is None:
+            return None
+        pieces.append(values)
+        start = end + 1   # ブロックの間の区切り1文字は飛ばす
+    return np.concatenate(pieces) if pieces else np.zeros(0, np.int64)
+
+
+def _parse_block(raw, base):
+    """数字と区切りだけのブロックのトークンの値"""
+    import numpy as np
+    if base == 2:
+        values = _parse_octets(raw)
+        if values is not None:
+            return values
+    digit = raw - np.uint8(ord("0"))   # 区切りは桁あふれで base 以上の値になる
+    is_digit = digit < base
+    values = _parse_fixed_width(digit, is_digit, base)
+    if values is not None:
+        return values
+    # 数字と区切りが入れ替わる位置が、トークンの始まりと終わりの交互の並びになる
+    changes = np.flatnonzero(np.diff(is_digit, prepend=False, append=False))
+    starts, ends = changes[0::2], changes[1::2]
+    if not len(starts):
+        return np.zeros(0, np.int64)
+    width = int((ends - starts).max())
+    if width > MAX_TOKEN_DIGITS[base]:
+        return None
+    # トークンを右詰めで width 桁とみなし、上の桁から1桁ずつ全トークンまとめて足していく
+    values = np.zeros(len(starts), np.int64)
+    for k in range(width):
+        position = ends - width + k
+        digits = digit[np.maximum(position, 0)].astype(np.int64)
+        digits[position < starts] = 0
+        values *= base
+        values += digits
+    return values
+
+
+def _parse_octets(raw):
+    """
+    "dddddddd dddddddd ..."（2進数エンコーダの出力の形）なら各トークンの値、違えば None
+    トークンの8文字を1つの64ビット整数として読み、各バイトの最下位ビットを掛け算で1バイトに集める
+    """
+    import numpy as np
+    if (len(raw) + 1) % 9:
+        return None
+    rows = (len(raw) + 1) // 9
+    words = np.ndarray((rows,), "<u8", raw, 0, (9,))
+    if ((words & np.uint64(0xFEFEFEFEFEFEFEFE)) != np.uint64(0x3030303030303030)).any():
+        return None   # "0" / "1" 以外を含む
+    gaps = np.ndarray((rows - 1,), np.uint8, raw, 8, (9,))
+    if not np.isin(gaps, np.frombuffer(SEPARATORS, np.uint8)).all():
+        return None
+    bits = words & np.uint64(0x0101010101010101)
+    return ((bits * np.uint64(0x8040201008040201)) >> np.uint64(56)).astype(np.int64)
+
+
+def _parse_fixed_width(digit, is_digit, base):
+    """
+    同じ桁数のトークンが区切り1文字で並んでいる（エンコーダの出力の形）なら、
+    (トークン数, 桁数 + 1) の2次元にしてまとめて値を求める。そうでなければ None
+    """
+    import numpy as np
+    width = int(np.argmin(is_digit)) if not is_digit.all() else len(digit)
+    stride = width + 1
+    if not 0 < width <= MAX_TOKEN_DIGITS[base] or (len(digit) + 1) % stride:
+        return None
+    rows = (len(digit) + 1) // stride
+    flags = np.zeros(rows * stride, bool)
+    flags[:len(digit)] = is_digit
+    flags = flags.reshape(rows, stride)
+    if not flags[:, :width].all() or flags[:, width].any():
+        return None
+    matrix = np.zeros(rows * stride, np.uint8)
+    matrix[:len(digit)] = digit
+    matrix = matrix.reshape(rows, stride)[:, :width]
+    if base == 2 and width <= 8:
+        # 8ビット以下の2進数は1バイトに詰めるだけ（右側に詰められた0の分だけずらす）
+        return np.packbits(matrix, axis=1)[:, 0].astype(np.int64) >> (8 - width)
+    weights = base ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    if base ** width <= 2 ** 53:   # float64 で誤差なく計算できる範囲
+        return (matrix @ weights.astype(np.float64)).astype(np.int64)
+    return matrix.astype(np.int64) @ weights
+
+
+def codes_to_text(values, mode="char"):
+    """
+    トークンの値の配列を文字列にする。範囲外の値は ValueError
+    mode "utf8" では値をバイトとして厳密に UTF-8 で復号する（不正な並びは UnicodeDecodeError）
+    """
+    import numpy as np
+    check_mode(mode)
+    if not len(values):
+        return ""
+    low, high = int(values.min()), int(values.max())
+    if mode == "utf8":
+        if low < 0 or high > 0xFF:
+            raise ValueError("バイトの範囲（0〜255）を超えています")
+        return values.astype(np.uint8).tobytes().decode("utf-8")
+    if low < 0 or high > MAX_CODE:
+        raise ValueError("文字コードの範囲を超えています")
+    if high < 256:
+        return values.astype(np.uint8).tobytes().decode("latin-1")
+    return values.astype("<u4").tobytes().decode("utf-32-le", "surrogatepass")
@@ -0,0 +1,11 @@
+"""
+英文らしさの判定で共有する言語データ
+magic（スコア）、bruteforce（カイ二乗）、モールス信号の分割（Viterbi）が使う
+"""
+
+# 英語の文字頻度（a-z）
+ENGLISH_FREQ = (
+    0.0817, 0.0149, 0.0278, 0.0425, 0.1270, 0.0223, 0.0202, 0.0609, 0.0697,
+    0.0015, 0.0077, 0.0403, 0.0241, 0.0675, 0.0751, 0.0193, 0.0010, 0.0599,
+    0.0633, 0.0906, 0.0276, 0.0098, 0.0236, 0.0015, 0.0197, 0.0007,
+)
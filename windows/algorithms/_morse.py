@@ -0,0 +1,330 @@
+"""
+モールス信号のエンコード・デコードで共有するエンジン
+符号表を二分トライ（"." で左、"-" で右の子。ノード n の子は 2n+1 / 2n+2）にして持ち、
+- Decoder: チャンクごとに feed() する1パスの逐次デコーダ
+  OCR で混じる「・」「ー」「—」などの記号を "." / "-" に揃え、文字の区切り（空白・letter_sep）と
+  単語の区切り（word_sep の文字、word_gap 個以上続く空白）を見分ける
+- split_symbols(): 区切りのない "." "-" の並びを、英語の文字頻度で最もありそうな文字列に分ける（Viterbi）
+  推測した文字は "[HI]" のように角括弧で囲み、符号どおりに読めた文字と区別する
+どちらも入力の長さに比例する時間で、保持する状態はトークン1つ分（分割中は確定していない部分）だけ。
+"""
+import math
+import re
+from functools import lru_cache
+
+from windows.algorithms._lang import ENGLISH_FREQ
+from windows.algorithms._substitution import LazyTable
+
+CODES = {
+    'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.', 'F': '..-.',
+    'G': '--.', 'H': '....', 'I': '..', 'J': '.---', 'K': '-.-', 'L': '.-..',
+    'M': '--', 'N': '-.', 'O': '---', 'P': '.--.', 'Q': '--.-', 'R': '.-.',
+    'S': '...', 'T': '-', 'U': '..-', 'V': '...-', 'W': '.--', 'X': '-..-',
+    'Y': '-.--', 'Z': '--..', '0': '-----', '1': '.----', '2': '..---', '3': '...--',
+    '4': '....-', '5': '.....', '6': '-....', '7': '--...', '8': '---..', '9': '----.',
+}
+MAX_LENGTH = 5
+SEGMENT_MODES = ("off", "auto")
+DIGIT_SHARE = 0.05      # 分割で数字に割り当てる確率（残りを英語の文字頻度で分ける）
+CARRY_LIMIT = 1 << 16   # これより長いトークンはチャンクの境界で持ち越さず、続きとして逐次処理する
+COMMIT_SIZE = 1 << 16   # 分割中、確定していない記号がこれだけ溜まったら確定した部分を出力する
+SPLIT_CACHE = 4096      # 分割結果を覚えておく符号表に無いトークンの数
+SPLIT_CACHE_LENGTH = 64  # これより長いトークンの分割結果は覚えない
+
+# OCR や入力方法で "." / "-" の代わりに現れる記号
+DOT_GLYPHS = ".·•∙⋅・･．。◦●"
+DASH_GLYPHS = "-_−–—―‐‑‒─ー－﹣"
+WORD_SEPARATORS = "/|"
+
+# --- 二分トライ ---
+_NODES = [None] * (2 ** (MAX_LENGTH + 1) - 1)   # ノード番号 -> 文字
+for _char, _code in CODES.items():
+    _node = 0
+    for _symbol in _code:
+        _node = 2 * _node + (1 if _symbol == "." else 2)
+    _NODES[_node] = _char
+_DEPTH = [(n + 1).bit_length() - 1 for n in range(len(_NODES))]
+
+
+def _path(node):
+    """ノードまでの符号"""
+    symbols = []
+    while node:
+        symbols.append("." if node % 2 else "-")
+        node = (node - 1) // 2
+    return "".join(reversed(symbols))
+
+
+DECODE = {_path(n): c for n, c in enumerate(_NODES) if c}
+ENCODE = {c: code for code, c in DECODE.items()}
+_LOOKUP = {**DECODE, "/": " "}   # デコードで引く固定の表（無いトークンは Decoder._miss へ）
+# str.split() が区切りとみなす文字（全角スペースまで）
+_SPACES = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680" + "".join(map(chr, range(0x2000, 0x200b))) \
+    + "\u2028\u2029\u202f\u205f\u3000"
+_TO_BITS = bytes.maketrans(b".-", b"\x00\x01")
+_SYMBOL_RUNS = re.compile(r"[.\-]+|[^.\-]+")
+
+
+def check_segment(segment):
+    if segment not in SEGMENT_MODES:
+        raise ValueError(f"segment は {' / '.join(SEGMENT_MODES)} のどれかです: {segment}")
+
+
+# --- エンコード ---
+def _encode_code(code):
+    c = chr(code)
+    if c.isspace():
+        return "/ "
+    return ENCODE.get(c.upper(), "?") + " "
+
+
+_ENCODE_TABLE = LazyTable(_encode_code)
+_ENCODE_TABLE.update({i: _encode_code(i) for i in range(128)})
+
+
+def encode(text):
+    """文字はスペース、単語は " / " で区切ったモールス信号。符号の無い文字は "?" """
+    return text.translate(_ENCODE_TABLE)[:-1]
+
+
+# --- 区切りのない並びの分割 ---
+@lru_cache(maxsize=None)
+def _candidates():
+    """
+    直近5記号（新しい記号が最下位ビット）ごとの、そこで終わりうる符号の (-長さ, ノード, 対数確率)
+    -長さ はスコアのリストの末尾から符号の始まりの位置を引くための負のインデックス
+    """
+    weights = {}
+    for node, char in enumerate(_NODES):
+        if char is None:
+            continue
+        if char.isdigit():
+            p = DIGIT_SHARE / 10
+        else:
+            p = ENGLISH_FREQ[ord(char) - ord("A")] * (1 - DIGIT_SHARE)
+        weights[node] = math.log(p)
+    table = []
+    for window in range(2 ** MAX_LENGTH):
+        entries = []
+        for length in range(1, MAX_LENGTH + 1):
+            node = 2 ** length - 1 + (window & (2 ** length - 1))
+            if node in weights:
+                entries.append((-length, node, weights[node]))
+        table.append(tuple(entries))
+    return tuple(table)
+
+
+class Segmenter:
+    """
+    区切りのない "." "-" の並びを逐次 Viterbi で分割する
+    符号は5記号以下なので、どの分け方も直近5か所の境界のどれかを通る。
+    その5か所からたどった最良の経路が合流した位置より前は、この先の入力によらず確定している
+    """
+
+    def __init__(self):
+        self._candidates = _candidates()
+        self._reset()
+
+    def _reset(self):
+        # 先頭に4つの番兵（-inf）を置き、位置0（記号0個）のスコアをインデックス4に置く
+        self._score = [-math.inf] * (MAX_LENGTH - 1) + [0.0]
+        self._back = bytearray(MAX_LENGTH)   # その位置で終わる最後の符号のノード
+        self._window = 0
+
+    def feed(self, symbols):
+        """symbols（"." と "-" だけ）を読み進め、確定した文字を返す"""
+        score, candidates = self._score, self._candidates
+        append_score, append_back = score.append, self._back.append
+        window = self._window
+        for bit in symbols.encode("ascii").translate(_TO_BITS):
+            window = ((window << 1) | bit) & 0b11111
+            best, choice = -math.inf, 0
+            for start, node, weight in candidates[window]:
+                s = score[start] + weight
+                if s > best:
+                    best, choice = s, node
+            append_score(best)
+            append_back(choice)
+        self._window = window
+        if len(score) > COMMIT_SIZE:
+            return self._commit()
+        return ""
+
+    def finish(self):
+        """並びの終わり。残りをすべて確定して返し、次の並びに備える"""
+        letters = self._trace(len(self._score) - 1)
+        self._reset()
+        return letters
+
+    def _trace(self, index):
+        letters = []
+        while index >= MAX_LENGTH:
+            node = self._back[index]
+            letters.append(_NODES[node])
+            index -= _DEPTH[node]
+        return "".join(reversed(letters))
+
+    def _commit(self):
+        back = self._back
+        heads = set(range(len(self._score) - MAX_LENGTH, len(self._score)))
+        while len(heads) > 1:
+            index = max(heads)
+            heads.remove(index)
+            heads.add(index - _DEPTH[back[index]])
+        merge = heads.pop()
+        if merge < MAX_LENGTH:
+            return ""
+        letters = self._trace(merge)
+        # 合流点をインデックス4にずらす。スコアはそのまま（同点の比べ方が確定のタイミングで変わらないように）
+        del self._score[:merge - MAX_LENGTH + 1]
+        self._score[:MAX_LENGTH - 1] = [-math.inf] * (MAX_LENGTH - 1)
+        del self._back[:merge - MAX_LENGTH + 1]
+        return letters
+
+
+def split_symbols(token):
+    """区切りの無いトークンを分割して [ ] で囲む。"." "-" 以外の文字の並びは "?" 1つにする"""
+    segmenter = Segmenter()
+    return "".join(
+        "[" + segmenter.feed(run) + segmenter.finish() + "]" if run[0] in ".-" else "?"
+        for run in _SYMBOL_RUNS.findall(token)
+    )
+
+
+_split_cached = lru_cache(maxsize=SPLIT_CACHE)(split_symbols)
+
+
+def _split_unknown(token):
+    """符号表に無いトークンの分割。短いものだけ上限つきで覚え、入力が長くてもメモリが増えないようにする"""
+    if len(token) <= SPLIT_CACHE_LENGTH:
+        return _split_cached(token)
+    return split_symbols(token)
+
+
+def _unknown(token):
+    return "?"
+
+
+# --- デコード ---
+@lru_cache(maxsize=None)
+def _normalize_table(word_sep, letter_sep):
+    """記号を "." / "-"、文字の区切りを " "、単語の区切りを "/" に揃える変換表（str 用と ASCII の bytes 用）"""
+    table = {ord(c): "." for c in DOT_GLYPHS}
+    table.update({ord(c): "-" for c in DASH_GLYPHS})
+    if "/" not in word_sep:
+        table[ord("/")] = "?"   # 単語の区切りでない "/" はただの不明な文字
+    table.update({ord(c): " " for c in _SPACES + letter_sep})
+    table.update({ord(c): "/" for c in word_sep})
+    ascii_table = bytes(ord(table.get(i, chr(i))) for i in range(128)) + bytes(range(128, 256))
+    return table, ascii_table
+
+
+class Decoder:
+    """
+    チャンクごとに feed(文字列) で出力を受け取り、最後に finish() を呼ぶ逐次デコーダ
+    チャンクの境界をまたぐトークンと空白（単語の区切りの判定に使う）は次のチャンクに持ち越す
+    符号表に無いトークンは "?" にする（segment="off"）。segment="auto" では split_symbols() で分割する
+    """
+
+    def __init__(self, word_sep=WORD_SEPARATORS, letter_sep="", word_gap=3, segment="off"):
+        check_segment(segment)
+        self._normalize, self._normalize_ascii = _normalize_table(str(word_sep), str(letter_sep))
+        self._gap_width = max(1, word_gap or 0)
+        self._gap = re.compile(" {%d,}" % word_gap) if word_gap and word_gap > 0 else None
+        self._segment = segment == "auto"
+        self._miss = _split_unknown if self._segment else _unknown
+        self._carry = ""
+        self._long = None         # CARRY_LIMIT を超えて続いているトークン（Segmenter か False）
+        self._in_run = False      # 長いトークンの "." "-" の並びを分割している途中（"[" を出力済み）
+        self._pending_space = False
+        self._started = False
+
+    def feed(self, text):
+        out = []
+        if text.isascii():
+            s = text.encode("ascii").translate(self._normalize_ascii).decode("ascii")
+        else:
+            s = text.translate(self._normalize)
+        if self._long is not None:
+            cut = min((i for i in (s.find(" "), s.find("/")) if i >= 0), default=len(s))
+            self._feed_long(s[:cut], out)
+            if cut == len(s):
+                return "".join(out)
+            self._finish_long(out)
+            s = s[cut:]
+        s = self._carry + s
+        stripped = s.rstrip(" ")
+        if len(stripped) < len(s):
+            # 空白で終わっている（最後のトークンは完結している）。空白だけを持ち越す
+            self._carry = s[len(stripped):][-self._gap_width:]
+        else:
+            cut = max(s.rfind(" "), s.rfind("/")) + 1
+            stripped, self._carry = s[:cut], s[cut:]
+            if len(self._carry) > CARRY_LIMIT:
+                self._long = Segmenter() if self._segment else False
+                carry, self._carry = self._carry, ""
+                self._decode(stripped, out)
+                self._feed_long(carry, out)
+                return "".join(out)
+        self._decode(stripped, out)
+        return "".join(out)
+
+    def finish(self):
+        out = []
+        if self._long is not None:
+            self._finish_long(out)
+        self._decode(self._carry, out)
+        self._carry = ""
+        return "".join(out)
+
+    def _decode(self, s, out):
+        if not s:
+            return
+        if self._gap is not None and " " * self._gap_width in s:
+            s = self._gap.sub("/", s)
+        get, miss = _LOOKUP.get, self._miss
+        letters = "".join([get(token) or miss(token) for token in s.replace("/", " / ").split()])
+        if " " not in letters:
+            self._emit(letters, out)
+            return
+        # 単語の区切りが続いたものは1つにし、前後の区切りは前後のチャンクとの間に回す
+        if letters[0] == " ":
+            self._pending_space = True
+        core = letters.strip(" ")
+        self._emit(" ".join(core.split()) if "  " in core else core, out)
+        if letters[-1] == " ":
+            self._pending_space = True
+
+    def _emit(self, letters, out):
+        if not letters:
+            return
+        if self._pending_space and self._started:
+            out.append(" ")
+        out.append(letters)
+        self._pending_space = False
+        self._started = True
+
+    def _feed_long(self, s, out):
+        if self._long is False:
+            return
+        for run in _SYMBOL_RUNS.findall(s):
+            if run[0] in ".-":
+                if not self._in_run:
+                    self._emit("[", out)
+                    self._in_run = True
+                self._emit(self._long.feed(run), out)
+            else:
+                self._close_run(out)
+                self._emit("?", out)
+
+    def _close_run(self, out):
+        if self._in_run:
+            self._emit(self._long.finish() + "]", out)
+            self._in_run = False
+
+    def _finish_long(self, out):
+        if self._long is False:
+            self._emit("?", out)
+        else:
+            self._close_run(out)
+        self._long = None
@@ -0,0 +1,82 @@
+"""
+バイト列をチャンク単位で変換するストリームAPIの共通部品
+各アルゴリズムは encode_stream / decode_stream(chunks) を持ち、
+bytes のイテレータを受け取って bytes を順に返す（入力全体をメモリに載せない）
+"""
+import os
+import re
+
+CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(rb"\s+")
+
+
+def iter_file(path, chunk_size=CHUNK_SIZE):
+    """ファイルをチャンクごとに読み出す"""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def transform_file(stream_func, src, dst, chunk_size=CHUNK_SIZE, progress=None):
+    """src を stream_func で変換して dst に書き出す。progress(読んだバイト数, 全体) を呼ぶ"""
+    total = os.path.getsize(src)
+    done = 0
+
+    def chunks():
+        nonlocal done
+        for chunk in iter_file(src, chunk_size):
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+            yield chunk
+
+    tmp = dst + ".part"
+    try:
+        with open(tmp, "wb") as out:
+            for piece in stream_func(chunks()):
+                out.write(piece)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def fixed_blocks(chunks, size):
+    """size の倍数バイトずつに揃えて返し、余りは最後にまとめて返す"""
+    carry = b""
+    for chunk in chunks:
+        data = carry + chunk
+        cut = len(data) - len(data) % size
+        carry = data[cut:]
+        if cut:
+            yield data[:cut]
+    if carry:
+        yield carry
+
+
+def tokens(chunks):
+    """空白区切りのトークンをチャンク境界をまたいで正しく切り出し、チャンクごとのリストで返す"""
+    carry = b""
+    for chunk in chunks:
+        parts = _WHITESPACE.split(carry + chunk)
+        # 末尾が空白で終わっていなければ最後のトークンは次のチャンクに続く
+        carry = parts.pop()
+        parts = [p for p in parts if p]
+        if parts:
+            yield parts
+    if carry:
+        yield [carry]
+
+
+def join_stream(pieces, sep):
+    """チャンクごとの変換結果を sep で連結する（チャンク間にも sep を入れる）"""
+    first = True
+    for piece in pieces:
+        if not piece:
+            continue
+        yield piece if first else sep + piece
+        first = False
@@ -0,0 +1,75 @@
+"""
+ROT系・Caesar暗号で共有する置換エンジン
+アルファベットとシフト量ごとに変換テーブルを一度だけ作ってキャッシュし、
+str.translate / bytes.translate で一括変換する
+LazyTable は他の符号化（数字・モールス信号）の変換表にも使う
+"""
+from functools import lru_cache
+
+# (先頭の文字コード, 文字数, シフト量)
+LOWER = (ord('a'), 26)
+UPPER = (ord('A'), 26)
+DIGIT = (ord('0'), 10)
+PRINTABLE = (33, 94)  # ASCII 33-126
+
+
+class LazyTable(dict):
+    """初めて引かれたキー（ASCII外の文字など）の変換先を rule(キー) で計算して覚えるテーブル"""
+
+    def __init__(self, rule):
+        super().__init__()
+        self.rule = rule
+
+    def __missing__(self, code):
+        mapped = self.rule(code)
+        self[code] = mapped
+        return mapped
+
+
+class Translator:
+    """1つのアルファベット・シフトの組み合わせに対する変換器"""
+
+    def __init__(self, rotations, fold_alpha=False):
+        self.rotations = rotations
+        self.fold_alpha = fold_alpha
+        # ASCII入力用のバイト変換テーブル
+        self.bytes_table = bytes(self.map_code(i) for i in range(128)) + bytes(range(128, 256))
+        # 非ASCII入力用の文字変換テーブル（ASCII部分は先に埋めておく）
+        self.str_table = LazyTable(self.map_code)
+        self.str_table.update(str.maketrans(
+            ''.join(map(chr, range(128))), self.bytes_table[:128].decode('ascii')
+        ))
+
+    def map_code(self, code):
+        """文字コード1つ分の変換先"""
+        for start, size, shift in self.rotations:
+            if start <= code < start + size:
+                return start + (code - start + shift) % size
+        if self.fold_alpha:
+            # Caesar暗号は str.isalpha() の文字すべてを A-Z / a-z に寄せて回す
+            c = chr(code)
+            if c.isalpha():
+                base = ord('A') if c.isupper() else ord('a')
+                return (code - base + self.rotations[0][2]) % 26 + base
+        return code
+
+    def __call__(self, text: str) -> str:
+        if text.isascii():
+            return text.encode('ascii').translate(self.bytes_table).decode('ascii')
+        return text.translate(self.str_table)
+
+
+@lru_cache(maxsize=128)
+def get_translator(rotations, fold_alpha=False):
+    """rotations: ((先頭コード, 文字数, シフト), ...) のタプル"""
+    return Translator(rotations, fold_alpha)
+
+
+def rotate(text: str, alphabets, shift, fold_alpha=False) -> str:
+    """alphabets の各範囲を shift だけ回転させる（shiftは範囲ごとに指定も可）"""
+    if isinstance(shift, int):
+        shift = (shift,) * len(alphabets)
+    rotations = tuple(
+        (start, size, s % size) for (start, size), s in zip(alphabets, shift)
+    )
+    return get_translator(rotations, fold_alpha)(text)
@@ -4,9 +4,13 @@
 数字はスペース区切りで与えられる
 """
 
+from windows.algorithms._codec import parse_tokens
+
 ALGO_NAME = "数字→アルファベット"
 DESCRIPTION = "数字を対応するアルファベットに変換します（スペース区切り: 1=A, 2=B,...,26=Z）"
 
+_LETTERS = {str(n): chr(ord('A') + n - 1) for n in range(1, 27)}
+
 def run(text: str) -> str:
     """
     数字をアルファベットに変換
@@ -16,13 +20,22 @@ def run(text: str) -> str:
     無効な数字（0, 27以上）は無視
     """
     try:
+        # 数字と空白だけの長い入力はまとめて変換する
+        values = parse_tokens(text, 10)
+        if values is not None:
+            return _letters(values)
+
         result = []
         # スペースで分割
         tokens = text.split()
         
         for token in tokens:
+            # よく出る "1"～"26" は表から引く
+            letter = _LETTERS.get(token)
+            if letter is not None:
+                result.append(letter)
             # 数字かどうかを確認
-            if token.isdigit():
+            elif token.isdigit():
                 num = int(token)
                 # 1～26の範囲内なら変換
                 if 1 <= num <= 26:
@@ -35,3 +48,10 @@ def run(text: str) -> str:
         return ''.join(result)
     except Exception:
         return ""
+
+
+def _letters(values):
+    """数字の配列のうち 1～26 だけを A～Z にして連結する"""
+    import numpy as np
+    kept = values[(values >= 1) & (values <= 26)]
+    return (kept + (ord('A') - 1)).astype(np.uint8).tobytes().decode('ascii')
@@ -4,9 +4,27 @@ A=1, B=2, ..., Z=26（大文字小文字両対応）
 記号や数字はそのまま保持
 """
 
+from windows.algorithms._codec import NUMPY_MIN_CHARS, map_codes
+from windows.algorithms._substitution import LazyTable
+
 ALGO_NAME = "アルファベット→数字"
 DESCRIPTION = "アルファベットを対応する数字に変換します（A=1, B=2,...,Z=26）"
 
+
+def _number(code):
+    """文字コード1つ分の変換先（アルファベット以外はそのまま）"""
+    char = chr(code)
+    if char.isalpha():
+        # 大文字小文字を区別せずに変換
+        return str(ord(char.upper()) - ord('A') + 1)
+    return char
+
+
+# ASCII は先に埋めておき、それ以外の文字は初めて出てきた時に変換先を計算して覚える
+_TABLE = LazyTable(_number)
+_TABLE.update({code: _number(code) for code in range(128)})
+
+
 def run(text: str) -> str:
     """
     アルファベットを数字に変換
@@ -14,15 +32,9 @@ def run(text: str) -> str:
     例: ABC → 123, abc → 123
     """
     try:
-        result = []
-        for char in text:
-            if char.isalpha():
-                # 大文字小文字を区別せずに変換
-                pos = ord(char.upper()) - ord('A') + 1
-                result.append(str(pos))
-            else:
-                # アルファベット以外はそのまま保持
-                result.append(char)
-        return ''.join(result)
+        # 1文字ずつ連結せず、変換表でまとめて置き換える
+        if len(text) >= NUMPY_MIN_CHARS:
+            return map_codes(text, _TABLE.__getitem__)
+        return text.translate(_TABLE)
     except Exception:
         return ""
@@ -1,4 +1,10 @@
 import base64
+from windows.algorithms._stream import fixed_blocks
+
+# Base64の文字以外（改行など）はストリームでは読み飛ばす
+_NON_BASE64 = bytes(sorted(set(range(256)) - set(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
+)))
 
 ALGO_NAME = "Base64 デコード"
 DESCRIPTION = "Base64 デコードを行います"
@@ -8,3 +14,9 @@ def run(text: str) -> str:
         return base64.b64decode(text.encode()).decode()
     except Exception:
         return ""
+
+def decode_stream(chunks):
+    """bytesのイテレータをBase64デコード（4文字単位で繰り越し）。結果は生のバイト列"""
+    cleaned = (chunk.translate(None, _NON_BASE64) for chunk in chunks)
+    for block in fixed_blocks(cleaned, 4):
+        yield base64.b64decode(block)
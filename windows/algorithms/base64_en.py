@@ -1,4 +1,5 @@
 import base64
+from windows.algorithms._stream import fixed_blocks
 
 ALGO_NAME = "Base64 エンコード"
 DESCRIPTION = "Base64 エンコードを行います"
@@ -8,3 +9,8 @@ def run(text: str) -> str:
         return base64.b64encode(text.encode()).decode()
     except Exception:
         return ""
+
+def encode_stream(chunks):
+    """bytesのイテレータをBase64エンコード（3バイト単位で繰り越し）"""
+    for block in fixed_blocks(chunks, 3):
+        yield base64.b64encode(block)
@@ -1,9 +1,27 @@
+from windows.algorithms._codec import codes_to_text, parse_tokens
+from windows.algorithms._stream import tokens
+
 ALGO_NAME = "2進数デコード"
-DESCRIPTION = "入力された2進数文字列をデコードして文字列に変換します。スペースで区切られた2進数を想定。"
+DESCRIPTION = "入力された2進数文字列をデコードして文字列に変換します。スペースで区切られた2進数を想定。mode: char=文字コード / utf8=UTF-8のバイト"
+VARIABLES = {"mode": "char"}
 
 def run(text):
+    mode = VARIABLES.get("mode", "char")
     try:
+        # 0と1と空白だけの長い入力はまとめて変換し、それ以外は1トークンずつ int() で読む
+        values = parse_tokens(text, 2)
+        if values is not None:
+            return codes_to_text(values, mode)
         chars = text.strip().split()
+        if mode == "utf8":
+            return bytes([int(c, 2) for c in chars]).decode('utf-8')
         return ''.join([chr(int(c, 2)) for c in chars])
+    except UnicodeDecodeError:
+        return "無効な2進数（UTF-8 として読めません）"
     except:
         return "無効な2進数"
+
+def decode_stream(chunks):
+    """空白区切りの2進数をバイト列にデコード（トークンがチャンク境界をまたいでもよい）"""
+    for toks in tokens(chunks):
+        yield bytes(int(t, 2) for t in toks)
@@ -1,5 +1,16 @@
+from windows.algorithms._codec import binary_bytes, format_codes
+from windows.algorithms._stream import join_stream
+
 ALGO_NAME = "2進数エンコード"
-DESCRIPTION = "入力された文字列を2進数文字列に変換します。スペース区切り。"
+DESCRIPTION = "入力された文字列を2進数文字列に変換します。スペース区切り。mode: char=文字コード / utf8=UTF-8のバイト"
+VARIABLES = {"mode": "char"}
 
 def run(text):
-    return ' '.join([format(ord(c), '08b') for c in text])
+    try:
+        return format_codes(text, 2, VARIABLES.get("mode", "char"))
+    except UnicodeEncodeError:
+        return "UTF-8 に変換できない文字が含まれています"
+
+def encode_stream(chunks):
+    """bytesのイテレータを1バイトずつ2進数に変換（スペース区切り）"""
+    return join_stream((binary_bytes(chunk) for chunk in chunks), b' ')
@@ -1,3 +1,5 @@
+from windows.algorithms._stream import fixed_blocks
+
 ALGO_NAME = "16進数デコード"
 DESCRIPTION = "16進数文字列をデコードして文字列に変換します。スペース区切りまたは連続16進数も対応。"
 
@@ -7,3 +9,9 @@ def run(text):
         return bytes.fromhex(text).decode('utf-8', errors='replace')
     except:
         return "無効な16進数"
+
+def decode_stream(chunks):
+    """16進数のバイト列をデコード（空白を除いて2文字単位で繰り越し）。結果は生のバイト列"""
+    cleaned = (chunk.translate(None, b' \t\r\n\v\f') for chunk in chunks)
+    for block in fixed_blocks(cleaned, 2):
+        yield bytes.fromhex(block.decode('ascii'))
@@ -1,5 +1,16 @@
+from windows.algorithms._codec import format_codes
+from windows.algorithms._stream import join_stream
+
 ALGO_NAME = "16進数エンコード"
-DESCRIPTION = "文字列を16進数に変換します。スペース区切り。"
+DESCRIPTION = "文字列を16進数に変換します。スペース区切り。mode: char=文字コード / utf8=UTF-8のバイト"
+VARIABLES = {"mode": "char"}
 
 def run(text):
-    return ' '.join([format(ord(c), '02x') for c in text])
+    try:
+        return format_codes(text, 16, VARIABLES.get("mode", "char"))
+    except UnicodeEncodeError:
+        return "UTF-8 に変換できない文字が含まれています"
+
+def encode_stream(chunks):
+    """bytesのイテレータを1バイトずつ16進数に変換（スペース区切り）"""
+    return join_stream((chunk.hex(' ').encode() for chunk in chunks), b' ')
@@ -1,17 +1,21 @@
-ALGO_NAME = "モールス信号デコード"
-DESCRIPTION = "モールス信号をデコードします。スペース区切り。"
+import codecs
+from windows.algorithms import _morse
 
-MORSE_DICT = {
-    '.-':'A','-...':'B','-.-.':'C','-..':'D','.':'E','..-.':'F',
-    '--.':'G','....':'H','..':'I','.---':'J','-.-':'K','.-..':'L',
-    '--':'M','-.':'N','---':'O','.--.':'P','--.-':'Q','.-.':'R',
-    '...':'S','-':'T','..-':'U','...-':'V','.--':'W','-..-':'X',
-    '-.--':'Y','--..':'Z','-----':'0','.----':'1','..---':'2','...--':'3',
-    '....-':'4','.....':'5','-....':'6','--...':'7','---..':'8','----.':'9'
-}
+ALGO_NAME = "モールス信号デコード"
+DESCRIPTION = "モールス信号をデコードします。文字はスペース、単語は / か3つ以上のスペースで区切り。符号に無いものは ?（segment=auto で区切りのない並びを推測して [ ] で囲みます）。"
+VARIABLES = {"segment": "off", "word_sep": "/|", "letter_sep": "", "word_gap": 3}
 
 def run(text):
+    decoder = _morse.Decoder(**VARIABLES)
     try:
-        return ''.join(MORSE_DICT.get(c,'?') for c in text.strip().split())
-    except:
+        return decoder.feed(text) + decoder.finish()
+    except Exception:
         return "無効なモールス信号"
+
+def decode_stream(chunks):
+    """モールス信号をデコード（トークンや記号の UTF-8 がチャンク境界をまたいでもよい）"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    morse = _morse.Decoder(**VARIABLES)
+    for chunk in chunks:
+        yield morse.feed(decoder.decode(chunk)).encode()
+    yield (morse.feed(decoder.decode(b'', final=True)) + morse.finish()).encode()
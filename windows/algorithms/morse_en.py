@@ -1,14 +1,20 @@
-ALGO_NAME = "モールス信号エンコード"
-DESCRIPTION = "文字列をモールス信号に変換します。スペース区切り。"
+import codecs
+from windows.algorithms import _morse
+from windows.algorithms._stream import join_stream
 
-MORSE_DICT = {v:k for k,v in {
-    '.-':'A','-...':'B','-.-.':'C','-..':'D','.':'E','..-.':'F',
-    '--.':'G','....':'H','..':'I','.---':'J','-.-':'K','.-..':'L',
-    '--':'M','-.':'N','---':'O','.--.':'P','--.-':'Q','.-.':'R',
-    '...':'S','-':'T','..-':'U','...-':'V','.--':'W','-..-':'X',
-    '-.--':'Y','--..':'Z','-----':'0','.----':'1','..---':'2','...--':'3',
-    '....-':'4','.....':'5','-....':'6','--...':'7','---..':'8','----.':'9'
-}.items()}
+ALGO_NAME = "モールス信号エンコード"
+DESCRIPTION = "文字列をモールス信号に変換します。文字はスペース、単語は / で区切り。"
 
 def run(text):
-    return ' '.join(MORSE_DICT.get(c.upper(), '?') for c in text)
+    return _morse.encode(text)
+
+def encode_stream(chunks):
+    """UTF-8のバイト列をモールス信号に変換（マルチバイト文字がチャンク境界をまたいでもよい）"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def pieces():
+        for chunk in chunks:
+            yield run(decoder.decode(chunk)).encode()
+        yield run(decoder.decode(b'', final=True)).encode()
+
+    return join_stream(pieces(), b' ')
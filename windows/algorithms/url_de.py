@@ -8,3 +8,18 @@ def run(text):
         return urllib.parse.unquote(text)
     except:
         return "無効なURL文字列"
+
+def decode_stream(chunks):
+    """URLエンコードされたバイト列をデコード。結果は生のバイト列"""
+    carry = b""
+    for chunk in chunks:
+        data = carry + chunk
+        # 末尾の "%" や "%X" は次のチャンクと合わせて解釈する
+        cut = data.rfind(b"%", max(len(data) - 2, 0))
+        if cut == -1:
+            carry = b""
+        else:
+            data, carry = data[:cut], data[cut:]
+        yield urllib.parse.unquote_to_bytes(data)
+    if carry:
+        yield urllib.parse.unquote_to_bytes(carry)
@@ -5,3 +5,8 @@ DESCRIPTION = "文字列をURLエンコードします。"
 
 def run(text):
     return urllib.parse.quote(text)
+
+def encode_stream(chunks):
+    """bytesのイテレータをURLエンコード（1バイト単位なので繰り越し不要）"""
+    for chunk in chunks:
+        yield urllib.parse.quote_from_bytes(chunk).encode('ascii')
@@ -0,0 +1,105 @@
+"""
+Caesar / ROT系の総当たり
+入力を uint8 として1回だけ走査して文字ヒストグラムを作り、
+全シフトの文字分布をヒストグラムの並べ替えで求めて英語の文字頻度とのカイ二乗距離で順位付けする。
+NumPy は総当たりを初めて実行した時に読み込む（デコード画面の起動を遅くしないため）。
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+from windows.algorithms._substitution import rotate, LOWER, UPPER, DIGIT, PRINTABLE
+from windows.algorithms._lang import ENGLISH_FREQ
+
+PREVIEW_CHARS = 200
+
+# 系統名 -> (回転する範囲, シフト候補の数)
+# rot18 は英字を総当たりし、数字は ROT5 のまま固定
+FAMILIES = {
+    "caesar": ((LOWER, UPPER), 26),
+    "rot18": ((LOWER, UPPER, DIGIT), 26),
+    "rot47": ((PRINTABLE,), 94),
+}
+
+# どのアルゴリズムのカードに総当たりを出すか
+FAMILY_BY_MODULE = {
+    "windows.algorithms.Z1_ROT13": "caesar",
+    "windows.algorithms.Z2_caesar_en": "caesar",
+    "windows.algorithms.Z1_ROT18": "rot18",
+    "windows.algorithms.Z1_ROT47": "rot47",
+}
+
+Candidate = namedtuple("Candidate", ["shift", "chi2", "preview"])
+
+
+def _shifts_for(family, shift):
+    """回転範囲ごとのシフト量"""
+    if family == "rot18":
+        return (shift, shift, 5)
+    return shift
+
+
+@lru_cache(maxsize=1)
+def _expected_freq():
+    import numpy as np
+    return np.array(ENGLISH_FREQ) / sum(ENGLISH_FREQ)
+
+
+def histogram(text):
+    """UTF-8バイトのヒストグラム（入力を1回だけ走査）"""
+    import numpy as np
+    data = np.frombuffer(text.encode("utf-8", "surrogatepass"), dtype=np.uint8)
+    return np.bincount(data, minlength=256)
+
+
+def chi_squared(counts, family="caesar"):
+    """全シフトのカイ二乗距離（英字1文字あたり）を配列で返す。counts は histogram() の結果"""
+    import numpy as np
+    expected = _expected_freq()
+    alphabets, size = FAMILIES[family]
+    shifts = np.arange(size)[:, None]
+    letters = np.arange(26)[None, :]
+
+    if family == "rot47":
+        # 94文字の範囲を回したあとに a-z / A-Z に来る元の文字を数える
+        start = PRINTABLE[0]
+        printable = counts[start:start + PRINTABLE[1]]
+        lower = printable[(ord("a") - start + letters - shifts) % size]
+        upper = printable[(ord("A") - start + letters - shifts) % size]
+        observed = lower + upper
+        total = printable.sum()
+        # 大文字小文字が入れ替わっただけのシフトと区別するため、英文らしく小文字が多い方を優先
+        case_penalty = 0.5 * upper.sum(axis=1) / np.maximum(observed.sum(axis=1), 1)
+    else:
+        folded = counts[ord("a"):ord("z") + 1] + counts[ord("A"):ord("Z") + 1]
+        observed = folded[(letters - shifts) % 26]
+        total = folded.sum()
+        case_penalty = 0.0
+
+    if total == 0:
+        return np.zeros(size)
+    # 英字1文字あたりのカイ二乗距離。英字が見つからないシフトは最下位にする
+    found = observed.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = observed / found[:, None]
+        distance = ((ratio - expected) ** 2 / expected).sum(axis=1)
+    distance[found == 0] = np.inf
+    # rot47 では範囲内の文字のうち英字にならなかった割合を足す（記号だらけのシフトほど不利）
+    return distance + (1 - found / total) + case_penalty
+
+
+def brute_force(text, family="caesar", preview_chars=PREVIEW_CHARS):
+    """全シフトをカイ二乗距離の小さい順に並べて返す"""
+    import numpy as np
+    alphabets, size = FAMILIES[family]
+    scores = chi_squared(histogram(text), family)
+    head = text[:preview_chars]
+    return [
+        Candidate(int(shift), float(scores[shift]), rotate(head, alphabets, _shifts_for(family, int(shift))))
+        for shift in np.argsort(scores, kind="stable")
+    ]
+
+
+def apply_shift(text, family, shift):
+    """選んだシフトで全文を変換"""
+    alphabets, _ = FAMILIES[family]
+    return rotate(text, alphabets, _shifts_for(family, shift))
@@ -0,0 +1,418 @@
+"""
+ヘッドレスCLI（gooddoctor コマンド）
+アルゴリズム・自動解析・OCR・画像解析をファイル／ディレクトリ／標準入力に対して一括実行し、
+結果を1行1レコードのJSONLで出力する。Qt は読み込まない（ディスプレイ無しで動く）。
+
+例:
+    gooddoctor list
+    gooddoctor run base64_de captures/ -j 4 -o out.jsonl
+    gooddoctor run "Caesar 暗号" --set shift=3 < input.txt
+    gooddoctor magic payload.txt --depth 4
+    gooddoctor ocr "shots/**/*.png" --region 0,0,400,200
+    gooddoctor ocr-batch scans/ -o results.csv -j 4 --timeout 120 --resume
+    gooddoctor image "dump/**/*.jpg" -j 8
+    gooddoctor image-batch dump/ -o dump.sqlite3 --resume
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from windows.algorithms import load_algorithms, get_algorithm
+from windows.paths import iter_image_inputs
+
+
+# --- 入力の列挙 ---
+def iter_text_inputs(paths):
+    """ファイルはそのまま、ディレクトリは再帰的に列挙。空または "-" は標準入力"""
+    if not paths:
+        paths = ["-"]
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def read_text(path):
+    if path == "-":
+        return sys.stdin.read()
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+# --- ワーカーで実行するタスク（プロセス間で渡せるようトップレベルに置く） ---
+def _run_task(job):
+    path, name, variables, text = job
+    algorithm = get_algorithm(name)
+    if variables:
+        algorithm.variables.update(variables)
+    if text is None:
+        text = read_text(path)
+    return {"input": path, "algorithm": algorithm.name, "output": algorithm.run(text)}
+
+
+def _magic_task(job):
+    from windows import magic
+    path, text, depth, top, budget = job
+    if text is None:
+        text = read_text(path)
+    chains = magic.solve(text, depth=depth, top=top, time_budget=budget)
+    return {
+        "input": path,
+        "chains": [
+            {"score": round(c.score, 4), "steps": list(c.steps), "output": c.text} for c in chains
+        ],
+    }
+
+
+def _ocr_task(job):
+    from windows.ocr import recognize
+    from windows.ocr_cache import get_cache, make_key
+    path, region, use_cache = job
+    if not use_cache:
+        return {"input": path, "region": region, "lines": recognize(path, region)}
+    cache = get_cache()
+    key = make_key(path, region)
+    lines = cache.get(key)
+    if lines is None:
+        lines = recognize(path, region)
+        cache.put(key, lines)
+    return {"input": path, "region": region, "lines": lines}
+
+
+def _ocr_tiled_task(job):
+    # 並列化はタイル単位（ocr_tiles のワーカープール）で行うので、画像は親プロセスで1枚ずつ処理する
+    from windows.ocr_tiles import recognize_page
+    from windows.ocr_cache import get_cache, make_key
+    path, region, use_cache, workers = job
+    if not use_cache:
+        return {"input": path, "region": region, "lines": recognize_page(path, region, workers)}
+    cache = get_cache()
+    key = make_key(path, region, mode="tiled")
+    lines = cache.get(key)
+    if lines is None:
+        lines = recognize_page(path, region, workers)
+        cache.put(key, lines)
+    return {"input": path, "region": region, "lines": lines}
+
+
+def _image_task(job):
+    from windows.image_analysis import analyze_file
+    path, fast, stats = job
+    info = analyze_file(path, fast=fast)
+    info["input"] = info.pop("path")
+    if stats:
+        # 縮小デコードした画素ではLSBの解析ができないので、統計は元の大きさで求める
+        from windows.image_stats import compute_file
+        info["stats"] = compute_file(path)
+    return info
+
+
+class _SafeTask:
+    """1件の失敗でバッチ全体が止まらないよう、例外をレコードに変換する（pickle できるようクラスにする）"""
+
+    def __init__(self, task):
+        self.task = task
+
+    def __call__(self, job):
+        try:
+            return self.task(job)
+        except Exception as e:
+            path = job if isinstance(job, str) else job[0]
+            return {"input": path, "error": f"{type(e).__name__}: {e}"}
+
+
+# --- 実行と出力 ---
+def execute(task, jobs, workers, out):
+    """jobs をワーカーで実行し、入力順にJSONLで書き出す。エラー件数を返す"""
+    safe_task = _SafeTask(task)
+    errors = 0
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(safe_task, jobs, chunksize=4)
+    else:
+        executor = None
+        results = map(safe_task, jobs)
+    try:
+        for record in results:
+            if "error" in record:
+                errors += 1
+            out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+    finally:
+        if executor:
+            executor.shutdown()
+    return errors
+
+
+def execute_ocr_server(jobs, out, max_in_flight=32):
+    """常駐OCRサーバーにジョブを続けて投げ、入力順にJSONLで書き出す。エラー件数を返す"""
+    from collections import deque
+    from concurrent.futures import Future
+    from windows.ocr_server import get_client
+    from windows.ocr_cache import get_cache, make_key
+
+    client = get_client()
+    cache = get_cache()
+    in_flight = deque()
+    errors = 0
+
+    def flush_one():
+        nonlocal errors
+        path, region, key, future = in_flight.popleft()
+        try:
+            lines = future.result()
+            record = {"input": path, "region": region, "lines": lines}
+            if key is not None:
+                cache.put(key, lines)
+        except Exception as e:
+            record = {"input": path, "error": str(e)}
+            errors += 1
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    for path, region, use_cache in jobs:
+        key = lines = None
+        if use_cache:
+            try:
+                key = make_key(path, region)
+                lines = cache.get(key)
+            except OSError:
+                key = None  # 読めないファイルはサーバー側でエラーにする
+        if lines is not None:
+            future = Future()
+            future.set_result(lines)
+            key = None  # 保存し直さない
+        else:
+            future = client.ocr(path, region)
+        in_flight.append((path, region, key, future))
+        if len(in_flight) >= max_in_flight:
+            flush_one()
+    while in_flight:
+        flush_one()
+    return errors
+
+
+def run_ocr_batch(args):
+    """一括OCR。進捗は標準エラーに出す。エラーがあれば 1 を返す"""
+    from windows import ocr_batch
+    from windows.ocr_cache import get_cache
+
+    def progress(done, errors, path):
+        print(f"\r{done}件完了（エラー {errors}件） {os.path.basename(path)[:40]:<40}",
+              end="", file=sys.stderr, flush=True)
+
+    done, errors = ocr_batch.run_to_file(
+        iter_image_inputs(args.patterns),
+        args.output,
+        region=args.region,
+        fmt=args.format,
+        resume=args.resume,
+        workers=args.workers,
+        timeout=args.timeout or ocr_batch.DEFAULT_TIMEOUT,
+        cache=None if args.no_cache else get_cache(),
+        progress=progress,
+    )
+    print(file=sys.stderr)
+    return 1 if errors else 0
+
+
+def _progress_bar(done, total, errors, rate, width=30):
+    filled = width * done // total if total else width
+    return (f"\r[{'#' * filled}{'.' * (width - filled)}] {done}/{total} "
+            f"（エラー {errors}件） {rate:.0f}枚/秒")
+
+
+def run_image_batch(args):
+    """画像を一括解析して SQLite に書き出す。進捗は標準エラーに出す。エラーがあれば 1 を返す"""
+    import time
+    from windows import image_batch
+
+    paths = list(iter_image_inputs(args.patterns))
+    start = time.perf_counter()
+    shown = [0.0]
+
+    def show(done, errors, skipped, end=""):
+        # 再開時に飛ばした画像も済みとして数える（速度は実際に解析した分だけ）
+        rate = done / max(time.perf_counter() - start, 1e-9)
+        print(_progress_bar(done + skipped, len(paths), errors, rate),
+              end=end, file=sys.stderr, flush=True)
+
+    def progress(done, errors, skipped, path):
+        now = time.perf_counter()
+        if now - shown[0] >= 0.1:  # 端末への出力で遅くならないよう間引く
+            shown[0] = now
+            show(done, errors, skipped)
+
+    done, errors, skipped = image_batch.run_to_db(
+        paths, args.output, fast=not args.exact, resume=args.resume,
+        workers=args.workers, progress=progress,
+    )
+    show(done, errors, skipped, end="\n")
+    if skipped:
+        print(f"変更の無い {skipped}件は飛ばしました", file=sys.stderr)
+    print(f"{done}件を解析しました（エラー {errors}件）: {args.output}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def _text_jobs(paths):
+    # 標準入力はワーカーから読めないので親プロセスで読んでおく
+    for path in iter_text_inputs(paths):
+        yield path, (read_text(path) if path == "-" else None)
+
+
+def _parse_set(values):
+    variables = {}
+    for item in values or []:
+        key, _, value = item.partition("=")
+        try:
+            variables[key] = int(value)
+        except ValueError:
+            variables[key] = value
+    return variables
+
+
+def _parse_region(value):
+    if not value:
+        return None
+    parts = [int(v) for v in value.split(",")]
+    if len(parts) != 4:
+        raise argparse.ArgumentTypeError("--region は x1,y1,x2,y2 で指定してください")
+    return tuple(parts)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="gooddoctor", description="GoodDoctorHackingService のヘッドレス版"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("-j", "--workers", type=int, default=1, help="並列ワーカー数")
+        p.add_argument("-o", "--output", help="出力先（JSONL）。省略時は標準出力")
+
+    sub.add_parser("list", help="アルゴリズム一覧を表示")
+
+    p = sub.add_parser("run", help="アルゴリズムを実行")
+    p.add_argument("algorithm", help="ALGO_NAME またはファイル名（例: base64_de）")
+    p.add_argument("paths", nargs="*", help="ファイル／ディレクトリ（省略時は標準入力）")
+    p.add_argument("--set", action="append", metavar="KEY=VALUE", help="VARIABLES を変更")
+    common(p)
+
+    p = sub.add_parser("magic", help="多段デコードを自動探索")
+    p.add_argument("paths", nargs="*", help="ファイル／ディレクトリ（省略時は標準入力）")
+    p.add_argument("--depth", type=int, default=4)
+    p.add_argument("--top", type=int, default=5)
+    p.add_argument("--budget", type=float, default=1.0, help="1入力あたりの探索時間（秒）")
+    common(p)
+
+    p = sub.add_parser("ocr", help="画像の文字認識")
+    p.add_argument("patterns", nargs="+", help="画像のglobパターンまたはディレクトリ")
+    p.add_argument("--region", type=_parse_region, help="x1,y1,x2,y2（省略時は画像全体）")
+    p.add_argument("--no-server", action="store_true",
+                   help="常駐OCRサーバーを使わず、各ワーカーでモデルを読み込む")
+    p.add_argument("--no-cache", action="store_true", help="OCR結果のキャッシュを使わない")
+    p.add_argument("--tiled", action="store_true",
+                   help="大きな画像をタイルに分けて並列に認識する（-j はタイルを処理するワーカー数）")
+    common(p)
+
+    p = sub.add_parser("ocr-batch", help="フォルダの画像を一括OCR（タイムアウト・再開に対応）")
+    p.add_argument("patterns", nargs="+", help="画像のglobパターンまたはディレクトリ")
+    p.add_argument("-o", "--output", required=True, help="出力先（.jsonl または .csv）")
+    p.add_argument("-j", "--workers", type=int, help="ワーカー数（省略時はCPU数と空きメモリから決める）")
+    p.add_argument("--format", choices=["jsonl", "csv"], help="出力形式（省略時は拡張子から判断）")
+    p.add_argument("--region", type=_parse_region, help="x1,y1,x2,y2（省略時は画像全体）")
+    p.add_argument("--timeout", type=float, default=None, help="1件あたりの上限（秒）")
+    p.add_argument("--resume", action="store_true", help="チェックポイントから再開（出力に追記）")
+    p.add_argument("--no-cache", action="store_true", help="OCR結果のキャッシュを使わない")
+
+    p = sub.add_parser("image", help="画像解析（形式・EXIF・GPS・平均RGB）")
+    p.add_argument("patterns", nargs="+", help="画像のglobパターンまたはディレクトリ")
+    p.add_argument("--fast", action="store_true",
+                   help="JPEGを縮小デコードして平均RGBを求める（差は 0.1 程度）")
+    p.add_argument("--stats", action="store_true",
+                   help="ヒストグラム・エントロピー・LSB解析・末尾の付け足しデータも出力する")
+    common(p)
+
+    p = sub.add_parser("image-batch", help="フォルダの画像を一括解析して SQLite に書き出す（再開に対応）")
+    p.add_argument("patterns", nargs="+", help="画像のglobパターンまたはディレクトリ")
+    p.add_argument("-o", "--output", required=True, help="出力先の SQLite ファイル（images 表）")
+    p.add_argument("-j", "--workers", type=int, help="ワーカー数（省略時はCPU数）")
+    p.add_argument("--exact", action="store_true",
+                   help="JPEGも元の大きさでデコードして平均RGBを求める（既定は縮小デコード）")
+    p.add_argument("--resume", action="store_true",
+                   help="表にある画像のうち変更の無いものを飛ばす（省略時は表を作り直す）")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == "list":
+        for entry in load_algorithms():
+            stem = entry.module_name.rsplit(".", 1)[-1]
+            print(f"{stem}\t{entry.name}\t{entry.description}")
+        return 0
+
+    if args.command == "ocr-batch":
+        return run_ocr_batch(args)
+
+    if args.command == "image-batch":
+        return run_image_batch(args)
+
+    if args.command == "run":
+        algorithm = get_algorithm(args.algorithm)
+        if algorithm is None:
+            print(f"アルゴリズムが見つかりません: {args.algorithm}", file=sys.stderr)
+            return 2
+        variables = _parse_set(args.set)
+        unknown = sorted(set(variables) - set(algorithm.variables or ()))
+        if unknown:
+            names = ", ".join(sorted(algorithm.variables)) if algorithm.variables else "なし"
+            print(f"{algorithm.name} に無い変数です: {', '.join(unknown)}（変更できる変数: {names}）",
+                  file=sys.stderr)
+            return 2
+        jobs = ((path, args.algorithm, variables, text) for path, text in _text_jobs(args.paths))
+        task = _run_task
+    elif args.command == "magic":
+        jobs = (
+            (path, text, args.depth, args.top, args.budget)
+            for path, text in _text_jobs(args.paths)
+        )
+        task = _magic_task
+    elif args.command == "ocr" and args.tiled:
+        workers = args.workers if args.workers > 1 else None
+        jobs = (
+            (path, args.region, not args.no_cache, workers)
+            for path in iter_image_inputs(args.patterns)
+        )
+        task = _ocr_tiled_task
+        args.workers = 1  # 画像単位では並列にしない
+    elif args.command == "ocr":
+        jobs = (
+            (path, args.region, not args.no_cache) for path in iter_image_inputs(args.patterns)
+        )
+        task = _ocr_task
+    else:
+        jobs = ((path, args.fast, args.stats) for path in iter_image_inputs(args.patterns))
+        task = _image_task
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.command == "ocr" and not (args.no_server or args.tiled):
+            errors = execute_ocr_server(jobs, out)
+        else:
+            errors = execute(task, jobs, args.workers, out)
+    finally:
+        if args.output:
+            out.close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
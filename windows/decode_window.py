@@ -1,14 +1,293 @@
 import os
-import importlib
+import sys
+import hashlib
+from collections import OrderedDict
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTextEdit,
-    QPushButton, QScrollArea, QFrame, QApplication, QGridLayout, QComboBox
+    QPushButton, QScrollArea, QFrame, QApplication, QGridLayout, QComboBox, QFileDialog,
+    QDialog, QTextBrowser, QTableWidget, QTableWidgetItem, QHeaderView
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
-import sys
+from windows.algorithms import load_algorithms
+from windows import magic, bruteforce, perf
+
+DEBOUNCE_MS = 150       # 入力が止まってから計算を始めるまでの待ち時間
+PREVIEW_LIMIT = 10000   # カードに表示する最大文字数（コピーは全文）
+RESULT_CACHE_BYTES = 64 * 1024 * 1024  # 結果キャッシュの上限
+STATUS_HINT = "アルゴリズムにカーソルを合わせると説明が表示されます。"
+# 選択肢から選ぶ VARIABLES（変数名 -> {値: 表示名}）
+CHOICE_LABELS = {
+    "mode": {"char": "文字コード", "utf8": "UTF-8 バイト"},
+    "segment": {"off": "符号に無いものは ?", "auto": "区切りなしは推測 [ ]"},
+}
+
+# カードのスタイルはコンテナに1回だけ設定する
+CARD_STYLE = """
+    QFrame#resultCard, QFrame#resultCard QLabel {
+        background-color: #f7f9fa;
+        border: 1px solid #d0d7de;
+        border-radius: 6px;
+        padding: 4px;  /* 縦幅縮小 */
+    }
+    QFrame#resultCard:hover, QFrame#resultCard QLabel:hover {
+        background-color: #eef2f3;
+    }
+    QPushButton#copyButton {
+        background-color: #1d9bf0;
+        color: white;
+        border: none;
+        border-radius: 6px;
+        font-size: 14px;
+    }
+    QPushButton#copyButton:hover {
+        background-color: #0d8ae5;
+    }
+    QTextEdit#resultBox {
+        background: #f7f9fa;
+        color: #1d9bf0;
+        border: none;
+        font-family: Meiryo;
+        font-size: 10pt;
+    }
+"""
+
+
+class ResultCache:
+    """(モジュール, 入力ハッシュ, VARIABLES) -> 結果 のLRUキャッシュ。合計バイト数で上限を決める"""
+
+    def __init__(self, max_bytes=RESULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(algorithm, text_hash):
+        variables = algorithm.variables
+        snapshot = tuple(sorted(variables.items())) if variables else ()
+        return (algorithm.module_name, text_hash, snapshot)
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        size = sys.getsizeof(result)
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self.total_bytes -= sys.getsizeof(self.entries.pop(key))
+        self.entries[key] = result
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, old = self.entries.popitem(last=False)
+            self.total_bytes -= sys.getsizeof(old)
+
+    def stats_text(self):
+        return (f"キャッシュ: ヒット {self.hits} / ミス {self.misses} "
+                f"({len(self.entries)}件, {self.total_bytes / 1024 / 1024:.1f} MB)")
+
+
+class AlgorithmSignals(QObject):
+    """ワーカーからGUIスレッドへ結果を返すためのシグナル"""
+    finished = pyqtSignal(int, int, str)  # (世代, アルゴリズム番号, 結果)
+    file_done = pyqtSignal(str)           # ファイル変換の結果メッセージ
+    magic_done = pyqtSignal(object)       # 自動解析の結果（magic.Chain のリスト）
+    bruteforce_done = pyqtSignal(object)  # (カード, 系統名, 入力, bruteforce.Candidate のリスト)
+
+
+class AlgorithmTask(QRunnable):
+    """1つのアルゴリズムをワーカースレッドで実行"""
+
+    def __init__(self, window, generation, index, algorithm, text):
+        super().__init__()
+        self.window = window
+        self.generation = generation
+        self.index = index
+        self.algorithm = algorithm
+        self.text = text
+
+    def run(self):
+        # 待っている間に入力が変わっていたら計算しない
+        if self.generation != self.window.generation:
+            return
+        try:
+            with perf.span("run." + self.algorithm.module_name.rpartition(".")[2]):
+                result = self.algorithm.run(self.text)
+        except Exception as e:
+            result = f"エラー: {e}"
+        self.window.signals.finished.emit(self.generation, self.index, result)
+
+
+class FileTransformTask(QRunnable):
+    """ファイル→ファイルのストリーム変換をワーカースレッドで実行"""
+
+    def __init__(self, window, algorithm, src, dst):
+        super().__init__()
+        self.window = window
+        self.algorithm = algorithm
+        self.src = src
+        self.dst = dst
+
+    def run(self):
+        try:
+            self.algorithm.transform_file(self.src, self.dst)
+            message = f"{self.algorithm.name}: {os.path.basename(self.dst)} に保存しました"
+        except Exception as e:
+            message = f"{self.algorithm.name}: ファイル変換に失敗しました ({e})"
+        self.window.signals.file_done.emit(message)
+
+
+class MagicTask(QRunnable):
+    """多段デコードの自動探索をワーカースレッドで実行"""
+
+    def __init__(self, window, text):
+        super().__init__()
+        self.window = window
+        self.text = text
 
-ALGO_PATH = os.path.join(os.path.dirname(__file__), "algorithms")
+    def run(self):
+        try:
+            chains = magic.solve(self.text)
+        except Exception:
+            chains = []
+        self.window.signals.magic_done.emit(chains)
+
+
+class BruteForceTask(QRunnable):
+    """全シフトの総当たりをワーカースレッドで実行"""
+
+    def __init__(self, window, card, family, text):
+        super().__init__()
+        self.window = window
+        self.card = card
+        self.family = family
+        self.text = text
+
+    def run(self):
+        try:
+            candidates = bruteforce.brute_force(self.text, self.family)
+        except Exception:
+            candidates = []
+        self.window.signals.bruteforce_done.emit((self.card, self.family, self.text, candidates))
+
+
+class ResultCard(QFrame):
+    """1つのアルゴリズムの結果カード。ウィンドウを開いている間は使い回す"""
+
+    def __init__(self, window, algorithm):
+        super().__init__()
+        self.algorithm = algorithm
+        self.result_text = ""
+        self._lowered = None  # 検索用の小文字化キャッシュ
+        self.setObjectName("resultCard")
+        self.setFrameShape(QFrame.StyledPanel)
+
+        layout = QVBoxLayout(self)
+        layout.setSpacing(2)  # 内部余白を詰める
+
+        # --- 名前＋コピー ---
+        top_layout = QHBoxLayout()
+        algo_label = QLabel(algorithm.name)
+        algo_label.setFont(QFont("Meiryo", 10, QFont.Bold))
+        algo_label.enterEvent = lambda e, d=algorithm.description: window.status_label.setText(d)
+        algo_label.leaveEvent = lambda e: window.status_label.setText(STATUS_HINT)
+        top_layout.addWidget(algo_label)
+
+        copy_btn = QPushButton("📋")
+        copy_btn.setObjectName("copyButton")
+        copy_btn.setFixedSize(32, 32)
+        copy_btn.clicked.connect(lambda _: QApplication.clipboard().setText(self.result_text))
+        top_layout.addWidget(copy_btn)
+
+        # --- ファイル→ファイル変換（ストリーム対応アルゴリズムのみ） ---
+        if algorithm.streamable:
+            file_btn = QPushButton("📁")
+            file_btn.setObjectName("copyButton")
+            file_btn.setFixedSize(32, 32)
+            file_btn.setToolTip("ファイルを変換して保存")
+            file_btn.clicked.connect(lambda _: window.transform_file(algorithm))
+            top_layout.addWidget(file_btn)
+        layout.addLayout(top_layout)
+
+        # --- 全シフト総当たり（Caesar / ROT系） ---
+        family = bruteforce.FAMILY_BY_MODULE.get(algorithm.module_name)
+        if family:
+            brute_btn = QPushButton("🔢")
+            brute_btn.setObjectName("copyButton")
+            brute_btn.setFixedSize(32, 32)
+            brute_btn.setToolTip("全シフトを試して英文らしい順に並べます")
+            brute_btn.clicked.connect(lambda _: window.start_bruteforce(self, family))
+            top_layout.addWidget(brute_btn)
+
+        # --- シーザー暗号パラメータ専用 ---
+        self.shift_combo = None
+        if algorithm.variables and "shift" in algorithm.variables:
+            param_layout = QHBoxLayout()
+            label = QLabel(f"shift: {algorithm.variables['shift']}")
+            param_layout.addWidget(label)
+
+            combo = QComboBox()
+            for i in range(-13, 14):  # 固定リスト
+                combo.addItem(str(i))
+            combo.setCurrentText(str(algorithm.variables["shift"]))
+            combo.currentTextChanged.connect(
+                lambda value: window.update_variable(algorithm, "shift", int(value), label)
+            )
+            param_layout.addWidget(combo)
+            layout.addLayout(param_layout)
+            self.shift_combo = combo
+
+        # --- 選択肢のあるパラメータ（2進数・16進数の単位、モールス信号の分割など） ---
+        for var_name, choices in CHOICE_LABELS.items():
+            if algorithm.variables and var_name in algorithm.variables:
+                layout.addLayout(self._choice_row(window, var_name, choices))
+
+        # --- 結果テキスト ---
+        self.result_box = QTextEdit()
+        self.result_box.setObjectName("resultBox")
+        self.result_box.setReadOnly(True)
+        self.result_box.setFixedHeight(30)  # 縦幅縮小
+        layout.addWidget(self.result_box)
+
+    def _choice_row(self, window, var_name, choices):
+        algorithm = self.algorithm
+        param_layout = QHBoxLayout()
+        label = QLabel(f"{var_name}: {algorithm.variables[var_name]}")
+        param_layout.addWidget(label)
+
+        combo = QComboBox()
+        for value, text in choices.items():
+            combo.addItem(text, value)
+        combo.setCurrentIndex(max(0, combo.findData(algorithm.variables[var_name])))
+        combo.currentIndexChanged.connect(
+            lambda i: window.update_variable(algorithm, var_name, combo.itemData(i), label)
+        )
+        param_layout.addWidget(combo)
+        return param_layout
+
+    @perf.timed("decode.set_result")
+    def set_result(self, result_text):
+        """結果テキストだけを差し替える"""
+        if result_text == self.result_text:
+            return
+        self.result_text = result_text
+        self._lowered = None
+        self.result_box.setPlainText(result_text[:PREVIEW_LIMIT])
+
+    def matches(self, query):
+        if not query:
+            return True
+        if self._lowered is None:
+            self._lowered = self.result_text.lower()
+        return query in self._lowered
 
 
 class Window(QWidget):
@@ -26,16 +305,20 @@ class Window(QWidget):
         search_label = QLabel("🔍 検索:")
         self.search_bar = QLineEdit()
         self.search_bar.setPlaceholderText("出力を検索...")
-        self.search_bar.textChanged.connect(self.update_results)
+        self.search_bar.textChanged.connect(self.apply_filter)
         search_layout.addWidget(search_label)
         search_layout.addWidget(self.search_bar)
+        self.magic_btn = QPushButton("🔮 自動解析")
+        self.magic_btn.setToolTip("デコードを何段か組み合わせて、読める文字列になる順番を探します")
+        self.magic_btn.clicked.connect(self.start_magic)
+        search_layout.addWidget(self.magic_btn)
         main_layout.addLayout(search_layout)
 
         # --- 入力欄 ---
         input_label = QLabel("入力テキスト:")
         self.input_box = QTextEdit()
         self.input_box.setFixedHeight(80)
-        self.input_box.textChanged.connect(self.update_results)
+        self.input_box.textChanged.connect(self.schedule_update)
         main_layout.addWidget(input_label)
         main_layout.addWidget(self.input_box)
 
@@ -43,138 +326,209 @@ class Window(QWidget):
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
         self.results_container = QWidget()
+        self.results_container.setStyleSheet(CARD_STYLE)
         self.results_layout = QGridLayout(self.results_container)
         self.results_layout.setSpacing(6)
         self.scroll_area.setWidget(self.results_container)
         main_layout.addWidget(self.scroll_area, stretch=1)
 
         # --- ステータス（説明表示） ---
-        self.status_label = QLabel("アルゴリズムにカーソルを合わせると説明が表示されます。")
+        self.status_label = QLabel(STATUS_HINT)
         self.status_label.setAlignment(Qt.AlignCenter)
         self.status_label.setStyleSheet("color: gray;")
         main_layout.addWidget(self.status_label)
 
+        # --- キャッシュ統計（診断用） ---
+        self.cache_label = QLabel()
+        self.cache_label.setAlignment(Qt.AlignRight)
+        self.cache_label.setStyleSheet("color: gray; font-size: 8pt;")
+        main_layout.addWidget(self.cache_label)
+
         self.setLayout(main_layout)
 
-        # アルゴリズムモジュールを自動読み込み
-        self.algorithms = self.load_algorithms()
+        # アルゴリズムは共有レジストリから取得（モジュール本体は初回実行時に読み込まれる）
+        self.algorithms = load_algorithms()
+
+        # カードはアルゴリズムごとに1回だけ作る
+        self.cards = [ResultCard(self, algorithm) for algorithm in self.algorithms]
+        self.visible_cards = None  # 現在グリッドに並んでいるカード番号
+        self.layout_cards()
+
+        # --- バックグラウンド計算 ---
+        self.thread_pool = QThreadPool()
+        self.signals = AlgorithmSignals()
+        self.signals.finished.connect(self.on_result)
+        self.signals.file_done.connect(self.status_label.setText)
+        self.signals.magic_done.connect(self.show_magic_results)
+        self.signals.bruteforce_done.connect(self.show_bruteforce_results)
+        self.generation = 0  # 入力が変わるたびに増やし、古い結果を捨てる
+        self.cache = ResultCache()
+        self.pending_keys = {}  # 計算中のアルゴリズム番号 -> キャッシュキー
+        self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(DEBOUNCE_MS)
+        self.update_timer.timeout.connect(self.update_results)
 
         # 初回描画
         self.update_results()
 
-    def load_algorithms(self):
-        algorithms = []
-        for file in sorted(os.listdir(ALGO_PATH)):
-            if not file.endswith(".py") or file.startswith("__"):
-                continue
-            module_name = file[:-3]
-            module = importlib.import_module(f"windows.algorithms.{module_name}")
-            algorithms.append(module)
-        return algorithms
+    def schedule_update(self):
+        """入力が落ち着くまで待ってから再計算"""
+        self.update_timer.start()
 
+    @perf.timed("decode.update_results")
     def update_results(self):
+        self.update_timer.stop()
         text = self.input_box.toPlainText()
-        # 既存のカードを削除
-        for i in reversed(range(self.results_layout.count())):
-            widget = self.results_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        # 1行2列に並べる
-        row, col = 0, 0
-        query = self.search_bar.text().strip().lower()
-        for module in self.algorithms:
-            result_text = module.run(text)
-            if query and query not in result_text.lower():
+
+        text_hash = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+        # 古い世代のタスクを無効化
+        self.generation += 1
+        self.thread_pool.clear()
+        self.pending_keys = {}
+
+        # キャッシュにあるものはその場で反映し、無いものだけ計算する
+        for index, algorithm in enumerate(self.algorithms):
+            key = ResultCache.make_key(algorithm, text_hash)
+            result_text = self.cache.get(key)
+            if result_text is not None:
+                self.cards[index].set_result(result_text)
                 continue
-            self.add_result_card(module, result_text, row, col)
-            col += 1
-            if col > 1:
-                col = 0
-                row += 1
-
-    def add_result_card(self, module, result_text, row, col):
-        card = QFrame()
-        card.setFrameShape(QFrame.StyledPanel)
-        card.setStyleSheet("""
-            QFrame {
-                background-color: #f7f9fa;
-                border: 1px solid #d0d7de;
-                border-radius: 6px;
-                padding: 4px;  /* 縦幅縮小 */
-            }
-            QFrame:hover {
-                background-color: #eef2f3;
-            }
-        """)
-        layout = QVBoxLayout(card)
-        layout.setSpacing(2)  # 内部余白を詰める
+            self.pending_keys[index] = key
+            self.thread_pool.start(AlgorithmTask(self, self.generation, index, algorithm, text))
+        self.layout_cards()
+        self.cache_label.setText(self.cache.stats_text())
 
-        # --- 名前＋コピー ---
-        top_layout = QHBoxLayout()
-        algo_label = QLabel(module.ALGO_NAME)
-        algo_label.setFont(QFont("Meiryo", 10, QFont.Bold))
-        algo_label.enterEvent = lambda e, d=module.DESCRIPTION: self.status_label.setText(d)
-        algo_label.leaveEvent = lambda e: self.status_label.setText("アルゴリズムにカーソルを合わせると説明が表示されます。")
-        top_layout.addWidget(algo_label)
+    @perf.timed("decode.on_result")
+    def on_result(self, generation, index, result_text):
+        """アルゴリズム1つ分の結果が届いた時の処理"""
+        if generation != self.generation:
+            return
+        self.cache.put(self.pending_keys.pop(index), result_text)
+        self.cache_label.setText(self.cache.stats_text())
+        self.cards[index].set_result(result_text)
+        self.layout_cards()
 
-        copy_btn = QPushButton("📋")
-        copy_btn.setFixedSize(32, 32)
-        copy_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #1d9bf0;
-                color: white;
-                border: none;
-                border-radius: 6px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #0d8ae5;
-            }
-        """)
-        copy_btn.clicked.connect(lambda _, t=result_text: QApplication.clipboard().setText(t))
-        top_layout.addWidget(copy_btn)
-        layout.addLayout(top_layout)
+    def apply_filter(self):
+        """検索語が変わった時はカードの表示・非表示だけを切り替える"""
+        self.layout_cards()
 
-        # --- シーザー暗号パラメータ専用 ---
-        if hasattr(module, "VARIABLES") and "shift" in module.VARIABLES:
-            param_layout = QHBoxLayout()
-            label = QLabel(f"shift: {module.VARIABLES['shift']}")
-            param_layout.addWidget(label)
+    @perf.timed("decode.layout_cards")
+    def layout_cards(self):
+        """検索に一致するカードをアルゴリズム順に1行2列で並べる"""
+        query = self.search_bar.text().strip().lower()
+        visible = [i for i, card in enumerate(self.cards) if card.matches(query)]
+        if visible == self.visible_cards:
+            return
+        self.visible_cards = visible
 
-            combo = QComboBox()
-            for i in range(-13, 14):  # 固定リスト
-                combo.addItem(str(i))
-            combo.setCurrentText(str(module.VARIABLES["shift"]))
+        for card in self.cards:
+            self.results_layout.removeWidget(card)
+        for position, index in enumerate(visible):
+            self.results_layout.addWidget(self.cards[index], position // 2, position % 2)
+        shown = set(visible)
+        for index, card in enumerate(self.cards):
+            card.setVisible(index in shown)
+
+    def start_magic(self):
+        """入力テキストに対して多段デコードを自動探索"""
+        text = self.input_box.toPlainText()
+        if not text:
+            return
+        self.magic_btn.setEnabled(False)
+        self.status_label.setText("自動解析中...")
+        QThreadPool.globalInstance().start(MagicTask(self, text))
 
-            def make_handler(m, lbl):
-                return lambda value: self.update_variable(m, "shift", int(value), lbl)
+    def show_magic_results(self, chains):
+        self.magic_btn.setEnabled(True)
+        self.status_label.setText(STATUS_HINT)
 
-            combo.currentTextChanged.connect(make_handler(module, label))
-            param_layout.addWidget(combo)
-            layout.addLayout(param_layout)
+        dialog = QDialog(self)
+        dialog.setWindowTitle("自動解析の結果")
+        dialog.resize(700, 400)
+        layout = QVBoxLayout(dialog)
+        browser = QTextBrowser()
+        if not chains:
+            browser.setPlainText("候補が見つかりませんでした")
+        else:
+            lines = []
+            for chain in chains:
+                steps = " → ".join(chain.steps)
+                lines.append(f"[{chain.score:.3f}] {steps}\n{chain.text[:300]}\n")
+            browser.setPlainText("\n".join(lines))
+        layout.addWidget(browser)
+        dialog.show()
 
-        # --- 結果テキスト ---
-        result_box = QTextEdit(result_text)
-        result_box.setReadOnly(True)
-        result_box.setFixedHeight(30)  # 縦幅縮小
-        result_box.setStyleSheet("""
-            QTextEdit {
-                background: #f7f9fa;
-                color: #1d9bf0;
-                border: none;
-                font-family: Meiryo;
-                font-size: 10pt;
-            }
-        """)
-        layout.addWidget(result_box)
-
-        self.results_layout.addWidget(card, row, col)
-
-    def update_variable(self, module, var_name, value, label):
-        module.VARIABLES[var_name] = value
+    def start_bruteforce(self, card, family):
+        """入力テキストの全シフトを総当たり"""
+        text = self.input_box.toPlainText()
+        if not text:
+            return
+        self.status_label.setText("総当たり中...")
+        QThreadPool.globalInstance().start(BruteForceTask(self, card, family, text))
+
+    def show_bruteforce_results(self, payload):
+        card, family, text, candidates = payload
+        if not candidates:
+            self.status_label.setText("総当たりできませんでした")
+            return
+        self.status_label.setText(STATUS_HINT)
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"{card.algorithm.name} 総当たり（χ²が小さいほど英文らしい）")
+        dialog.resize(700, 500)
+        layout = QVBoxLayout(dialog)
+        table = QTableWidget(len(candidates), 3)
+        table.setHorizontalHeaderLabels(["shift", "χ²", "結果"])
+        table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for row, candidate in enumerate(candidates):
+            table.setItem(row, 0, QTableWidgetItem(str(candidate.shift)))
+            table.setItem(row, 1, QTableWidgetItem(f"{candidate.chi2:.3f}"))
+            table.setItem(row, 2, QTableWidgetItem(candidate.preview.replace("\n", " ")))
+
+        def on_double_click(row, _column):
+            shift = candidates[row].shift
+            if card.shift_combo is not None:
+                # Caesar のカードはシフトをコンボボックスの範囲（-13〜13）に合わせて反映
+                card.shift_combo.setCurrentText(str(shift if shift <= 13 else shift - 26))
+            else:
+                QApplication.clipboard().setText(bruteforce.apply_shift(text, family, shift))
+                self.status_label.setText(f"shift {shift} の結果をコピーしました")
+
+        table.cellDoubleClicked.connect(on_double_click)
+        layout.addWidget(table)
+        layout.addWidget(QLabel("ダブルクリックでシフトを反映（Caesar）／結果をコピー"))
+        dialog.show()
+
+    def transform_file(self, algorithm):
+        """ファイルを選んでストリーム変換し、別ファイルに保存"""
+        src, _ = QFileDialog.getOpenFileName(self, "変換するファイルを選択")
+        if not src:
+            return
+        dst, _ = QFileDialog.getSaveFileName(self, "保存先を選択", src + ".out")
+        if not dst:
+            return
+        self.status_label.setText(f"{algorithm.name}: 変換中...")
+        # 入力変更時の clear() で捨てられないよう、計算用とは別のプールで実行
+        QThreadPool.globalInstance().start(FileTransformTask(self, algorithm, src, dst))
+
+    def update_variable(self, algorithm, var_name, value, label):
+        # 実行中・実行待ちのタスクは変更前の値でキーを作っているので、値を変える前に無効化する
+        # （変更後の値で計算した結果が古い値のキーでキャッシュされないように）
+        self.generation += 1
+        self.thread_pool.clear()
+        self.pending_keys = {}
+        algorithm.variables[var_name] = value
         label.setText(f"{var_name}: {value}")
-        self.update_results()
+        self.schedule_update()
+
+    def closeEvent(self, event):
+        # 実行待ちのタスクを捨て、実行中の結果も無視させる
+        self.generation += 1
+        self.thread_pool.clear()
+        event.accept()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
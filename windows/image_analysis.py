@@ -0,0 +1,172 @@
+"""
+画像解析の共通処理（Qtに依存しない）
+GUI（image_window）とCLIの両方から使う
+Pillow と NumPy は最初に画像を開いた時に読み込む
+
+形式・サイズ・モード・EXIF はヘッダーだけから読む（Image.open は画素をデコードしない）。
+平均RGBは行の帯ごとに合計して求め、画像全体の NumPy コピーは作らない（デコードした画像自体は Pillow が持つ）。
+fast=True では JPEG を縮小デコード（Image.draft）する。DCTの縮小はブロックの平均をほぼ保つが、
+平均RGBは正確な値から 0.1 程度ずれるので、縮小した時は info["mean_rgb_approx"] を True にする。
+デコードの時間とメモリは最大 1/64 になる。
+"""
+import io
+import os
+
+STRIP_ROWS = 256            # 平均を求める時に1回に読む行数
+DRAFT_SIZE = (1024, 1024)   # fast=True の JPEG はこの大きさ以上で最も小さい縮小率でデコードする
+# Image.reduce が使えるモード（それ以外はプレビュー用に RGBA に変換してから縮小する）
+REDUCE_MODES = {"L", "LA", "RGB", "RGBA", "CMYK", "YCbCr", "I", "F"}
+
+
+# --- 画像を安全に開く（HEIC対応） ---
+def open_image_safely(path):
+    from PIL import Image
+    ext = os.path.splitext(path)[1].lower()
+    if ext in [".heic", ".heif"]:
+        try:
+            from pillow_heif import register_heif_opener
+            register_heif_opener()
+        except ImportError:
+            raise ImportError("HEICを開くには pillow-heif をインストールしてください")
+    return Image.open(path)
+
+
+# --- GPSを10進数に変換 ---
+def gps_to_decimal(coord, ref):
+    def to_float(r):
+        try:
+            return float(r)
+        except TypeError:
+            return r
+    deg = to_float(coord[0])
+    min_ = to_float(coord[1])
+    sec = to_float(coord[2])
+    dec = deg + (min_ / 60) + (sec / 3600)
+    if ref in ['S', 'W']:
+        dec = -dec
+    return dec
+
+
+def read_exif(img):
+    """EXIFをタグ名の辞書で返す。取得できなければ None"""
+    from PIL import ExifTags
+    exif_data = None
+    if hasattr(img, "_getexif"):  # JPEGなど
+        exif_data = img._getexif()
+    elif hasattr(img, "info") and "exif" in img.info:  # HEICの場合
+        try:
+            from PIL.TiffImagePlugin import ImageFileDirectory_v2
+            exif_bytes = img.info["exif"]
+            exif_ifd = ImageFileDirectory_v2()
+            exif_ifd.load(io.BytesIO(exif_bytes))
+            exif_data = dict(exif_ifd)
+        except Exception:
+            exif_data = None
+    if not exif_data:
+        return None
+    return {ExifTags.TAGS.get(k, k): v for k, v in exif_data.items()}
+
+
+def read_gps(exif):
+    """
+    EXIFからGPS座標を取り出す
+    戻り値: (lat, lon) / GPSタグ無しは None / タグはあるが不完全なら ValueError
+    """
+    from PIL import ExifTags
+    gps_info = exif.get("GPSInfo")
+    if not gps_info:
+        return None
+    try:
+        gps_tags = {ExifTags.GPSTAGS.get(k, k): v for k, v in gps_info.items()}
+        lat = gps_to_decimal(gps_tags["GPSLatitude"], gps_tags["GPSLatitudeRef"])
+        lon = gps_to_decimal(gps_tags["GPSLongitude"], gps_tags["GPSLongitudeRef"])
+    except Exception as e:
+        raise ValueError("GPSタグは存在しますが、情報が不完全です") from e
+    return lat, lon
+
+
+def read_capture_time(exif):
+    """撮影日時を "YYYY-MM-DD HH:MM:SS" で返す（並べ替えできる形）。無ければ None"""
+    for tag in ("DateTimeOriginal", "DateTimeDigitized", "DateTime"):
+        value = exif.get(tag)
+        if isinstance(value, bytes):
+            value = value.decode("ascii", "replace")
+        if not isinstance(value, str):
+            continue
+        value = value.strip().rstrip("\x00")
+        # EXIFの形式は "YYYY:MM:DD HH:MM:SS"。未設定のカメラは "0000:00:00 00:00:00" や空白を入れる
+        if len(value) >= 19 and value[4] == ":" and value[7] == ":" and value[:4] != "0000":
+            return f"{value[:4]}-{value[5:7]}-{value[8:10]} {value[11:19]}"
+    return None
+
+
+def channel_means(img, strip_rows=STRIP_ROWS):
+    """
+    各チャンネルの平均（チャンネルが1つの画像は None）
+    最初の crop で Pillow は画像全体をデコードするので、画像1枚分のメモリは必要。
+    STRIP_ROWS 行ずつ NumPy にして合計するのは、画像全体の配列のコピーを作らないため
+    """
+    import numpy as np
+    bands = len(img.getbands())
+    if bands < 2:
+        return None
+    width, height = img.size
+    total = np.zeros(bands)
+    for top in range(0, height, strip_rows):
+        strip = np.asarray(img.crop((0, top, width, min(height, top + strip_rows))))
+        total += strip.sum(axis=(0, 1), dtype=np.float64)
+    return (total / (width * height)).tolist()
+
+
+def make_preview(img, size):
+    """size（幅, 高さ）程度に縮小した画像。縦横とも size 未満にはしない"""
+    factor = max(1, min(img.width // size[0], img.height // size[1]))
+    if img.mode not in REDUCE_MODES:
+        img = img.convert("RGBA")
+    return img.reduce(factor) if factor > 1 else img.copy()
+
+
+def analyze(img, fast=False, preview_size=None):
+    """
+    開いた画像の形式・サイズ・EXIF・GPS・撮影日時・平均RGBを辞書で返す
+    preview_size を渡すと、縮小したプレビュー画像を info["preview"] に入れる
+    """
+    info = {
+        "format": img.format,
+        "size": img.size,
+        "mode": img.mode,
+        "exif": False,
+        "gps": None,
+        "gps_error": None,
+        "captured_at": None,
+        "mean_rgb": None,
+        "mean_rgb_approx": False,   # 縮小デコードした画像から求めた値か
+    }
+
+    exif = read_exif(img)
+    if exif:
+        info["exif"] = True
+        info["captured_at"] = read_capture_time(exif)
+        try:
+            info["gps"] = read_gps(exif)
+        except ValueError as e:
+            info["gps_error"] = str(e)
+
+    # ここまではヘッダーのみ。ここから画素をデコードする
+    if fast and img.format == "JPEG":
+        # モードは変えずに、DRAFT_SIZE 以上で最も小さい 1/2〜1/8 の縮小率でデコードする
+        img.draft(img.mode, DRAFT_SIZE)
+        info["mean_rgb_approx"] = img.size != info["size"]
+
+    # RGB平均値
+    info["mean_rgb"] = channel_means(img)
+    if preview_size:
+        info["preview"] = make_preview(img, preview_size)
+    return info
+
+
+def analyze_file(path, fast=False, preview_size=None):
+    with open_image_safely(path) as img:
+        info = analyze(img, fast=fast, preview_size=preview_size)
+    info["path"] = path
+    return info
@@ -0,0 +1,186 @@
+"""
+フォルダ単位の一括画像解析（Qtに依存しない）
+写真の束を仕分けるために、各画像の形式・サイズ・モード・EXIF・GPS・撮影日時・チャンネル平均を
+ワーカープロセスで並列に求め、SQLite の表（1列1項目）に書き出す。
+- 画像は CHUNK_SIZE 枚ずつまとめてワーカーに渡し、プロセス間のやり取りを減らす
+- 同時に渡すまとまりはワーカー数の2倍まで（入力の列挙が先に進みすぎないようにする）
+- 書き込みは親プロセスだけが行い、まとまりごとに1回コミットする
+- 再開: 表にある画像のうち、サイズと更新時刻が変わっていないものは飛ばす
+GPSの有無と撮影日時には索引を張るので、「GPS付きの写真を撮影日時順に」といった問い合わせは速い。
+"""
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+CHUNK_SIZE = 32
+
+COLUMNS = [
+    ("path", "TEXT PRIMARY KEY"),
+    ("file_size", "INTEGER"),
+    ("mtime_ns", "INTEGER"),
+    ("format", "TEXT"),
+    ("width", "INTEGER"),
+    ("height", "INTEGER"),
+    ("mode", "TEXT"),
+    ("has_exif", "INTEGER"),
+    ("has_gps", "INTEGER"),
+    ("lat", "REAL"),
+    ("lon", "REAL"),
+    ("gps_error", "TEXT"),
+    ("captured_at", "TEXT"),   # "YYYY-MM-DD HH:MM:SS"
+    ("mean_r", "REAL"),
+    ("mean_g", "REAL"),
+    ("mean_b", "REAL"),
+    ("mean_a", "REAL"),
+    ("error", "TEXT"),
+]
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+INDEXES = {
+    "idx_images_gps": "has_gps, captured_at",
+    "idx_images_captured": "captured_at",
+}
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+# --- データベース ---
+def open_db(db_path):
+    db = sqlite3.connect(db_path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")  # WAL ならコミットごとの fsync は不要
+    columns = ", ".join(f"{name} {kind}" for name, kind in COLUMNS)
+    db.execute(f"CREATE TABLE IF NOT EXISTS images ({columns})")
+    for name, columns in INDEXES.items():
+        db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON images ({columns})")
+    db.commit()
+    return db
+
+
+def load_done(db):
+    """表にある画像の {パス: (サイズ, 更新時刻)}"""
+    return {path: (size, mtime) for path, size, mtime in
+            db.execute("SELECT path, file_size, mtime_ns FROM images")}
+
+
+def is_unchanged(path, stamp):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns) == stamp
+
+
+# --- ワーカー側 ---
+def _init_worker():
+    # 巨大な画像も1枚ずつ解析するので、Pillow の警告で進捗表示を崩さない
+    import warnings
+    from PIL import Image
+    warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+
+
+def _row(path, fast):
+    from windows.image_analysis import analyze_file
+    row = dict.fromkeys(COLUMN_NAMES)
+    row["path"] = path
+    try:
+        st = os.stat(path)
+        row["file_size"], row["mtime_ns"] = st.st_size, st.st_mtime_ns
+        info = analyze_file(path, fast=fast)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+    row["format"] = info["format"]
+    row["width"], row["height"] = info["size"]
+    row["mode"] = info["mode"]
+    row["has_exif"] = int(info["exif"])
+    row["has_gps"] = int(info["gps"] is not None)
+    if info["gps"]:
+        row["lat"], row["lon"] = info["gps"]
+    row["gps_error"] = info["gps_error"]
+    row["captured_at"] = info["captured_at"]
+    means = info["mean_rgb"] or []
+    for name, value in zip(("mean_r", "mean_g", "mean_b", "mean_a"), means):
+        row[name] = value
+    return row
+
+
+def _analyze_chunk(job):
+    paths, fast = job
+    return [_row(path, fast) for path in paths]
+
+
+# --- 実行 ---
+def _chunks(paths, size):
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_to_db(paths, db_path, fast=True, resume=False, workers=None, progress=None,
+              stop_event=None):
+    """
+    画像パスの列を解析して db_path の images 表に書き出す。(完了数, エラー数, 飛ばした数) を返す
+    resume=False なら表を空にしてから始める
+    progress(完了数, エラー数, 飛ばした数, 入力パス) は解析した1件ごとに呼ばれる
+    """
+    db = open_db(db_path)
+    if resume:
+        done = load_done(db)
+    else:
+        db.execute("DELETE FROM images")
+        db.commit()
+        done = {}
+    counts = [0, 0, 0]
+
+    def pending():
+        for path in paths:
+            if path in done and is_unchanged(path, done[path]):
+                counts[2] += 1
+                continue
+            yield path
+
+    placeholders = ", ".join("?" * len(COLUMN_NAMES))
+    insert = f"INSERT OR REPLACE INTO images ({', '.join(COLUMN_NAMES)}) VALUES ({placeholders})"
+
+    def store(rows):
+        db.executemany(insert, [[row[name] for name in COLUMN_NAMES] for row in rows])
+        db.commit()
+        for row in rows:
+            counts[0] += 1
+            if row["error"]:
+                counts[1] += 1
+            if progress:
+                progress(counts[0], counts[1], counts[2], row["path"])
+
+    workers = workers or default_workers()
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+    in_flight = set()
+    try:
+        for chunk in _chunks(pending(), CHUNK_SIZE):
+            if stop_event is not None and stop_event.is_set():
+                break
+            in_flight.add(executor.submit(_analyze_chunk, (chunk, fast)))
+            if len(in_flight) >= 2 * workers:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    store(future.result())
+        while in_flight and not (stop_event is not None and stop_event.is_set()):
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                store(future.result())
+    finally:
+        executor.shutdown(cancel_futures=True)
+        db.close()
+    return counts[0], counts[1], counts[2]
@@ -0,0 +1,76 @@
+"""
+デコード済み画像のプロセス内キャッシュ
+(パス, 更新時刻, ファイルサイズ) をキーに BGR の NumPy 配列を1つだけ保持し、合計バイト数でLRU管理する。
+プレビューもOCRもここから配列を取り、切り出しはビュー（コピー無し）で行う。
+OpenCV と NumPy は最初にデコードする時に読み込む。
+"""
+import os
+import threading
+from collections import OrderedDict
+
+MAX_BYTES = 1024 * 1024 * 1024  # 1GB（50MPのカラー画像で6枚程度）
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # キー -> 配列
+_total_bytes = 0
+
+
+def _key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def _decode(path):
+    import cv2
+    import numpy as np
+    # cv2.imread は日本語パスを開けない環境があるので、バイト列から復号する
+    data = np.fromfile(path, dtype=np.uint8)
+    image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("画像ファイルが読み込めません")
+    image.flags.writeable = False  # 共有するので書き換え禁止
+    return image
+
+
+def load(path):
+    """画像を BGR 配列で返す。同じファイルは2回目以降ディスクから読まない"""
+    global _total_bytes
+    key = _key(path)
+    with _lock:
+        image = _entries.get(key)
+        if image is not None:
+            _entries.move_to_end(key)
+            return image
+
+    image = _decode(path)
+    with _lock:
+        if key not in _entries:
+            _entries[key] = image
+            _total_bytes += image.nbytes
+            # 1枚は必ず残す（上限より大きい画像でもキャッシュする）
+            while _total_bytes > MAX_BYTES and len(_entries) > 1:
+                _, old = _entries.popitem(last=False)
+                _total_bytes -= old.nbytes
+        return _entries[key]
+
+
+def cached(path):
+    """キャッシュ済みなら配列、無ければ None（デコードしない）"""
+    try:
+        key = _key(path)
+    except OSError:
+        return None
+    with _lock:
+        return _entries.get(key)
+
+
+def clear():
+    global _total_bytes
+    with _lock:
+        _entries.clear()
+        _total_bytes = 0
+
+
+def stats():
+    with _lock:
+        return {"images": len(_entries), "bytes": _total_bytes}
@@ -0,0 +1,418 @@
+"""
+画像の詳細な統計とLSBステガノ解析（Qtに依存しない）
+STRIP_ROWS 行ずつデコードした帯を1回だけ走査し、次をまとめて求める。
+- チャンネルごとのヒストグラム・平均・シャノンエントロピー
+- ブロック（BLOCK_SIZE 四方、全チャンネル）ごとのエントロピー
+- ビットプレーンごとの 1 の割合（ヒストグラムから求める）
+- LSBのカイ二乗検定（Westfeld–Pfitzmann）。上から順に埋め込む手法を見るため、帯ごとの累積も出す
+- RS解析（Fridrich）による埋め込み率の推定
+追加のメモリは帯1本分（とその int16 のコピー）だけで、画像全体の一時配列は作らない。
+ファイル末尾の形式上の終端（JPEG の EOI、PNG の IEND など）より後ろに付け足されたデータも調べる。
+"""
+import math
+import mmap
+import os
+import struct
+
+from windows.image_analysis import STRIP_ROWS, open_image_safely
+
+BLOCK_SIZE = 64             # STRIP_ROWS の約数にする
+STAT_MODES = {"L", "LA", "RGB", "RGBA", "CMYK", "YCbCr"}   # 1チャンネル8ビットのモード
+MIN_EXPECTED = 5            # カイ二乗検定で、期待度数がこれ未満の組は数えない
+RS_MASK = (0, 1, 1, 0)      # RS解析の画素の組（横に4画素）と反転する位置
+APPENDED_PREVIEW = 32       # 付け足されたデータの先頭を何バイト見せるか
+
+# 付け足されたデータの先頭によくあるシグネチャ
+APPENDED_SIGNATURES = (
+    (b"PK\x03\x04", "ZIP"),
+    (b"Rar!\x1a\x07", "RAR"),
+    (b"7z\xbc\xaf\x27\x1c", "7z"),
+    (b"%PDF", "PDF"),
+    (b"\x1f\x8b", "gzip"),
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"GIF8", "GIF"),
+    (b"MZ", "PE実行ファイル"),
+    (b"\x7fELF", "ELF実行ファイル"),
+)
+
+
+# --- カイ二乗分布 ---
+def _gamma_q(a, x):
+    """正則化された上側不完全ガンマ関数 Q(a, x)"""
+    if x <= 0:
+        return 1.0
+    log_front = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        # 級数展開で P(a, x) を求める
+        term = total = 1.0 / a
+        n = a
+        for _ in range(1000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_front))
+    # 連分数（Lentz法）
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_front) * h)
+
+
+def chi_square_lsb(hist):
+    """
+    ヒストグラムから、LSBの組 (2k, 2k+1) の度数が揃っている確率（p値）を返す
+    1 に近いほどLSBが置き換えられている疑いが強い。数えられる組が無ければ None
+    """
+    pairs = hist.reshape(-1, 2).astype(float)
+    expected = pairs.sum(axis=1) / 2
+    keep = expected >= MIN_EXPECTED
+    if keep.sum() < 2:
+        return None
+    chi = float((((pairs[keep, 0] - expected[keep]) ** 2) / expected[keep]).sum())
+    return _gamma_q((int(keep.sum()) - 1) / 2, chi / 2)
+
+
+# --- エントロピー ---
+def entropy(counts, axis=-1):
+    """度数からシャノンエントロピー（ビット）。axis に沿って計算する"""
+    import numpy as np
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum(axis=axis, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = np.where(total > 0, counts / total, 0.0)
+        terms = np.where(p > 0, -p * np.log2(p), 0.0)
+    return terms.sum(axis=axis)
+
+
+# --- RS解析 ---
+def _flip(values, negative):
+    """F1（2k ↔ 2k+1）または F-1（2k-1 ↔ 2k）"""
+    if negative:
+        return ((values + 1) ^ 1) - 1
+    return values ^ 1
+
+
+def _smoothness(columns):
+    """隣り合う画素の差の絶対値の和（組ごと）"""
+    import numpy as np
+    total = np.abs(columns[1] - columns[0])
+    for left, right in zip(columns[1:], columns[2:]):
+        total += np.abs(right - left)
+    return total
+
+
+def _rs_counts(channel):
+    """
+    1チャンネルの帯から RS解析の度数を求める
+    戻り値は [R_M, S_M, R_-M, S_-M] を、元の画像と全LSBを反転した画像について並べた8個と組の数
+    組の中の位置ごとに列を分けた配列で計算する（最後の軸が短い配列の集計は遅いため）
+    """
+    import numpy as np
+    n = len(RS_MASK)
+    width = channel.shape[1] - channel.shape[1] % n
+    if width == 0:
+        return np.zeros(8, dtype=np.int64), 0
+    columns = [channel[:, i:width:n].astype(np.int16) for i in range(n)]
+    counts = []
+    for base in (columns, [c ^ 1 for c in columns]):
+        f0 = _smoothness(base)
+        for negative in (False, True):
+            flipped = [_flip(c, negative) if m else c for c, m in zip(base, RS_MASK)]
+            f1 = _smoothness(flipped)
+            counts += [np.count_nonzero(f1 > f0), np.count_nonzero(f1 < f0)]
+    return np.array(counts, dtype=np.int64), f0.size
+
+
+def rs_estimate(counts, groups):
+    """RS解析の度数から埋め込み率（0〜1、LSBを書き換えた画素の割合の推定）を求める。推定できなければ None"""
+    if not groups:
+        return None
+    rm0, sm0, rn0, sn0, rm1, sm1, rn1, sn1 = (c / groups for c in counts)
+    d0, d1 = rm0 - sm0, rm1 - sm1
+    dn0, dn1 = rn0 - sn0, rn1 - sn1
+    a = 2 * (d1 + d0)
+    b = dn0 - dn1 - d1 - 3 * d0
+    c = d0 - dn0
+    if abs(a) < 1e-12:
+        if abs(b) < 1e-12:
+            return None
+        z = -c / b
+    else:
+        # 全画素に埋め込んだ画像では判別式がわずかに負になる。その場合は頂点を使う
+        disc = max(0.0, b * b - 4 * a * c)
+        roots = ((-b + math.sqrt(disc)) / (2 * a), (-b - math.sqrt(disc)) / (2 * a))
+        z = min(roots, key=abs)
+    if abs(z - 0.5) < 1e-12:
+        return None
+    return float(min(1.0, max(0.0, z / (z - 0.5))))
+
+
+# --- 帯の読み出し ---
+def _strips(img, strip_rows):
+    """(上端, 帯の配列 (行, 列, チャンネル)) を順に返す。8ビット以外のモードは帯ごとに変換する"""
+    import numpy as np
+    width, height = img.size
+    convert = None
+    if img.mode not in STAT_MODES:
+        has_alpha = "A" in img.getbands() or "transparency" in img.info
+        convert = "RGBA" if has_alpha else ("L" if img.mode == "1" else "RGB")
+    for top in range(0, height, strip_rows):
+        strip = img.crop((0, top, width, min(height, top + strip_rows)))
+        if convert:
+            strip = strip.convert(convert)
+        array = np.asarray(strip)
+        yield top, array.reshape(array.shape[0], array.shape[1], -1)
+
+
+def stat_bands(img):
+    """統計を取るチャンネル名（_strips の変換後）"""
+    if img.mode in STAT_MODES:
+        return img.getbands()
+    if "A" in img.getbands() or "transparency" in img.info:
+        return ("R", "G", "B", "A")
+    return ("L",) if img.mode == "1" else ("R", "G", "B")
+
+
+# --- 統計 ---
+def compute(img, strip_rows=STRIP_ROWS, block_size=BLOCK_SIZE):
+    """
+    開いた画像の統計を辞書で返す（画素は帯ごとに1回だけ走査する）
+    ヒストグラムなどチャンネルごとの値はチャンネル名をキーにした辞書
+    block_entropy は [ブロックの行][ブロックの列] のエントロピー（全チャンネルの値をまとめて数える）
+    """
+    import numpy as np
+    if strip_rows % block_size:
+        raise ValueError("strip_rows は block_size の倍数にしてください")
+    bands = stat_bands(img)
+    width, height = img.size
+    blocks_x = -(-width // block_size)
+
+    hist = np.zeros((len(bands), 256), dtype=np.int64)
+    block_rows = []                # 帯は整数個のブロックの行からなるので、帯ごとにエントロピーにする
+    rs = np.zeros((len(bands), 8), dtype=np.int64)
+    rs_groups = 0
+    prefix = [[] for _ in bands]   # 上から帯ごとの累積p値
+    block_ids = None
+
+    for top, strip in _strips(img, strip_rows):
+        rows = strip.shape[0]
+        if block_ids is None or block_ids.shape[0] != rows:
+            # 帯の中の画素が属するブロックの番号（帯の高さが変わる最後の帯だけ作り直す）
+            by = np.arange(rows) // block_size
+            bx = np.arange(width) // block_size
+            block_ids = (by[:, None] * blocks_x + bx[None, :]).astype(np.int32) * 256
+        strip_blocks = -(-rows // block_size) * blocks_x
+        block_counts = np.zeros((strip_blocks, 256), dtype=np.int64)
+        for c in range(len(bands)):
+            channel = strip[:, :, c]
+            hist[c] += np.bincount(channel.ravel(), minlength=256)
+            flat = (block_ids + channel).ravel()
+            block_counts += np.bincount(flat, minlength=strip_blocks * 256).reshape(-1, 256)
+            counts, groups = _rs_counts(channel)
+            rs[c] += counts
+            prefix[c].append(chi_square_lsb(hist[c]))
+        rs_groups += groups
+        block_rows.append(entropy(block_counts).reshape(-1, blocks_x))
+
+    pixels = width * height
+    values = np.arange(256)
+    result = {
+        "bands": list(bands),
+        "pixels": pixels,
+        "histogram": {},
+        "mean": {},
+        "entropy": {},
+        "bit_ones": {},
+        "chi_square": {},
+        "chi_square_prefix": {},
+        "rs": {},
+        "block_size": block_size,
+        "block_entropy": np.round(np.concatenate(block_rows), 3).tolist() if block_rows else [],
+    }
+    for c, band in enumerate(bands):
+        h = hist[c]
+        result["histogram"][band] = h.tolist()
+        result["mean"][band] = float((h * values).sum() / pixels) if pixels else None
+        result["entropy"][band] = float(entropy(h))
+        # ビット b が 1 の画素の割合（LSB が先頭）
+        result["bit_ones"][band] = [
+            float(h[(values >> bit) & 1 == 1].sum() / pixels) if pixels else None
+            for bit in range(8)
+        ]
+        result["chi_square"][band] = chi_square_lsb(h)
+        result["chi_square_prefix"][band] = prefix[c]
+        result["rs"][band] = rs_estimate(rs[c], rs_groups)
+    return result
+
+
+def bit_plane(img, band, bit, size=None, strip_rows=STRIP_ROWS):
+    """
+    1つのビットプレーンを 0/255 の2値画像（NumPy の uint8 配列）で返す
+    size（幅, 高さ）を渡すと、帯ごとに間引いてその大きさ程度にする（全体の大きさの配列は作らない）
+    """
+    import numpy as np
+    bands = stat_bands(img)
+    c = bands.index(band)
+    width, height = img.size
+    step = 1
+    if size:
+        step = max(1, min(width // size[0], height // size[1]))
+    rows = []
+    for top, strip in _strips(img, strip_rows):
+        # 間引く行が帯の境目をまたいでも等間隔になるようにする
+        start = (-top) % step
+        plane = (strip[start::step, ::step, c] >> bit) & 1
+        rows.append((plane * 255).astype(np.uint8))
+    return np.concatenate(rows, axis=0)
+
+
+# --- ファイル末尾に付け足されたデータ ---
+def _jpeg_end(data):
+    """EOI の直後の位置。スキャンより前のセグメント（サムネイルを含む）は長さで読み飛ばす"""
+    pos = 2
+    size = len(data)
+    while pos + 2 <= size:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:           # 詰め物
+            pos += 1
+            continue
+        if marker == 0xD9:
+            return pos + 2
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            pos += 2
+            continue
+        if pos + 4 > size:
+            return None
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        pos += 2 + length
+        if marker == 0xDA:
+            # エントロピー符号化されたデータの中の 0xFF は 0x00 か RSTn が続く
+            while True:
+                pos = data.find(b"\xff", pos)
+                if pos < 0 or pos + 1 >= size:
+                    return None
+                following = data[pos + 1]
+                if following == 0x00 or 0xD0 <= following <= 0xD7 or following == 0xFF:
+                    pos += 1 if following == 0xFF else 2
+                    continue
+                break   # 次のマーカー（プログレッシブなら次の SOS、最後は EOI）
+    return None
+
+
+def _png_end(data):
+    pos = 8
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        pos += 12 + length
+        if kind == b"IEND":
+            return pos
+    return None
+
+
+def _gif_end(data):
+    def skip_sub_blocks(pos):
+        while pos < len(data):
+            length = data[pos]
+            pos += 1 + length
+            if length == 0:
+                return pos
+        return None
+
+    pos = 13
+    flags = data[10]
+    if flags & 0x80:
+        pos += 3 * (2 << (flags & 0x07))
+    while pos is not None and pos < len(data):
+        kind = data[pos]
+        if kind == 0x3B:
+            return pos + 1
+        if kind == 0x21:
+            pos = skip_sub_blocks(pos + 2)
+        elif kind == 0x2C:
+            flags = data[pos + 9]
+            pos += 10
+            if flags & 0x80:
+                pos += 3 * (2 << (flags & 0x07))
+            pos = skip_sub_blocks(pos + 1)   # LZWの最小符号長の次から
+        else:
+            return None
+    return None
+
+
+def _bmp_end(data):
+    return struct.unpack("<I", data[2:6])[0]
+
+
+def _riff_end(data):
+    return 8 + struct.unpack("<I", data[4:8])[0]
+
+
+def _data_end(data):
+    """形式上のファイルの終わり。形式が分からない・壊れているなら None"""
+    if data[:3] == b"\xff\xd8\xff":
+        return "JPEG", _jpeg_end(data)
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "PNG", _png_end(data)
+    if data[:4] == b"GIF8":
+        return "GIF", _gif_end(data)
+    if data[:2] == b"BM":
+        return "BMP", _bmp_end(data)
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "WEBP", _riff_end(data)
+    return None, None
+
+
+def appended_data(path):
+    """
+    形式上の終端より後ろのデータを調べる（ファイルはメモリマップで読むので、全体を読み込まない）
+    {"format", "end", "file_size", "appended", "head", "signature"}。対応していない形式は None
+    """
+    file_size = os.path.getsize(path)
+    if file_size < 16:
+        return None
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        try:
+            fmt, end = _data_end(data)
+        except (struct.error, IndexError):
+            fmt, end = None, None
+        if fmt is None:
+            return None
+        if end is None:
+            return {"format": fmt, "end": None, "file_size": file_size, "appended": None,
+                    "head": None, "signature": None}
+        tail = bytes(data[end:end + APPENDED_PREVIEW]) if end < file_size else b""
+    signature = next((name for magic, name in APPENDED_SIGNATURES if tail.startswith(magic)), None)
+    return {
+        "format": fmt,
+        "end": end,
+        "file_size": file_size,
+        "appended": max(0, file_size - end),
+        "head": tail.hex(),
+        "signature": signature,
+    }
+
+
+def compute_file(path):
+    with open_image_safely(path) as img:
+        result = compute(img)
+    result["appended_data"] = appended_data(path)
+    return result
@@ -1,15 +1,80 @@
-from PyQt5.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QFileDialog, QTextBrowser, QApplication
+from PyQt5.QtWidgets import (
+    QWidget, QLabel, QPushButton, QVBoxLayout, QFileDialog, QTextBrowser, QApplication,
+    QProgressBar, QMessageBox, QHBoxLayout, QComboBox
+)
 from PyQt5.QtGui import QPixmap, QImage
-from PIL import Image, ExifTags
-import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
 import os
 import sys
+import threading
+from windows.image_analysis import analyze_file, open_image_safely
+from windows import perf
+
+SUSPICIOUS_CHI = 0.95   # カイ二乗検定のp値がこれ以上なら疑わしい
+SUSPICIOUS_RS = 0.05    # RS解析の埋め込み率がこれ以上なら疑わしい
+
+
+class BackgroundTask(QObject):
+    """重い解析を別スレッドで実行し、結果をシグナルで返す（tag で呼び出し元を区別する）"""
+    finished = pyqtSignal(object, object)  # (tag, 結果)
+    failed = pyqtSignal(object, str)       # (tag, エラーメッセージ)
+
+    def run(self, tag, func, *args):
+        threading.Thread(target=self._run, args=(tag, func, args), daemon=True).start()
+
+    def _run(self, tag, func, args):
+        try:
+            result = func(*args)
+        except Exception as e:
+            self.failed.emit(tag, str(e))
+            return
+        self.finished.emit(tag, result)
+
+
+class BatchAnalysisWorker(QObject):
+    """フォルダの一括解析を別スレッドで実行し、進捗をシグナルで返す"""
+    progress = pyqtSignal(int, int, int, str)  # (完了数, エラー数, 飛ばした数, 入力パス)
+    finished = pyqtSignal(str)                 # 終了メッセージ
+
+    def __init__(self):
+        super().__init__()
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, paths, db_path, resume):
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self._run, args=(paths, db_path, resume), daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self, paths, db_path, resume):
+        from windows import image_batch
+        try:
+            done, errors, skipped = image_batch.run_to_db(
+                paths, db_path, resume=resume,
+                progress=self.progress.emit, stop_event=self.stop_event,
+            )
+        except Exception as e:
+            self.finished.emit(f"一括解析に失敗しました: {str(e)}")
+            return
+        state = "中断しました" if self.stop_event.is_set() else "完了しました"
+        self.finished.emit(
+            f"一括解析を{state}（{done}件、エラー {errors}件、変更無しで飛ばした {skipped}件）: {db_path}"
+        )
+
 
 class Window(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("画像解析ツール")
-        self.setFixedSize(600, 550)
+        self.setFixedSize(600, 660)
 
         layout = QVBoxLayout()
 
@@ -18,6 +83,27 @@ class Window(QWidget):
         self.open_btn.clicked.connect(self.open_image)
         layout.addWidget(self.open_btn)
 
+        # 統計・LSB解析とビットプレーンの表示（画像を開くまで無効）
+        stats_layout = QHBoxLayout()
+        self.stats_btn = QPushButton("統計・LSB解析")
+        self.stats_btn.clicked.connect(self.start_stats)
+        self.stats_btn.setEnabled(False)
+        stats_layout.addWidget(self.stats_btn)
+        self.plane_combo = QComboBox()
+        self.plane_combo.currentIndexChanged.connect(self.on_plane_changed)
+        self.plane_combo.setEnabled(False)
+        stats_layout.addWidget(self.plane_combo)
+        layout.addLayout(stats_layout)
+
+        self.batch_btn = QPushButton("フォルダを一括解析")
+        self.batch_btn.clicked.connect(self.start_batch)
+        layout.addWidget(self.batch_btn)
+
+        self.batch_progress = QProgressBar()
+        self.batch_progress.setFormat("%v / %m")
+        self.batch_progress.hide()
+        layout.addWidget(self.batch_progress)
+
         # 画像表示
         self.image_label = QLabel("画像プレビュー")
         self.image_label.setFixedSize(400, 300)
@@ -30,16 +116,16 @@ class Window(QWidget):
 
         self.setLayout(layout)
 
-    # --- 画像を安全に開く（HEIC対応） ---
-    def open_image_safely(self, path):
-        ext = os.path.splitext(path)[1].lower()
-        if ext in [".heic", ".heif"]:
-            try:
-                from pillow_heif import register_heif_opener
-                register_heif_opener()
-            except ImportError:
-                raise ImportError("HEICを開くには pillow-heif をインストールしてください")
-        return Image.open(path)
+        self.image_path = None
+        self.info_html = ""
+        self.preview_pixmap = None
+        self.task = BackgroundTask()
+        self.task.finished.connect(self.on_task_finished)
+        self.task.failed.connect(self.on_task_failed)
+
+        self.batch_worker = BatchAnalysisWorker()
+        self.batch_worker.progress.connect(self.on_batch_progress)
+        self.batch_worker.finished.connect(self.on_batch_finished)
 
     # --- Pillow Image -> QPixmap ---
     def pil2pixmap(self, img):
@@ -48,21 +134,6 @@ class Window(QWidget):
         qimg = QImage(data, img.width, img.height, QImage.Format_RGBA8888)
         return QPixmap.fromImage(qimg)
 
-    # --- GPSを10進数に変換 ---
-    def gps_to_decimal(self, coord, ref):
-        def to_float(r):
-            try:
-                return float(r)
-            except TypeError:
-                return r
-        deg = to_float(coord[0])
-        min_ = to_float(coord[1])
-        sec = to_float(coord[2])
-        dec = deg + (min_ / 60) + (sec / 3600)
-        if ref in ['S', 'W']:
-            dec = -dec
-        return dec
-
     # --- 画像解析 ---
     def open_image(self):
         path, _ = QFileDialog.getOpenFileName(
@@ -70,66 +141,215 @@ class Window(QWidget):
         )
         if not path:
             return
+        with perf.span("image.open_image"):
+            self.show_image(path)
 
+    def show_image(self, path):
+        """画像を解析してプレビューと情報を表示する"""
         try:
-            img = self.open_image_safely(path)
+            # 形式・EXIFはヘッダーから、プレビューと平均RGBは縮小デコードした画像から求める
+            size = (self.image_label.width(), self.image_label.height())
+            with perf.span("image.analyze"):
+                result = analyze_file(path, fast=True, preview_size=size)
 
             # プレビュー表示
-            pixmap = self.pil2pixmap(img).scaled(self.image_label.width(), self.image_label.height())
-            self.image_label.setPixmap(pixmap)
-
-            # HTML形式で表示
-            info = "<div style='font-size:150%'>"
-            info += f"<p>形式: {img.format}</p>"
-            info += f"<p>サイズ: {img.size}</p>"
-            info += f"<p>モード: {img.mode}</p>"
-
-            # --- EXIF情報取得 ---
-            exif_data = None
-            if hasattr(img, "_getexif"):  # JPEGなど
-                exif_data = img._getexif()
-            elif hasattr(img, "info") and "exif" in img.info:  # HEICの場合
-                try:
-                    from PIL.TiffImagePlugin import ImageFileDirectory_v2
-                    import io
-                    exif_bytes = img.info["exif"]
-                    exif_ifd = ImageFileDirectory_v2()
-                    exif_ifd.load(io.BytesIO(exif_bytes))
-                    exif_data = dict(exif_ifd)
-                except Exception:
-                    exif_data = None
-
-            # GPS情報
-            if exif_data:
-                exif = {ExifTags.TAGS.get(k, k): v for k, v in exif_data.items()}
-                gps_info = exif.get("GPSInfo")
-                if gps_info:
-                    try:
-                        gps_tags = {ExifTags.GPSTAGS.get(k, k): v for k, v in gps_info.items()}
-                        lat = self.gps_to_decimal(gps_tags["GPSLatitude"], gps_tags["GPSLatitudeRef"])
-                        lon = self.gps_to_decimal(gps_tags["GPSLongitude"], gps_tags["GPSLongitudeRef"])
-                        link = f"https://www.google.com/maps?q={lat},{lon}"
-                        info += f"<p>GPS情報あり: {lat:.6f}, {lon:.6f}</p>"
-                        info += f"<p>Google Maps: <a href='{link}'>ここをクリック</a></p>"
-                    except Exception:
-                        info += "<p>GPSタグは存在しますが、情報が不完全です</p>"
-                else:
-                    info += "<p>EXIF情報はありますがGPSはありません</p>"
-            else:
-                info += "<p>EXIF情報は取得できません</p>"
-
-            # RGB平均値
-            img_np = np.array(img)
-            if len(img_np.shape) == 3:
-                mean_rgb = np.mean(img_np, axis=(0,1))
-                info += f"<p>平均RGB: {mean_rgb}</p>"
+            with perf.span("image.preview"):
+                self.preview_pixmap = self.pil2pixmap(result.pop("preview")).scaled(*size)
+                self.image_label.setPixmap(self.preview_pixmap)
 
-            info += "</div>"
-            self.result_text.setHtml(info)
+            self.info_html = self.format_info(result)
+            self.result_text.setHtml(self.info_html)
+            self.image_path = path
+            with perf.span("image.set_planes"):
+                self.set_planes(path)
 
         except Exception as e:
+            self.image_path = None
+            self.stats_btn.setEnabled(False)
+            self.plane_combo.setEnabled(False)
             self.result_text.setHtml(f"<div style='font-size:150%'>解析中にエラーが発生: {e}</div>")
 
+    # --- 統計・LSB解析（別スレッド） ---
+    def set_planes(self, path):
+        from windows.image_stats import stat_bands
+        with open_image_safely(path) as img:
+            bands = stat_bands(img)
+        self.plane_combo.blockSignals(True)
+        self.plane_combo.clear()
+        self.plane_combo.addItem("ビットプレーン: 表示しない", None)
+        for band in bands:
+            for bit in range(8):
+                self.plane_combo.addItem(f"{band} のビット {bit}", (band, bit))
+        self.plane_combo.blockSignals(False)
+        self.plane_combo.setEnabled(True)
+        self.stats_btn.setEnabled(True)
+
+    def start_stats(self):
+        from windows.image_stats import compute_file
+        self.stats_btn.setEnabled(False)
+        self.result_text.setHtml(self.info_html + "<p>統計を計算しています...</p>")
+        self.task.run(("stats", self.image_path), compute_file, self.image_path)
+
+    def on_plane_changed(self, index):
+        plane = self.plane_combo.itemData(index)
+        if plane is None:
+            self.image_label.setPixmap(self.preview_pixmap)
+            return
+        size = (self.image_label.width(), self.image_label.height())
+        self.task.run(("plane", self.image_path, plane), self.load_bit_plane,
+                      self.image_path, plane, size)
+
+    @staticmethod
+    def load_bit_plane(path, plane, size):
+        from windows.image_stats import bit_plane
+        with open_image_safely(path) as img:
+            return bit_plane(img, plane[0], plane[1], size=size)
+
+    def on_task_finished(self, tag, result):
+        if tag[1] != self.image_path:
+            return  # 別の画像を開いた後に終わった古い結果
+        if tag[0] == "stats":
+            self.stats_btn.setEnabled(True)
+            self.result_text.setHtml(self.info_html + self.format_stats(result))
+        elif tag[2] == self.plane_combo.currentData():
+            height, width = result.shape
+            qimg = QImage(result.data, width, height, width, QImage.Format_Grayscale8)
+            size = (self.image_label.width(), self.image_label.height())
+            self.image_label.setPixmap(QPixmap.fromImage(qimg).scaled(*size))
+
+    def on_task_failed(self, tag, message):
+        if tag[1] != self.image_path:
+            return
+        self.stats_btn.setEnabled(True)
+        self.result_text.setHtml(
+            self.info_html + f"<div style='font-size:150%'>解析中にエラーが発生: {message}</div>"
+        )
+
+    # --- フォルダの一括解析 ---
+    def start_batch(self):
+        """フォルダ内の画像を一括解析して SQLite に書き出す。実行中なら中断する"""
+        if self.batch_worker.is_running():
+            self.batch_worker.stop()
+            self.batch_btn.setEnabled(False)
+            return
+
+        folder = QFileDialog.getExistingDirectory(self, "一括解析するフォルダを選択")
+        if not folder:
+            return
+        db_path, _ = QFileDialog.getSaveFileName(
+            self, "結果の保存先", os.path.join(folder, "images.sqlite3"),
+            "SQLite (*.sqlite3 *.db)", options=QFileDialog.DontConfirmOverwrite
+        )
+        if not db_path:
+            return
+
+        resume = False
+        if os.path.exists(db_path):
+            answer = QMessageBox.question(
+                self, "再開", "保存先に前回の結果があります。変更の無い画像を飛ばして続けますか？",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+            )
+            resume = answer == QMessageBox.Yes
+
+        from windows.paths import iter_image_inputs
+        paths = list(iter_image_inputs([folder]))
+        if not paths:
+            QMessageBox.warning(self, "警告", "フォルダに画像がありません")
+            return
+
+        self.batch_progress.setRange(0, len(paths))
+        self.batch_progress.setValue(0)
+        self.batch_progress.show()
+        self.batch_worker.start(paths, db_path, resume)
+        self.batch_btn.setText("一括解析を中断")
+        self.result_text.setHtml(
+            f"<div style='font-size:150%'>一括解析を開始しました（{len(paths)}件）</div>"
+        )
+
+    def on_batch_progress(self, done, errors, skipped, path):
+        self.batch_progress.setValue(done + skipped)
+
+    def on_batch_finished(self, message):
+        self.batch_btn.setText("フォルダを一括解析")
+        self.batch_btn.setEnabled(True)
+        self.result_text.setHtml(f"<div style='font-size:150%'>{message}</div>")
+
+    def closeEvent(self, event):
+        self.batch_worker.stop()
+        super().closeEvent(event)
+
+    # --- 解析結果をHTML形式に ---
+    def format_info(self, result):
+        info = "<div style='font-size:150%'>"
+        info += f"<p>形式: {result['format']}</p>"
+        info += f"<p>サイズ: {result['size']}</p>"
+        info += f"<p>モード: {result['mode']}</p>"
+
+        # GPS情報
+        if result["exif"]:
+            if result["gps"]:
+                lat, lon = result["gps"]
+                link = f"https://www.google.com/maps?q={lat},{lon}"
+                info += f"<p>GPS情報あり: {lat:.6f}, {lon:.6f}</p>"
+                info += f"<p>Google Maps: <a href='{link}'>ここをクリック</a></p>"
+            elif result["gps_error"]:
+                info += f"<p>{result['gps_error']}</p>"
+            else:
+                info += "<p>EXIF情報はありますがGPSはありません</p>"
+        else:
+            info += "<p>EXIF情報は取得できません</p>"
+
+        # RGB平均値
+        if result["mean_rgb"] is not None:
+            import numpy as np  # 解析の時点で読み込み済み
+            label = "平均RGB（縮小デコードからの概算）" if result["mean_rgb_approx"] else "平均RGB"
+            info += f"<p>{label}: {np.array(result['mean_rgb'])}</p>"
+
+        info += "</div>"
+        return info
+
+    # --- 統計をHTML形式に ---
+    def format_stats(self, stats):
+        def per_band(values, fmt):
+            return " / ".join(
+                f"{band} {'-' if values[band] is None else fmt.format(values[band])}"
+                for band in stats["bands"]
+            )
+
+        def warn(text, suspicious):
+            return f"<span style='color:red'>{text}</span>" if suspicious else text
+
+        info = "<div style='font-size:120%'>"
+        info += f"<p>エントロピー: {per_band(stats['entropy'], '{:.3f}')}</p>"
+        blocks = [v for row in stats["block_entropy"] for v in row]
+        if blocks:
+            info += (f"<p>ブロック（{stats['block_size']}px 四方）のエントロピー: "
+                     f"最小 {min(blocks):.2f} / 最大 {max(blocks):.2f}</p>")
+        lsb = {band: ones[0] for band, ones in stats["bit_ones"].items()}
+        info += f"<p>LSBが1の割合: {per_band(lsb, '{:.3f}')}</p>"
+
+        chi = stats["chi_square"]
+        suspicious = any(v is not None and v >= SUSPICIOUS_CHI for v in chi.values())
+        info += "<p>" + warn(f"LSBのカイ二乗検定 p値: {per_band(chi, '{:.3f}')}", suspicious) + "</p>"
+        rs = stats["rs"]
+        suspicious = any(v is not None and v >= SUSPICIOUS_RS for v in rs.values())
+        info += "<p>" + warn(f"RS解析の埋め込み率の推定: {per_band(rs, '{:.1%}')}", suspicious) + "</p>"
+
+        appended = stats["appended_data"]
+        if appended is None:
+            info += "<p>末尾の付け足しデータ: この形式は調べられません</p>"
+        elif appended["end"] is None:
+            info += "<p>" + warn(f"末尾の付け足しデータ: {appended['format']} の終端が見つかりません", True) + "</p>"
+        elif appended["appended"]:
+            kind = f"（{appended['signature']}）" if appended["signature"] else ""
+            info += "<p>" + warn(
+                f"末尾の付け足しデータ: {appended['end']} バイト目から {appended['appended']} バイト{kind}"
+                f"<br>先頭: {appended['head']}", True) + "</p>"
+        else:
+            info += "<p>末尾の付け足しデータ: なし</p>"
+        info += "</div>"
+        return info
+
 # 単体起動用
 if __name__ == "__main__":
     app = QApplication(sys.argv)
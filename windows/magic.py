@@ -0,0 +1,147 @@
+"""
+多段デコードの自動探索（いわゆる "magic"）
+algorithmsの各アルゴリズムを組み合わせ、深さNまでのビームサーチで
+「読める文字列」に近づく変換の連鎖を探す。Qtには依存しない。
+"""
+import math
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from windows.algorithms import load_algorithms
+from windows.algorithms._lang import ENGLISH_FREQ
+
+SAMPLE_CHARS = 1024  # スコア計算に使う先頭の文字数
+_SQRT_FREQ = tuple(math.sqrt(f) for f in ENGLISH_FREQ)
+_PRINTABLE = frozenset(range(0x20, 0x7F)) | {0x09, 0x0A, 0x0D}
+_LETTERS = range(ord("a"), ord("z") + 1)
+
+SHRINK_WEIGHT = 0.2  # 探索順位で「デコードで短くなった」ことに与える重み
+MAX_SHRINK = 9.5     # 1段で縮む上限（2進数の "01000001 " → 1文字）。これ以上はエラー文とみなす
+
+# progress: ここまでのデコードで縮んだ量（log2）。探索の順位付けにだけ使う
+Chain = namedtuple("Chain", ["score", "steps", "text", "progress"])
+
+
+def score(text):
+    """
+    0〜1程度のスコア。ASCII印字可能率・英語の文字頻度との近さ・空白率・エントロピーから計算
+    先頭 SAMPLE_CHARS 文字だけを見るので入力サイズによらずほぼ一定時間
+    """
+    sample = text[:SAMPLE_CHARS]
+    if not sample:
+        return 0.0
+    data = sample.encode("utf-8", "surrogatepass")
+    total = len(data)
+    counts = Counter(data.lower())
+
+    printable = sum(n for b, n in counts.items() if b in _PRINTABLE) / total
+
+    # 英語の文字分布とのBhattacharyya係数（英文≒1、一様分布≒0.88、16進数≒0.5）
+    letters = sum(counts[b] for b in _LETTERS)
+    if letters:
+        similarity = sum(
+            math.sqrt(counts[b] / letters) * q for b, q in zip(_LETTERS, _SQRT_FREQ)
+        )
+        fit = max(0.0, (similarity - 0.85) / 0.15) * letters / total
+    else:
+        fit = 0.0
+    # 英文の空白率は18%前後
+    spaces = max(0.0, 1.0 - abs(counts[0x20] / total - 0.18) / 0.18)
+
+    # Shannon エントロピー（英文は4bit前後、Base64などは6bit近く）
+    entropy = -sum(n / total * math.log2(n / total) for n in counts.values())
+
+    return printable * (0.3 + 0.5 * fit + 0.2 * spaces) - 0.05 * max(0.0, entropy - 4.5)
+
+
+def _default_algorithms():
+    # エンコード専用（encode_stream を持つもの）は出力が膨らむだけなので探索しない
+    return [a for a in load_algorithms() if a.stream_name != "encode_stream"]
+
+
+def _shrink(before, after):
+    ratio = len(before) / len(after)
+    if ratio > MAX_SHRINK:
+        return -1.0
+    return max(0.0, math.log2(ratio))
+
+
+def step_label(algorithm):
+    """連鎖の1段の表示名。VARIABLES があれば使った値を付け、同じ変換を再現できるようにする"""
+    variables = getattr(algorithm, "variables", None)
+    if not variables:
+        return algorithm.name
+    params = ", ".join(f"{key}={value}" for key, value in variables.items())
+    return f"{algorithm.name} ({params})"
+
+
+def _apply(algorithm, text):
+    try:
+        return algorithm.run(text)
+    except Exception:
+        return ""
+
+
+def solve(text, depth=4, beam_width=16, per_parent=4, top=5, time_budget=1.0,
+          algorithms=None, workers=None):
+    """
+    text に対して最大 depth 段の変換連鎖を探索し、スコアの高い順に top 件返す
+    各段では1つの親から per_parent 件までしか残さず、ROT系の言い換えだけでビームが埋まるのを防ぐ
+    time_budget 秒を過ぎたらその時点の最良結果を返す
+    """
+    deadline = time.perf_counter() + time_budget
+    if algorithms is None:
+        algorithms = _default_algorithms()
+    labels = {id(algo): step_label(algo) for algo in algorithms}
+
+    # ビーム内の順位付け。スコアが横並びになる中間状態（Base64や16進数の途中結果）では、
+    # デコードでどれだけ縮んだか（=デコードが進んだか）を優先する
+    def priority(chain):
+        return chain.score + SHRINK_WEIGHT * chain.progress
+
+    visited = {hash(text)}
+    beam = [Chain(score(text), (), text, 0.0)]
+    best = []
+
+    # with 文で抜けると投入済みのジョブをすべて待ってしまうので、期限を過ぎたら待たずに打ち切る
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for _ in range(depth):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            jobs = [(chain, algo) for chain in beam for algo in algorithms]
+            futures = [pool.submit(_apply, algo, chain.text) for chain, algo in jobs]
+            done, _ = wait(futures, timeout=remaining)
+
+            children = {}  # 親のインデックス -> 子の候補
+            for (chain, algo), future in zip(jobs, futures):
+                if future not in done:
+                    continue
+                output = future.result()
+                if not output or hash(output) in visited:
+                    continue
+                visited.add(hash(output))
+                child = Chain(
+                    score(output), chain.steps + (labels[id(algo)],), output,
+                    chain.progress + _shrink(chain.text, output),
+                )
+                children.setdefault(id(chain), []).append(child)
+                if time.perf_counter() > deadline:
+                    break
+
+            candidates = []
+            for group in children.values():
+                group.sort(key=priority, reverse=True)
+                candidates.extend(group[:per_parent])
+            if not candidates:
+                break
+            candidates.sort(key=priority, reverse=True)
+            beam = candidates[:beam_width]
+            best = sorted(best + candidates, key=lambda c: c.score, reverse=True)[:top]
+    finally:
+        # 実行中のものは止められないが、結果を待たずに返る。待ち行列のジョブは取り消す
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return best
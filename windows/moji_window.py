@@ -1,71 +1,61 @@
 import sys
 import os
-import cv2
-import numpy as np
-from pathlib import Path
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QFileDialog, QTextEdit, QComboBox, QMessageBox, QFrame, QDialog
+    QFileDialog, QTextEdit, QComboBox, QMessageBox, QFrame, QDialog, QCheckBox, QSpinBox
 )
 from PyQt5.QtGui import QPixmap, QImage, QFont, QColor
-from PyQt5.QtCore import Qt, QRect, pyqtSignal, QPoint, QSize
-from PyQt5.QtCore import QThread
-import importlib.util
-
-
-# グローバル変数：EasyOCRの遅延ロード用
-_ocr_reader = None
-
-
-def get_ocr_reader():
-    """EasyOCRリーダーをシングルトンで取得（遅延ロード）"""
-    global _ocr_reader
-    if _ocr_reader is None:
-        import easyocr
-        _ocr_reader = easyocr.Reader(['ja', 'en'])
-    return _ocr_reader
+from PyQt5.QtCore import Qt, QRect, pyqtSignal, QPoint, QSize, QObject, QTimer
+from windows.algorithms import load_algorithms
+from windows.ocr_server import get_client
+from windows.ocr import crop_region
+from windows.ocr_tiles import recognize_page_boxes
+from windows import image_cache
+from windows.ocr_cache import get_cache, make_key
+from windows import ocr_batch
+from windows import perf
 
 
 class InteractiveImageLabel(QLabel):
-    """マウスドラッグで範囲選択ができるラベル"""
+    """マウスドラッグで範囲選択ができるラベル。認識した文字のボックスを重ねて表示し、クリックで選べる"""
     range_selected = pyqtSignal(tuple)  # (x1, y1, x2, y2)
+    box_clicked = pyqtSignal(int)       # set_boxes で渡したボックスの番号
+
+    CLICK_DISTANCE = 3  # これ以下の移動はドラッグではなくクリック
 
     def __init__(self):
         super().__init__()
         self.image_path = None
-        self.original_pixmap = None
         self.start_pos = None
         self.end_pos = None
         self.selecting = False
         self.scale_x = 1.0
         self.scale_y = 1.0
         self.displayed_pixmap = None  # 表示用のピクスマップ
+        self.boxes = []  # [(x1, y1, x2, y2, 信頼度), ...]（画像の座標）
         self.setStyleSheet("border: 1px solid gray; background-color: #f0f0f0;")
         self.setMinimumSize(400, 400)
         self.setAlignment(Qt.AlignCenter)
 
+    @perf.timed("moji.set_image")
     def set_image(self, image_path):
         """画像を設定"""
         try:
             self.image_path = image_path
-            self.original_pixmap = QPixmap(image_path)
             self.start_pos = None
             self.end_pos = None
             self.selecting = False
+            self.boxes = []
 
-            # 画像が正しく読み込まれたか確認
-            if self.original_pixmap.isNull():
-                raise ValueError("画像ファイルが読み込めません")
-
-            # スケール計算
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError("OpenCVで画像が読み込めません")
-
+            # 表示用のピクスマップを作成（デコード済みキャッシュの配列を縮小して作る）
+            with perf.span("moji.set_image.decode"):
+                image = image_cache.load(image_path)
             self.image_h, self.image_w = image.shape[:2]
-
-            # 表示用のピクスマップを作成（スケーリング）
-            self.displayed_pixmap = self.original_pixmap.scaledToWidth(400, Qt.SmoothTransformation)
+            with perf.span("moji.set_image.pixmap"):
+                self.displayed_pixmap = self.array_to_pixmap(image, 400)
             if self.displayed_pixmap.width() <= 0 or self.displayed_pixmap.height() <= 0:
                 raise ValueError("画像のスケーリングに失敗しました")
 
@@ -79,6 +69,37 @@ class InteractiveImageLabel(QLabel):
             self.setPixmap(QPixmap())
             self.image_path = None
 
+    @staticmethod
+    def array_to_pixmap(image, width):
+        """BGR配列を幅 width に縮小してからピクスマップにする（原寸のQImageは作らない）"""
+        import cv2
+        h, w = image.shape[:2]
+        height = max(1, round(h * width / w))
+        small = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        qimg = QImage(rgb.data, width, height, rgb.strides[0], QImage.Format_RGB888)
+        return QPixmap.fromImage(qimg)
+
+    def set_boxes(self, boxes):
+        """認識したボックスを表示する。boxes は [(x1, y1, x2, y2, 信頼度), ...]（画像の座標）"""
+        self.boxes = list(boxes)
+        self.update()
+
+    def pixmap_offset(self):
+        """ラベル内でのピクスマップの左上（中央寄せで表示している）"""
+        pixmap_rect = self.pixmap().rect()
+        return ((self.width() - pixmap_rect.width()) / 2,
+                (self.height() - pixmap_rect.height()) / 2)
+
+    def box_at(self, x, y):
+        """画像の座標 (x, y) を含むボックスのうち最も小さいものの番号。無ければ None"""
+        hits = [
+            ((b[2] - b[0]) * (b[3] - b[1]), i)
+            for i, b in enumerate(self.boxes)
+            if b[0] <= x <= b[2] and b[1] <= y <= b[3]
+        ]
+        return min(hits)[1] if hits else None
+
     def mousePressEvent(self, event):
         # 新しい選択を開始する時点で、前の選択を消す
         self.start_pos = event.pos()
@@ -102,16 +123,25 @@ class InteractiveImageLabel(QLabel):
                 return
             
             # ラベル内での実際の描画位置を計算
-            label_rect = self.rect()
-            pixmap_x = (label_rect.width() - pixmap_rect.width()) / 2
-            pixmap_y = (label_rect.height() - pixmap_rect.height()) / 2
-            
+            pixmap_x, pixmap_y = self.pixmap_offset()
+
             # 座標をピクスマップ内のローカル座標に変換
             start_x = self.start_pos.x() - pixmap_x
             start_y = self.start_pos.y() - pixmap_y
             end_x = self.end_pos.x() - pixmap_x
             end_y = self.end_pos.y() - pixmap_y
-            
+
+            # クリックしたのがボックスの上なら、そのボックスだけを読み直す
+            if (abs(end_x - start_x) <= self.CLICK_DISTANCE
+                    and abs(end_y - start_y) <= self.CLICK_DISTANCE):
+                index = self.box_at(end_x * self.scale_x, end_y * self.scale_y)
+                if index is not None:
+                    self.start_pos = None
+                    self.end_pos = None
+                    self.update()
+                    self.box_clicked.emit(index)
+                    return
+
             # 範囲チェック
             if (start_x < 0 or start_y < 0 or start_x >= pixmap_rect.width() or start_y >= pixmap_rect.height() or
                 end_x < 0 or end_y < 0 or end_x >= pixmap_rect.width() or end_y >= pixmap_rect.height()):
@@ -137,11 +167,33 @@ class InteractiveImageLabel(QLabel):
                 self.end_pos = None
                 self.update()
 
+    @staticmethod
+    def confidence_color(conf):
+        """信頼度が高いほど緑、低いほど赤"""
+        if conf is None or conf < 0.5:
+            return QColor(230, 40, 40)
+        if conf < 0.8:
+            return QColor(240, 150, 0)
+        return QColor(0, 170, 60)
+
     def paintEvent(self, event):
         super().paintEvent(event)
+        from PyQt5.QtGui import QPainter, QPen
+
+        # 認識したボックスを信頼度の色で描画
+        if self.boxes and self.pixmap() and not self.pixmap().isNull():
+            painter = QPainter(self)
+            offset_x, offset_y = self.pixmap_offset()
+            for x1, y1, x2, y2, conf in self.boxes:
+                painter.setPen(QPen(self.confidence_color(conf), 1))
+                painter.drawRect(QRect(
+                    int(offset_x + x1 / self.scale_x), int(offset_y + y1 / self.scale_y),
+                    max(1, int((x2 - x1) / self.scale_x)), max(1, int((y2 - y1) / self.scale_y)),
+                ))
+            painter.end()
+
         # 選択範囲の赤い線を描画（選択中または選択済み）
         if self.start_pos and self.end_pos:
-            from PyQt5.QtGui import QPainter, QPen
             painter = QPainter(self)
             rect = QRect(self.start_pos, self.end_pos)
             pen = QPen(QColor(255, 0, 0), 2)
@@ -149,45 +201,201 @@ class InteractiveImageLabel(QLabel):
             painter.drawRect(rect)
 
 
-class OCRWorker(QThread):
-    """OCR処理を別スレッドで実行"""
-    ocr_finished = pyqtSignal(str)
-    ocr_error = pyqtSignal(str)
+class OCRWorker(QObject):
+    """OCRサーバーにジョブを送り、結果をシグナルでGUIスレッドに返す（複数ジョブを続けて投げられる）"""
+    ocr_finished = pyqtSignal(object, str)  # (ジョブのキー, 認識結果)
+    ocr_error = pyqtSignal(object, str)
+    ocr_stats = pyqtSignal(object, str)     # (ジョブのキー, 前処理・認識の時間と信頼度)
+    ocr_boxes = pyqtSignal(object, object)  # (ジョブのキー, [[x1, y1, x2, y2, 文字列, 信頼度], ...])
+    box_finished = pyqtSignal(object, object)  # (ボックスの識別子, recognize_box の結果)
 
-    def __init__(self, image_path, region):
+    BOX_PADDING = 4  # ボックスを読み直すときに周りに含める余白（px）
+
+    def __init__(self, client=None, cache=None):
         super().__init__()
-        self.image_path = image_path
-        self.region = region
+        self.client = client or get_client()
+        self.cache = cache or get_cache()
+        # ページ全体のタイルOCRはこのプロセスのワーカープールで行う（1件ずつ）
+        self.page_executor = ThreadPoolExecutor(max_workers=1)
+        self.page_futures = set()
+
+    def submit(self, image_path, region, preprocess=None):
+        """
+        ジョブを送る。キーは (画像パス, 範囲)
+        画像はプレビューでデコード済みの配列から切り出して送るので、範囲を選び直してもディスクを読まない
+        同じ画像・範囲・前処理の結果（ボックス付き）がキャッシュにあればOCRせずに返す
+        """
+        key = (image_path, region)
+        start = time.perf_counter()
+        try:
+            with perf.span("ocr.cache_lookup"):
+                cache_key = make_key(image_path, region, mode="detail", preprocess=preprocess)
+                rows = self.cache.get(cache_key)
+            if rows is None:
+                with perf.span("ocr.crop"):
+                    cropped = crop_region(image_cache.load(image_path), region)
+        except Exception as e:
+            message = f"OCR処理エラー: {str(e)}"
+            QTimer.singleShot(0, lambda: self.ocr_error.emit(key, message))
+            return key
+
+        if rows is not None:
+            perf.count("ocr.cache_hit")
+            # 呼び出し側がキーを登録してから届くよう、次のイベントループで返す
+            QTimer.singleShot(0, lambda: self._emit_rows(key, rows))
+            return key
+        future = self.client.ocr_timed(cropped, None, preprocess)
+        future.add_done_callback(lambda f: self._timed_done(key, cache_key, f, start))
+        return key
+
+    def submit_box(self, image_path, box_id, box, preprocess=None):
+        """
+        検出済みのボックス1つだけを認識器で読み直す（検出はやり直さない）
+        box は画像の座標 (x1, y1, x2, y2)。結果は box_finished で返す
+        """
+        try:
+            image = image_cache.load(image_path)
+            h, w = image.shape[:2]
+            x1, y1, x2, y2 = box
+            pad = self.BOX_PADDING
+            cropped = crop_region(image, (max(0, x1 - pad), max(0, y1 - pad),
+                                          min(w, x2 + pad), min(h, y2 + pad)))
+        except Exception as e:
+            message = f"OCR処理エラー: {str(e)}"
+            QTimer.singleShot(0, lambda: self.ocr_error.emit(box_id, message))
+            return
+        start = time.perf_counter()
+        future = self.client.ocr_box(cropped, preprocess)
+        future.add_done_callback(lambda f: self._box_done(box_id, f, start))
 
-    def run(self):
+    def submit_page(self, image_path):
+        """ページ全体をタイルに分けて並列に認識する。キーは (画像パス, None)"""
+        key = (image_path, None)
         try:
-            # 画像の読み込みを確認
-            image = cv2.imread(self.image_path)
-            if image is None:
-                raise ValueError("画像ファイルが読み込めません")
+            cache_key = make_key(image_path, None, mode="tiled_detail")
+            rows = self.cache.get(cache_key)
+        except Exception as e:
+            message = f"OCR処理エラー: {str(e)}"
+            QTimer.singleShot(0, lambda: self.ocr_error.emit(key, message))
+            return key
+
+        if rows is not None:
+            perf.count("ocr.cache_hit")
+            QTimer.singleShot(0, lambda: self._emit_rows(key, rows))
+            return key
+        start = time.perf_counter()
+        future = self.page_executor.submit(self._recognize_page_rows, image_path)
+        self.page_futures.add(future)
+        future.add_done_callback(lambda f: self._page_done(key, cache_key, f, start))
+        return key
+
+    def pending(self):
+        return self.client.pending() + len(self.page_futures)
+
+    @staticmethod
+    def _recognize_page_rows(image_path):
+        return [
+            [int(b["box"][0]), int(b["box"][1]), int(round(b["box"][2])), int(round(b["box"][3])),
+             b["text"], b["conf"]]
+            for b in recognize_page_boxes(image_path)
+        ]
+
+    def _page_done(self, key, cache_key, future, start):
+        self.page_futures.discard(future)
+        perf.record("ocr.page", time.perf_counter() - start, start)
+        try:
+            rows = future.result()
+        except Exception as e:
+            self.ocr_error.emit(key, f"OCR処理エラー: {str(e)}")
+            return
+        self.cache.put(cache_key, rows)
+        self._emit_rows(key, rows)
+
+    def _emit_rows(self, key, rows):
+        """ボックス（範囲の左上が原点）を画像の座標に直して送り、続けて文字列を送る"""
+        _, region = key
+        ox, oy = (region[0], region[1]) if region else (0, 0)
+        boxes = [[x1 + ox, y1 + oy, x2 + ox, y2 + oy, text, conf]
+                 for x1, y1, x2, y2, text, conf in rows]
+        self.ocr_boxes.emit(key, boxes)
+        self.ocr_finished.emit(key, self.format_lines([row[4] for row in rows]))
+
+    def _timed_done(self, key, cache_key, future, start):
+        # クライアントの受信スレッドから呼ばれる。シグナル経由でGUIスレッドに渡す
+        perf.record("ocr.roundtrip", time.perf_counter() - start, start)
+        try:
+            result = future.result()
+        except Exception as e:
+            self.ocr_error.emit(key, f"OCR処理エラー: {str(e)}")
+            return
+        self._record_timings(result["timings"])
+
+        from windows.ocr_preprocess import format_timings
+        self.cache.put(cache_key, result["boxes"])
+        stats = format_timings(result["timings"])
+        if result["confidence"] is not None:
+            stats += f" / 信頼度 {result['confidence']:.2f}"
+        self.ocr_stats.emit(key, stats)
+        self._emit_rows(key, result["boxes"])
+
+    def _box_done(self, box_id, future, start):
+        perf.record("ocr.box_roundtrip", time.perf_counter() - start, start)
+        try:
+            result = future.result()
+        except Exception as e:
+            self.ocr_error.emit(box_id, f"OCR処理エラー: {str(e)}")
+            return
+        self._record_timings(result["timings"])
+        self.box_finished.emit(box_id, result)
 
-            # 領域の妥当性を確認
-            x1, y1, x2, y2 = self.region
-            h, w = image.shape[:2]
-            if x1 < 0 or y1 < 0 or x2 > w or y2 > h or x1 >= x2 or y1 >= y2:
-                raise ValueError("指定された領域が画像の範囲外です")
+    @staticmethod
+    def _record_timings(timings):
+        # OCRサーバーのプロセスで測った前処理・認識の各段（時刻はこちらで受け取った時点に揃える）
+        if perf.enabled():
+            for stage, ms, _ in timings:
+                perf.record(f"ocr.{stage}", ms / 1000)
 
-            cropped = image[y1:y2, x1:x2]
-            if cropped.size == 0:
-                raise ValueError("抽出された領域が空です")
+    @staticmethod
+    def format_lines(lines):
+        if not lines:
+            return "テキストが検出されませんでした"
+        return '\n'.join(lines)
 
-            # EasyOCRの遅延ロード（初回のみ重い）
-            reader = get_ocr_reader()
-            result = reader.readtext(cropped, detail=0)
-            
-            if not result:
-                text = "テキストが検出されませんでした"
-            else:
-                text = '\n'.join(str(line) for line in result)
 
-            self.ocr_finished.emit(text)
+class BatchOCRWorker(QObject):
+    """フォルダの一括OCRを別スレッドで実行し、進捗をシグナルで返す"""
+    progress = pyqtSignal(int, int, str)  # (完了数, エラー数, 入力パス)
+    finished = pyqtSignal(str)            # 終了メッセージ
+
+    def __init__(self):
+        super().__init__()
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, paths, output_path, resume):
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self._run, args=(paths, output_path, resume), daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self, paths, output_path, resume):
+        try:
+            done, errors = ocr_batch.run_to_file(
+                paths, output_path, resume=resume, cache=get_cache(),
+                progress=self.progress.emit, stop_event=self.stop_event,
+            )
         except Exception as e:
-            self.ocr_error.emit(f"OCR処理エラー: {str(e)}")
+            self.finished.emit(f"一括OCRに失敗しました: {str(e)}")
+            return
+        state = "中断しました" if self.stop_event.is_set() else "完了しました"
+        self.finished.emit(f"一括OCRを{state}（{done}件、エラー {errors}件）: {output_path}")
 
 
 class Window(QMainWindow):
@@ -214,9 +422,15 @@ class Window(QMainWindow):
         self.select_btn.clicked.connect(self.select_image)
         left_layout.addWidget(self.select_btn)
 
+        # フォルダの一括OCRボタン
+        self.batch_btn = QPushButton("フォルダを一括認識")
+        self.batch_btn.clicked.connect(self.start_batch_ocr)
+        left_layout.addWidget(self.batch_btn)
+
         # 画像プレビュー（範囲選択機能付き）
         self.preview_label = InteractiveImageLabel()
         self.preview_label.range_selected.connect(self.on_range_selected)
+        self.preview_label.box_clicked.connect(self.on_box_clicked)
         left_layout.addWidget(self.preview_label)
 
         left_frame = QFrame()
@@ -233,11 +447,41 @@ class Window(QMainWindow):
         self.ocr_text.setMinimumHeight(150)
         right_layout.addWidget(self.ocr_text)
 
-        # 再認識ボタン
+        # 再認識ボタン・ページ全体の認識ボタン
+        ocr_button_layout = QHBoxLayout()
         self.reocr_btn = QPushButton("再認識")
         self.reocr_btn.clicked.connect(self.re_ocr)
         self.reocr_btn.setEnabled(False)
-        right_layout.addWidget(self.reocr_btn)
+        ocr_button_layout.addWidget(self.reocr_btn)
+
+        self.page_ocr_btn = QPushButton("全体を認識")
+        self.page_ocr_btn.setToolTip("範囲を選ばずに画像全体をタイルに分けて並列に認識します")
+        self.page_ocr_btn.clicked.connect(self.start_page_ocr)
+        ocr_button_layout.addWidget(self.page_ocr_btn)
+        right_layout.addLayout(ocr_button_layout)
+
+        # OCR前の前処理（範囲選択・再認識に適用）
+        preprocess_layout = QHBoxLayout()
+        self.gray_check = QCheckBox("グレー")
+        preprocess_layout.addWidget(self.gray_check)
+
+        preprocess_layout.addWidget(QLabel("文字高さ:"))
+        self.text_height_spin = QSpinBox()
+        self.text_height_spin.setRange(0, 200)
+        self.text_height_spin.setSuffix("px")
+        self.text_height_spin.setSpecialValueText("そのまま")
+        self.text_height_spin.setToolTip("文字の高さがこの大きさになるよう縮小・拡大します（0でそのまま）")
+        preprocess_layout.addWidget(self.text_height_spin)
+
+        self.deskew_check = QCheckBox("傾き補正")
+        preprocess_layout.addWidget(self.deskew_check)
+
+        self.contrast_combo = QComboBox()
+        self.contrast_combo.addItem("補正なし", "none")
+        self.contrast_combo.addItem("CLAHE", "clahe")
+        self.contrast_combo.addItem("二値化", "binarize")
+        preprocess_layout.addWidget(self.contrast_combo)
+        right_layout.addLayout(preprocess_layout)
 
         # 区切り線
         separator = QFrame()
@@ -278,31 +522,29 @@ class Window(QMainWindow):
         # 状態管理
         self.image_path = None
         self.current_region = None
-        self.ocr_worker = None
-
-    def load_algorithms(self):
-        """algorithmsフォルダからアルゴリズムを動的に読み込む"""
-        algorithms = {}
-        algo_dir = Path(__file__).parent / "algorithms"
-
-        if not algo_dir.exists():
-            return algorithms
-
-        for file in sorted(algo_dir.glob("*.py")):
-            if file.name.startswith("__"):
-                continue
-
-            try:
-                spec = importlib.util.spec_from_file_location(file.stem, file)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
+        self.ocr_results = {}  # (画像パス, 範囲) -> 認識結果（選択した順）
+        self.ocr_boxes = {}    # (画像パス, 範囲) -> [[x1, y1, x2, y2, 文字列, 信頼度], ...]
+        self.box_index = []    # プレビューのボックス番号 -> (キー, 行番号)
+        self.box_versions = {}  # (画像パス, 範囲) -> ボックスを受け取った通し番号（読み直しの古い結果を捨てる）
+        self.box_serial = 0
+
+        # OCRは常駐サーバーに投げる（範囲を続けて選択してもキューに積まれる）
+        self.ocr_worker = OCRWorker()
+        self.ocr_worker.ocr_finished.connect(self.on_ocr_finished)
+        self.ocr_worker.ocr_error.connect(self.on_ocr_error)
+        self.ocr_worker.ocr_stats.connect(self.on_ocr_stats)
+        self.ocr_worker.ocr_boxes.connect(self.on_ocr_boxes)
+        self.ocr_worker.box_finished.connect(self.on_box_finished)
+        self.last_ocr_stats = ""
 
-                if hasattr(module, 'ALGO_NAME') and hasattr(module, 'run'):
-                    algorithms[module.ALGO_NAME] = module.run
-            except Exception as e:
-                print(f"アルゴリズム読み込みエラー ({file.name}): {e}")
+        # フォルダの一括OCR（別のワーカープロセス群で実行）
+        self.batch_worker = BatchOCRWorker()
+        self.batch_worker.progress.connect(self.on_batch_progress)
+        self.batch_worker.finished.connect(self.on_batch_finished)
 
-        return algorithms
+    def load_algorithms(self):
+        """共有レジストリからアルゴリズムを取得（本体は初回実行時に読み込まれる）"""
+        return {entry.name: entry.run for entry in load_algorithms()}
 
     def select_image(self):
         """画像ファイルを選択"""
@@ -313,6 +555,10 @@ class Window(QMainWindow):
             try:
                 self.image_path = file_path
                 self.current_region = None
+                self.ocr_results = {}
+                self.ocr_boxes = {}
+                self.box_index = []
+                self.box_versions = {}
                 self.ocr_text.clear()
                 self.result_text.clear()
 
@@ -335,36 +581,173 @@ class Window(QMainWindow):
             QMessageBox.warning(self, "警告", "画像が選択されていません")
             return
 
-        if self.ocr_worker and self.ocr_worker.isRunning():
-            QMessageBox.warning(self, "警告", "OCR処理中です。お待ちください")
+        key = self.ocr_worker.submit(self.image_path, region, self.preprocess_options())
+        # 同じ範囲の再認識は結果を置き換え、新しい範囲は後ろに追加する
+        self.ocr_results[key] = "OCR処理中..."
+        self.reocr_btn.setEnabled(True)
+        self.show_ocr_results()
+
+    def preprocess_options(self):
+        return {
+            "grayscale": self.gray_check.isChecked(),
+            "text_height": self.text_height_spin.value(),
+            "deskew": self.deskew_check.isChecked(),
+            "contrast": self.contrast_combo.currentData(),
+        }
+
+    def start_page_ocr(self):
+        """画像全体のOCRを開始（タイル分割・並列）"""
+        if not self.image_path:
+            QMessageBox.warning(self, "警告", "画像が選択されていません")
             return
 
-        self.preview_label.setEnabled(False)
-        self.reocr_btn.setEnabled(False)
-        self.ocr_text.setText("OCR処理中...")
-
-        self.ocr_worker = OCRWorker(self.image_path, region)
-        self.ocr_worker.ocr_finished.connect(self.on_ocr_finished)
-        self.ocr_worker.ocr_error.connect(self.on_ocr_error)
-        self.ocr_worker.start()
+        key = self.ocr_worker.submit_page(self.image_path)
+        self.ocr_results[key] = "OCR処理中（全体）..."
+        self.show_ocr_results()
+
+    def show_ocr_results(self):
+        self.ocr_text.setText('\n'.join(self.ocr_results.values()))
+        pending = self.ocr_worker.pending()
+        cache_stats = self.ocr_worker.cache.stats_text()
+        if self.last_ocr_stats:
+            cache_stats = f"{self.last_ocr_stats} | {cache_stats}"
+        if pending:
+            self.statusBar().showMessage(f"OCR処理中... （{pending}件） | {cache_stats}")
+        else:
+            self.statusBar().showMessage(cache_stats)
 
-    def on_ocr_finished(self, text):
+    def on_ocr_finished(self, key, text):
         """OCR完了時の処理"""
-        self.ocr_text.setText(text)
-        self.preview_label.setEnabled(True)
-        self.reocr_btn.setEnabled(True)
-
-    def on_ocr_error(self, error):
-        """OCRエラー時の処理"""
+        if key not in self.ocr_results:
+            return  # 別の画像を選び直す前のジョブ
+        self.ocr_results[key] = text
+        self.show_ocr_results()
+
+    def on_ocr_boxes(self, key, boxes):
+        """認識したボックスを保存してプレビューに重ねる"""
+        if key not in self.ocr_results:
+            return
+        self.ocr_boxes[key] = boxes
+        self.box_serial += 1
+        self.box_versions[key] = self.box_serial
+        self.show_boxes()
+
+    def show_boxes(self):
+        self.box_index = []
+        shown = []
+        for key, rows in self.ocr_boxes.items():
+            for i, row in enumerate(rows):
+                self.box_index.append((key, i))
+                shown.append((row[0], row[1], row[2], row[3], row[5]))
+        self.preview_label.set_boxes(shown)
+
+    def on_box_clicked(self, index):
+        """クリックしたボックスだけを、現在の前処理の設定で読み直す"""
+        if index >= len(self.box_index) or not self.image_path:
+            return
+        key, i = self.box_index[index]
+        row = self.ocr_boxes[key][i]
+        box_id = (key, i, self.box_versions[key])
+        self.ocr_worker.submit_box(self.image_path, box_id, row[:4], self.preprocess_options())
+        self.statusBar().showMessage(f"「{row[4]}」を読み直しています...")
+
+    def on_box_finished(self, box_id, result):
+        if not self.is_current_box(box_id):
+            return  # 別の画像を選び直した・範囲を認識し直した
+        key, i, _ = box_id
+        rows = self.ocr_boxes[key]
+        if result["text"]:
+            rows[i][4] = result["text"]
+            rows[i][5] = result["confidence"]
+            self.ocr_results[key] = OCRWorker.format_lines([row[4] for row in rows])
+            self.show_boxes()
+        from windows.ocr_preprocess import format_timings
+        self.last_ocr_stats = format_timings(result["timings"])
+        if result["confidence"] is not None:
+            self.last_ocr_stats += f" / 信頼度 {result['confidence']:.2f}"
+        self.show_ocr_results()
+
+    def is_current_box(self, box_id):
+        """読み直しを投げた後にボックスが置き換わっていなければ True"""
+        key, i, version = box_id
+        return self.box_versions.get(key) == version and i < len(self.ocr_boxes.get(key, ()))
+
+    def on_ocr_stats(self, key, stats):
+        """直近のOCRの前処理・認識時間（ステータスバーに表示）"""
+        if key in self.ocr_results:
+            self.last_ocr_stats = stats
+
+    def on_ocr_error(self, key, error):
+        """OCRエラー時の処理（key はジョブのキー、またはボックスの (キー, 行番号, 通し番号)）"""
+        if key in self.ocr_results:
+            del self.ocr_results[key]
+            self.box_versions.pop(key, None)
+            if self.ocr_boxes.pop(key, None) is not None:
+                self.show_boxes()
+        elif not (len(key) == 3 and self.is_current_box(key)):
+            return
+        self.show_ocr_results()
         QMessageBox.critical(self, "OCRエラー", error)
-        self.ocr_text.clear()
-        self.preview_label.setEnabled(True)
 
     def re_ocr(self):
         """再認識"""
         if self.current_region and self.image_path:
             self.start_ocr(self.current_region)
 
+    def start_batch_ocr(self):
+        """フォルダ内の画像を一括OCRしてファイルに書き出す。実行中なら中断する"""
+        if self.batch_worker.is_running():
+            self.batch_worker.stop()
+            self.batch_btn.setEnabled(False)
+            return
+
+        folder = QFileDialog.getExistingDirectory(self, "一括認識するフォルダを選択")
+        if not folder:
+            return
+        output_path, _ = QFileDialog.getSaveFileName(
+            self, "結果の保存先", os.path.join(folder, "ocr_results.jsonl"),
+            "JSON Lines (*.jsonl);;CSV (*.csv)"
+        )
+        if not output_path:
+            return
+
+        resume = False
+        if os.path.exists(ocr_batch.checkpoint_path(output_path)):
+            answer = QMessageBox.question(
+                self, "再開", "前回の途中結果があります。続きから再開しますか？",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+            )
+            resume = answer == QMessageBox.Yes
+
+        from windows.paths import iter_image_inputs
+        paths = list(iter_image_inputs([folder]))
+        if not paths:
+            QMessageBox.warning(self, "警告", "フォルダに画像がありません")
+            return
+
+        if resume:
+            done = ocr_batch.load_checkpoint(ocr_batch.checkpoint_path(output_path))
+            paths = [p for p in paths if p not in done]
+        self.batch_total = len(paths)
+        self.batch_worker.start(paths, output_path, resume)
+        self.batch_btn.setText("一括認識を中断")
+        self.statusBar().showMessage(f"一括OCRを開始しました（{self.batch_total}件）")
+
+    def on_batch_progress(self, done, errors, path):
+        self.statusBar().showMessage(
+            f"一括OCR: {done}件完了（エラー {errors}件） / {self.batch_total}件 - "
+            f"{os.path.basename(path)}"
+        )
+
+    def on_batch_finished(self, message):
+        self.batch_btn.setText("フォルダを一括認識")
+        self.batch_btn.setEnabled(True)
+        self.statusBar().showMessage(message)
+
+    def closeEvent(self, event):
+        self.batch_worker.stop()
+        super().closeEvent(event)
+
     def execute_algorithm(self):
         """選択したアルゴリズムを実行"""
         algo_name = self.algo_combo.currentText()
@@ -0,0 +1,122 @@
+"""
+OCRの共通処理（Qtに依存しない）
+GUI（moji_window）とCLIの両方から使う
+"""
+from windows import image_cache
+
+LANGUAGES = ['ja', 'en']
+READER_PARAMS = {"detail": 0}  # readtext に渡すパラメータ（OCRキャッシュのキーにも含める）
+
+# グローバル変数：EasyOCRの遅延ロード用
+_ocr_reader = None
+
+
+def get_ocr_reader():
+    """EasyOCRリーダーをシングルトンで取得（遅延ロード）"""
+    global _ocr_reader
+    if _ocr_reader is None:
+        import easyocr
+        _ocr_reader = easyocr.Reader(LANGUAGES)
+    return _ocr_reader
+
+
+def load_image(image):
+    """画像（BGR配列）を返す。パスならデコード済みキャッシュから取得"""
+    if isinstance(image, str):
+        return image_cache.load(image)
+    return image
+
+
+def crop_region(image, region):
+    """領域の妥当性を確認して切り出す（コピーしないビュー）。region が None なら画像全体"""
+    if region is None:
+        return image
+    x1, y1, x2, y2 = region
+    h, w = image.shape[:2]
+    if x1 < 0 or y1 < 0 or x2 > w or y2 > h or x1 >= x2 or y1 >= y2:
+        raise ValueError("指定された領域が画像の範囲外です")
+
+    cropped = image[y1:y2, x1:x2]
+    if cropped.size == 0:
+        raise ValueError("抽出された領域が空です")
+    return cropped
+
+
+def recognize(image, region=None, preprocess=None):
+    """
+    画像（パスまたはBGR配列）の指定領域の文字を認識して行のリストを返す
+    preprocess は前処理の設定（ocr_preprocess.DEFAULT_OPTIONS と同じキーの辞書）
+    """
+    cropped = crop_region(load_image(image), region)
+    if preprocess:
+        from windows.ocr_preprocess import preprocess as run_preprocess
+        cropped = run_preprocess(cropped, preprocess)
+    # EasyOCRの遅延ロード（初回のみ重い）
+    reader = get_ocr_reader()
+    return [str(line) for line in reader.readtext(cropped, **READER_PARAMS)]
+
+
+def recognize_timed(image, region=None, preprocess=None):
+    """
+    recognize と同じ認識を行い、ボックス・前処理の各段と認識の時間・平均の信頼度も返す
+    戻り値: {"lines": [...], "boxes": [[x1, y1, x2, y2, 文字列, 信頼度], ...],
+             "timings": [(段階名, ミリ秒, メモ), ...], "confidence": 0〜1 または None}
+    ボックスの座標は切り出した範囲の左上が原点
+    """
+    import time
+    from windows.ocr_preprocess import preprocess as run_preprocess, map_back
+
+    timings = []
+    geometry = []
+    source = crop_region(load_image(image), region)
+    cropped = run_preprocess(source, preprocess, timings, geometry)
+    reader = get_ocr_reader()
+    start = time.perf_counter()
+    results = reader.readtext(cropped, **dict(READER_PARAMS, detail=1))
+    timings.append(("readtext", (time.perf_counter() - start) * 1000, ""))
+
+    # ボックスは前処理前の切り出し画像の座標に戻し、軸に平行な矩形にする
+    h, w = source.shape[:2]
+    boxes = []
+    for points, text, conf in results:
+        if geometry:
+            points = map_back(points, geometry)
+        xs = [float(p[0]) for p in points]
+        ys = [float(p[1]) for p in points]
+        boxes.append([
+            max(0, int(min(xs))), max(0, int(min(ys))),
+            min(w, int(round(max(xs)))), min(h, int(round(max(ys)))),
+            str(text), float(conf),
+        ])
+    confidences = [b[5] for b in boxes]
+    return {
+        "lines": [b[4] for b in boxes],
+        "boxes": boxes,
+        "timings": timings,
+        "confidence": sum(confidences) / len(confidences) if confidences else None,
+    }
+
+
+def recognize_box(image, preprocess=None):
+    """
+    検出済みの1つのボックスを切り出した画像を、検出を行わずに認識器だけで読み直す
+    戻り値: {"text": str, "confidence": 0〜1 または None, "timings": [...]}
+    """
+    import time
+    from windows.ocr_preprocess import preprocess as run_preprocess
+
+    timings = []
+    cropped = run_preprocess(load_image(image), preprocess, timings)
+    h, w = cropped.shape[:2]
+    reader = get_ocr_reader()
+    start = time.perf_counter()
+    # 画像全体を1つの横書きのボックスとして認識器に渡す（検出モデルは動かない）
+    results = reader.recognize(cropped, horizontal_list=[[0, w, 0, h]], free_list=[], detail=1)
+    timings.append(("recognize", (time.perf_counter() - start) * 1000, ""))
+    if not results:
+        return {"text": "", "confidence": None, "timings": timings}
+    return {
+        "text": " ".join(str(text) for _, text, _ in results),
+        "confidence": min(float(conf) for _, _, conf in results),
+        "timings": timings,
+    }
@@ -0,0 +1,314 @@
+"""
+フォルダ単位の一括OCR（Qtに依存しない）
+ワーカープロセスごとにEasyOCRのモデルを1回だけ読み込み、画像を1件ずつ割り当てる。
+- 背圧: 入力の列挙はワーカーが空いた分だけ進める（ジョブを溜め込まない）
+- タイムアウト: 1件が制限時間を超えたらそのワーカーを止めて作り直す
+- 失敗した画像（例外・ワーカーの異常終了・タイムアウト）はエラーのレコードにして続行する
+- 準備完了の前に MAX_START_FAILURES 回続けて落ちるワーカーは諦め、全部が起動できなければ残りをエラーにする
+- 再開: 成功した入力をチェックポイントファイルに追記し、次回はそれを飛ばす（失敗したものはやり直す）
+結果は終わった順に JSONL または CSV へ書き出す。
+"""
+import csv
+import json
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+
+DEFAULT_TIMEOUT = 300                 # 1件あたりの上限（秒）。モデルの読み込み時間は含めない
+WORKER_MEMORY = 1536 * 1024 * 1024    # 1ワーカーあたりのメモリの目安（モデル + 画像1枚）
+POLL_INTERVAL = 0.5
+MAX_START_FAILURES = 3                # 準備完了の前に続けて異常終了したらそのワーカーを諦める回数
+
+
+def default_workers():
+    """CPU数と空きメモリから決める"""
+    cpus = os.cpu_count() or 1
+    try:
+        available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return cpus  # Windows など
+    return max(1, min(cpus, available // WORKER_MEMORY))
+
+
+# --- ワーカー側 ---
+def _worker_main(conn):
+    from windows import image_cache
+    from windows.ocr import get_ocr_reader, recognize
+
+    # 同じ画像は2回来ないので、デコードした画像は1枚しか持たない
+    image_cache.MAX_BYTES = 0
+    try:
+        get_ocr_reader()
+        init_error = None
+    except Exception as e:
+        init_error = f"OCRの初期化に失敗しました: {type(e).__name__}: {e}"
+    conn.send(("ready", True, None))
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        path, region = job
+        if init_error:
+            conn.send(("result", False, init_error))
+            continue
+        try:
+            reply = ("result", True, recognize(path, region))
+        except Exception as e:
+            reply = ("result", False, f"{type(e).__name__}: {e}")
+        conn.send(reply)
+
+
+class _Worker:
+    """親プロセス側から見たワーカー1つ"""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.start_failures = 0
+        self.start()
+
+    def start(self):
+        self.conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.job = None
+        self.deadline = None
+        self.timeout = None
+
+    def assign(self, job, timeout):
+        self.job = job
+        self.conn.send(job)
+        # モデルの読み込みが終わるまでは時間を測らない
+        self.deadline = time.monotonic() + timeout if self.ready else None
+        self.timeout = timeout
+
+    def on_ready(self):
+        self.ready = True
+        self.start_failures = 0
+        if self.job is not None:
+            self.deadline = time.monotonic() + self.timeout
+
+    def restart(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        self.start()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+# --- スケジューラ ---
+def run_batch(jobs, on_result, workers=None, timeout=DEFAULT_TIMEOUT, cache=None, stop_event=None):
+    """
+    jobs: (画像パス, 範囲) の反復可能オブジェクト。on_result(record) は終わった順に呼ばれる
+    record は {"input", "region", "lines"} または {"input", "region", "error"}
+    cache を渡すと、キャッシュ済みの画像はワーカーに送らずに返し、新しい結果は保存する
+    """
+    from windows.ocr_cache import make_key
+
+    ctx = multiprocessing.get_context("spawn")
+    pool = [_Worker(ctx) for _ in range(workers or default_workers())]
+    jobs = iter(jobs)
+    exhausted = False
+    keys = {}
+    requeued = []  # 準備完了の前に落ちたワーカーに割り当てていたジョブ（画像のせいではないのでやり直す）
+
+    def next_job():
+        # キャッシュにあるものはその場で返し、ワーカーに送る必要のある次の1件を返す
+        if requeued:
+            return requeued.pop()
+        for path, region in jobs:
+            if cache is None:
+                return path, region
+            try:
+                key = make_key(path, region)
+                lines = cache.get(key)
+            except OSError:
+                return path, region  # 読めないファイルはワーカー側でエラーにする
+            if lines is None:
+                keys[path, region] = key
+                return path, region
+            on_result({"input": path, "region": region, "lines": lines})
+        return None
+
+    def finish(job, ok, payload):
+        path, region = job
+        key = keys.pop(job, None)
+        if not ok:
+            return {"input": path, "region": region, "error": payload}
+        if key is not None:
+            cache.put(key, payload)
+        return {"input": path, "region": region, "lines": payload}
+
+    try:
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                break
+            for worker in pool:
+                if worker.job is None and (requeued or not exhausted):
+                    job = next_job()
+                    if job is None:
+                        exhausted = True
+                    else:
+                        worker.assign(job, timeout)
+
+            busy = [w for w in pool if w.job is not None or not w.ready]
+            if exhausted and not requeued and not any(w.job is not None for w in busy):
+                break
+            ready = wait([w.conn for w in busy], timeout=POLL_INTERVAL)
+
+            now = time.monotonic()
+            for worker in busy:
+                crashed = False
+                if worker.conn in ready:
+                    try:
+                        kind, ok, payload = worker.conn.recv()
+                    except (EOFError, OSError):
+                        kind, ok, payload = "result", False, "ワーカーが異常終了しました"
+                        crashed = True
+                    if kind == "ready":
+                        worker.on_ready()
+                        continue
+                elif worker.deadline is not None and now > worker.deadline:
+                    ok, payload = False, f"タイムアウトしました（{timeout}秒）"
+                    crashed = True
+                else:
+                    continue
+
+                job = worker.job
+                if crashed:
+                    if not worker.ready:
+                        worker.start_failures += 1
+                        if job is not None:
+                            requeued.append(job)
+                            job = None
+                    if worker.start_failures >= MAX_START_FAILURES:
+                        worker.stop()  # 起動できないワーカーは作り直さない
+                        pool.remove(worker)
+                    else:
+                        worker.restart()  # 止めて作り直す（モデルも読み込み直す）
+                else:
+                    worker.job = None
+                    worker.deadline = None
+                if job is not None:
+                    on_result(finish(job, ok, payload))
+
+            if not pool:
+                # どのワーカーも起動できない。残りの入力はエラーにして終える
+                message = "OCRのワーカーを起動できませんでした"
+                while (job := next_job()) is not None:
+                    on_result(finish(job, False, message))
+                break
+    finally:
+        for worker in pool:
+            worker.stop()
+
+
+# --- チェックポイントと出力 ---
+def load_checkpoint(path):
+    """処理済みの入力パスの集合（ファイルが無ければ空）"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+class Checkpoint:
+    """処理済みの入力パスを1行ずつ追記するファイル"""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.done = load_checkpoint(path) if resume else set()
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def __contains__(self, input_path):
+        return input_path in self.done
+
+    def add(self, input_path):
+        self.done.add(input_path)
+        self.file.write(input_path + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ResultWriter:
+    """レコードを1件ずつ JSONL または CSV に書き出す（再開時は追記）"""
+
+    CSV_FIELDS = ["input", "region", "text", "error"]
+
+    def __init__(self, path, fmt=None, resume=False):
+        self.format = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        append = resume and os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        self.csv = None
+        if self.format == "csv":
+            self.csv = csv.DictWriter(self.file, fieldnames=self.CSV_FIELDS)
+            if not append:
+                self.csv.writeheader()
+
+    def write(self, record):
+        if self.csv is not None:
+            region = record.get("region")
+            self.csv.writerow({
+                "input": record["input"],
+                "region": ",".join(map(str, region)) if region else "",
+                "text": "\n".join(record.get("lines") or []),
+                "error": record.get("error", ""),
+            })
+        else:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def checkpoint_path(output_path):
+    return output_path + ".checkpoint"
+
+
+def run_to_file(paths, output_path, region=None, fmt=None, resume=False, workers=None,
+                timeout=DEFAULT_TIMEOUT, cache=None, progress=None, stop_event=None):
+    """
+    画像パスの列を一括OCRして output_path に書き出す。(完了数, エラー数) を返す
+    progress(完了数, エラー数, 入力パス) は1件ごとに呼ばれる
+    """
+    checkpoint = Checkpoint(checkpoint_path(output_path), resume=resume)
+    writer = ResultWriter(output_path, fmt=fmt, resume=resume)
+    counts = [0, 0]
+
+    def on_result(record):
+        writer.write(record)
+        counts[0] += 1
+        if "error" in record:
+            counts[1] += 1  # エラー・タイムアウトはチェックポイントに入れず、再開時にやり直す
+        else:
+            checkpoint.add(record["input"])
+        if progress:
+            progress(counts[0], counts[1], record["input"])
+
+    try:
+        jobs = ((path, region) for path in paths if path not in checkpoint)
+        run_batch(jobs, on_result, workers=workers, timeout=timeout, cache=cache,
+                  stop_event=stop_event)
+    finally:
+        writer.close()
+        checkpoint.close()
+    return counts[0], counts[1]
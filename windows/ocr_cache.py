@@ -0,0 +1,159 @@
+"""
+OCR結果のキャッシュ
+(画像の内容ハッシュ, 範囲, 言語, 認識パラメータ) -> 認識結果（行のリスト）
+メモリ上のLRUに加えて、SQLiteに保存すれば再起動後も同じ画像・範囲はOCRせずに結果を返す。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+MEMORY_ENTRIES = 1024
+DIGEST_ENTRIES = 4096  # ファイルのハッシュを覚えておく件数
+HASH_CHUNK = 1024 * 1024
+
+_file_digests = OrderedDict()  # (パス, 更新時刻, サイズ) -> ファイルのハッシュ（LRU）
+_digest_lock = threading.Lock()
+
+
+def default_db_path():
+    """SQLiteの保存先。環境変数 GOODDOCTOR_OCR_CACHE で変更、"off" で無効（メモリのみ）"""
+    path = os.environ.get("GOODDOCTOR_OCR_CACHE")
+    if path is not None:
+        return None if path.lower() in ("", "off", "0") else path
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "gooddoctor", "ocr_cache.sqlite3")
+
+
+def file_digest(path):
+    """ファイル内容のハッシュ。同じファイル（更新時刻・サイズが同じ）は2回目以降読まない"""
+    st = os.stat(path)
+    stamp = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    with _digest_lock:
+        digest = _file_digests.get(stamp)
+        if digest is not None:
+            _file_digests.move_to_end(stamp)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with _digest_lock:
+            _file_digests[stamp] = digest
+            while len(_file_digests) > DIGEST_ENTRIES:
+                _file_digests.popitem(last=False)
+    return digest
+
+
+def array_digest(image):
+    """画素のハッシュ（形状と型も含める）"""
+    import numpy as np
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image.shape}{image.dtype}".encode())
+    h.update(np.ascontiguousarray(image).data)
+    return h.hexdigest()
+
+
+def make_key(image, region=None, mode="single", preprocess=None):
+    """
+    キャッシュのキー（文字列）
+    image がパスならファイルのハッシュ + 範囲、配列なら切り出した画素のハッシュ（範囲は含めない）
+    mode は認識の方法（"single": 1回で認識、"tiled": タイル分割）、preprocess は前処理の設定。
+    どちらも結果が変わり得るので区別する
+    """
+    from windows.ocr import LANGUAGES, READER_PARAMS
+    from windows.ocr_preprocess import normalize_options
+    if isinstance(image, str):
+        content = f"file:{file_digest(image)}:{region}"
+    else:
+        content = f"pixels:{array_digest(image)}"
+    params = json.dumps([READER_PARAMS, normalize_options(preprocess)], sort_keys=True)
+    return f"{content}|{mode}|{','.join(LANGUAGES)}|{params}"
+
+
+class OCRCache:
+    """メモリのLRU + 任意のSQLite。GUIスレッドとクライアントの受信スレッドの両方から使う"""
+
+    def __init__(self, db_path=None, max_entries=MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if db_path:
+            try:
+                self.db = self._open(db_path)
+            except (OSError, sqlite3.Error):
+                self.db = None  # 保存先が使えなければメモリのみで動く
+
+    @staticmethod
+    def _open(db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        db = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS ocr (key TEXT PRIMARY KEY, lines TEXT NOT NULL)")
+        db.commit()
+        return db
+
+    def get(self, key):
+        """結果（行のリスト）を返す。無ければ None"""
+        with self.lock:
+            lines = self.entries.get(key)
+            if lines is None and self.db is not None:
+                row = self.db.execute("SELECT lines FROM ocr WHERE key = ?", (key,)).fetchone()
+                if row:
+                    lines = json.loads(row[0])
+                    self._remember(key, lines)
+            if lines is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return list(lines)
+
+    def put(self, key, lines):
+        lines = list(lines)
+        with self.lock:
+            self._remember(key, lines)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO ocr (key, lines) VALUES (?, ?)",
+                    (key, json.dumps(lines, ensure_ascii=False)),
+                )
+                self.db.commit()
+
+    def _remember(self, key, lines):
+        self.entries[key] = lines
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM ocr")
+                self.db.commit()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats_text(self):
+        return (f"OCRキャッシュ: ヒット率 {self.hit_rate():.0%} "
+                f"（ヒット {self.hits} / ミス {self.misses}）")
+
+
+_cache = None
+
+
+def get_cache():
+    """プロセス内で共有するキャッシュ"""
+    global _cache
+    if _cache is None:
+        _cache = OCRCache(default_db_path())
+    return _cache
@@ -0,0 +1,196 @@
+"""
+OCR前の前処理（Qtに依存しない）
+グレースケール化 → 文字の高さに合わせた縮小・拡大 → 傾き補正 → コントラスト補正（CLAHE／二値化）
+の順に、有効なものだけを実行する。各段の処理時間を記録し、何にどれだけ時間を使ったかを確認できる。
+中間結果はスレッドごとに使い回すバッファに書くので、同じ大きさの画像なら確保し直さない。
+戻り値のバッファは同じスレッドで次に preprocess を呼ぶまで有効。
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# 既定ではすべて無効（生の画像をそのまま認識する）
+DEFAULT_OPTIONS = {
+    "grayscale": False,
+    "text_height": 0,      # 目標の文字の高さ（px）。0 なら大きさを変えない
+    "deskew": False,
+    "contrast": "none",    # "none" / "clahe" / "binarize"
+}
+CONTRAST_MODES = ("none", "clahe", "binarize")
+
+MIN_SCALE = 0.1
+MAX_SCALE = 2.0
+ANALYSIS_SIZE = 1024   # 文字の高さ・傾きの推定はこの大きさに縮小して行う
+MIN_SKEW = 0.3         # これより小さい傾き（度）は補正しない
+MAX_SKEW = 15.0        # これより大きい傾きは推定の誤りとみなす
+
+_local = threading.local()
+
+
+def _buffer(name, shape, dtype=np.uint8):
+    """スレッドごとの再利用バッファ（形が変わった時だけ作り直す）"""
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    buf = buffers.get(name)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = buffers[name] = np.empty(shape, dtype)
+    return buf
+
+
+def _clahe():
+    clahe = getattr(_local, "clahe", None)
+    if clahe is None:
+        clahe = _local.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    return clahe
+
+
+def normalize_options(options):
+    """未指定の項目を既定値で埋める。すべて無効なら None"""
+    merged = dict(DEFAULT_OPTIONS, **(options or {}))
+    if merged["contrast"] not in CONTRAST_MODES:
+        raise ValueError(f"不明なコントラスト補正です: {merged['contrast']}")
+    if merged == DEFAULT_OPTIONS:
+        return None
+    return merged
+
+
+# --- 推定 ---
+def _to_gray(image):
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=_buffer("gray_estimate", image.shape[:2]))
+
+
+def _text_mask(gray):
+    """推定用に縮小・二値化した画像（文字が白）と縮小率"""
+    h, w = gray.shape
+    scale = min(1.0, ANALYSIS_SIZE / max(h, w))
+    if scale < 1.0:
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    # 黒地に白文字なら反転する（文字の方が背景より少ないはず）
+    if cv2.countNonZero(mask) > mask.size // 2:
+        cv2.bitwise_not(mask, dst=mask)
+    return mask, scale
+
+
+def estimate_text_height(gray):
+    """文字（連結成分）の高さの中央値（px）。推定できなければ None"""
+    mask, scale = _text_mask(gray)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    keep = (heights >= 3) & (heights < mask.shape[0] / 2) & (widths < mask.shape[1] / 2)
+    if not keep.any():
+        return None
+    return float(np.median(heights[keep])) / scale
+
+
+def estimate_skew(gray):
+    """文字の画素を囲む最小の矩形から傾き（度、反時計回りが正）を推定する"""
+    mask, _ = _text_mask(gray)
+    points = cv2.findNonZero(mask)
+    if points is None or len(points) < 50:
+        return 0.0
+    (_, _), (rw, rh), angle = cv2.minAreaRect(points)
+    # OpenCV の角度は (0, 90]。横長の矩形を基準に -45〜45 度に直す
+    if rw < rh:
+        angle -= 90
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    return -angle + 0.0  # -0.0 を 0.0 にする
+
+
+# --- 前処理 ---
+def preprocess(image, options, timings=None, geometry=None):
+    """
+    画像（BGRまたはグレースケール）に前処理をかけて返す。入力の配列は書き換えない
+    timings にリストを渡すと (段階名, ミリ秒, メモ) を追記する
+    geometry にリストを渡すと、座標が変わる段階（縮小・拡大、傾き補正）の 2x3 のアフィン行列を追記する
+    """
+    options = normalize_options(options)
+    if options is None:
+        return image
+
+    def record(stage, start, note=""):
+        if timings is not None:
+            timings.append((stage, (time.perf_counter() - start) * 1000, note))
+
+    if options["grayscale"] and image.ndim == 3:
+        start = time.perf_counter()
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=_buffer("gray", image.shape[:2]))
+        record("grayscale", start)
+
+    if options["text_height"]:
+        start = time.perf_counter()
+        height = estimate_text_height(_to_gray(image))
+        scale = 1.0
+        if height:
+            scale = min(MAX_SCALE, max(MIN_SCALE, options["text_height"] / height))
+        # 数%の違いなら補間で画質を落とすだけなので何もしない
+        if abs(scale - 1.0) > 0.05:
+            h, w = image.shape[:2]
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+            dst = _buffer("resized", (size[1], size[0]) + image.shape[2:])
+            image = cv2.resize(image, size, dst=dst, interpolation=interpolation)
+            if geometry is not None:
+                geometry.append(np.array([[size[0] / w, 0, 0], [0, size[1] / h, 0]]))
+        else:
+            scale = 1.0
+        note = f"x{scale:.2f}" + (f"（文字 {height:.0f}px）" if height else "（推定できず）")
+        record("resize", start, note)
+
+    if options["deskew"]:
+        start = time.perf_counter()
+        angle = estimate_skew(_to_gray(image))
+        if MIN_SKEW <= abs(angle) <= MAX_SKEW:
+            h, w = image.shape[:2]
+            matrix = cv2.getRotationMatrix2D((w / 2, h / 2), -angle, 1.0)
+            dst = _buffer("deskewed", image.shape)
+            image = cv2.warpAffine(image, matrix, (w, h), dst=dst, flags=cv2.INTER_LINEAR,
+                                   borderMode=cv2.BORDER_REPLICATE)
+            if geometry is not None:
+                geometry.append(matrix)
+            record("deskew", start, f"{angle:+.1f}°")
+        else:
+            record("deskew", start, f"{angle:+.1f}°（補正なし）")
+
+    if options["contrast"] != "none":
+        start = time.perf_counter()
+        gray = image
+        if image.ndim == 3:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=_buffer("gray", image.shape[:2]))
+        dst = _buffer("contrast", gray.shape)
+        if options["contrast"] == "clahe":
+            image = _clahe().apply(gray, dst=dst)
+        else:
+            image = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                          cv2.THRESH_BINARY, 31, 10, dst=dst)
+        record(options["contrast"], start)
+
+    return image
+
+
+def map_back(points, geometry):
+    """前処理後の画像の座標 [(x, y), ...] を元の画像の座標に戻す"""
+    matrix = np.eye(3)
+    for step in geometry:
+        matrix = np.vstack([step, [0, 0, 1]]) @ matrix
+    inverse = np.linalg.inv(matrix)
+    pts = np.hstack([np.asarray(points, dtype=float), np.ones((len(points), 1))])
+    return (pts @ inverse.T)[:, :2]
+
+
+def format_timings(timings):
+    """ステータスバー用の1行（例: "resize 3.1ms x0.42 / readtext 812ms"）"""
+    parts = []
+    for stage, ms, note in timings:
+        parts.append(f"{stage} {ms:.1f}ms" + (f" {note}" if note else ""))
+    return " / ".join(parts)
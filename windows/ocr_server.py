@@ -0,0 +1,404 @@
+"""
+常駐OCRサーバー
+EasyOCRのモデルを1回だけ読み込んだ別プロセスを立て、ローカルのソケット（Windowsは名前付きパイプ）で
+(画像, 範囲) のジョブを受け付ける。画像はパス（サーバー側のキャッシュで1回だけデコード）か、
+切り出し済みのBGR配列（GUIがデコード済みの画像から切り出して送る）。ジョブはキューに積まれて順に処理され、結果は非同期に返る。
+GUI（moji_window）とCLIの両方が OCRClient 経由で使う。Qtには依存しない。
+
+返信は pickle で受け取るので、接続先は本人しか触れない場所に置く。
+ソケットと認証鍵（ユーザーごとの乱数、0600）は本人だけのディレクトリ（0700）に置き、
+所有者が自分でないソケット・ディレクトリ・鍵は使わない。Windowsのパイプ名には鍵から作った推測できない部分を付ける。
+"""
+import hashlib
+import itertools
+import os
+import queue
+import secrets
+import stat
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Listener, Client
+
+AUTHKEY_BYTES = 32
+IDLE_TIMEOUT = 10 * 60   # 接続もジョブも無い状態がこの秒数続いたらサーバーを終了
+CONNECT_TIMEOUT = 600    # サーバー起動（初回はモデルのダウンロードも含む）を待つ上限
+
+
+_authkey = None
+
+
+def runtime_dir():
+    """
+    ソケットと認証鍵を置く本人だけのディレクトリ
+    POSIX は $XDG_RUNTIME_DIR/gooddoctor（無ければキャッシュディレクトリの下）、Windows は %LOCALAPPDATA%
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        path = os.path.join(base, "gooddoctor")
+        os.makedirs(path, exist_ok=True)
+        return path
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        path = os.path.join(base, "gooddoctor")
+    else:
+        cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(cache, "gooddoctor", "run")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = _check_owner(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise RuntimeError(f"ディレクトリではありません: {path}")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)   # 自分のディレクトリなので締め直す
+    return path
+
+
+def _check_owner(path):
+    """path（シンボリックリンクはたどらない）の所有者が自分でなければ RuntimeError"""
+    info = os.lstat(path)
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise RuntimeError(f"他のユーザーが所有しているため使いません: {path}")
+    return info
+
+
+def authkey():
+    """ユーザーごとの認証鍵。初回に乱数で作り、本人だけが読めるファイル（0600）に保存する"""
+    global _authkey
+    if _authkey is None:
+        path = os.path.join(runtime_dir(), "ocr-authkey")
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            _authkey = _read_authkey(path)
+        else:
+            key = secrets.token_bytes(AUTHKEY_BYTES)
+            with os.fdopen(fd, "wb") as f:
+                f.write(key)
+            _authkey = key
+    return _authkey
+
+
+def _read_authkey(path):
+    for _ in range(50):
+        info = _check_owner(path)
+        if not stat.S_ISREG(info.st_mode) or (sys.platform != "win32" and info.st_mode & 0o077):
+            raise RuntimeError(f"認証鍵のファイルの種類か権限が不正です（0600 の通常ファイルのみ）: {path}")
+        with open(path, "rb") as f:
+            key = f.read()
+        if len(key) == AUTHKEY_BYTES:
+            return key
+        time.sleep(0.02)  # 別のプロセスが書き込んでいる途中
+    raise RuntimeError(f"認証鍵のファイルが壊れています: {path}")
+
+
+def default_address():
+    """ユーザーごとのサーバーのアドレス"""
+    if sys.platform == "win32":
+        # パイプは全ユーザーで名前を共有するので、鍵から作った推測できない名前にする
+        return rf"\\.\pipe\gooddoctor-ocr-{hashlib.sha256(authkey()).hexdigest()[:32]}"
+    return os.path.join(runtime_dir(), "ocr.sock")
+
+
+def _connect(address):
+    """サーバーへ接続する。POSIX のソケットは所有者が自分であることを確かめてから"""
+    if sys.platform != "win32" and isinstance(address, str) and os.path.exists(address):
+        _check_owner(address)
+    return Client(address, authkey=authkey())
+
+
+# --- サーバー側 ---
+def handle_job(kind, args):
+    """ジョブを1件処理する"""
+    if kind == "ocr":
+        from windows.ocr import recognize
+        image, region, preprocess = args
+        return recognize(image, region, preprocess)
+    if kind == "ocr_timed":
+        from windows.ocr import recognize_timed
+        image, region, preprocess = args
+        return recognize_timed(image, region, preprocess)
+    if kind == "ocr_box":
+        from windows.ocr import recognize_box
+        image, preprocess = args
+        return recognize_box(image, preprocess)
+    if kind == "ping":
+        return "pong"
+    raise ValueError(f"不明なジョブです: {kind}")
+
+
+class _Server:
+    def __init__(self, listener):
+        self.listener = listener
+        self.jobs = queue.Queue()
+        self.connections = 0
+        self.last_activity = time.monotonic()
+        self.lock = threading.Lock()
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    def accept_loop(self):
+        while True:
+            conn = self.listener.accept()
+            with self.lock:
+                self.connections += 1
+            self.touch()
+            threading.Thread(target=self.receive_loop, args=(conn,), daemon=True).start()
+
+    def receive_loop(self, conn):
+        """1つの接続からジョブを受け取ってキューに積む"""
+        send_lock = threading.Lock()
+        try:
+            while True:
+                job_id, kind, args = conn.recv()
+                self.touch()
+                self.jobs.put((conn, send_lock, job_id, kind, args))
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self.lock:
+                self.connections -= 1
+            self.touch()
+
+    def work_loop(self):
+        """キューのジョブを1件ずつ処理（モデルは1つなので直列）"""
+        while True:
+            conn, send_lock, job_id, kind, args = self.jobs.get()
+            try:
+                reply = (job_id, True, handle_job(kind, args))
+            except Exception as e:
+                reply = (job_id, False, f"{type(e).__name__}: {e}")
+            self.touch()
+            try:
+                with send_lock:
+                    conn.send(reply)
+            except (EOFError, OSError):
+                pass  # クライアントが先に切断した
+
+    def idle(self):
+        with self.lock:
+            busy = self.connections or not self.jobs.empty()
+        return not busy and time.monotonic() - self.last_activity > IDLE_TIMEOUT
+
+
+def _listen(address):
+    try:
+        return Listener(address, authkey=authkey())
+    except OSError:
+        # 既に動いているサーバーがあればそちらを使う。応答が無ければ残骸のソケットを消して立て直す
+        try:
+            _connect(address).close()
+            return None
+        except OSError:
+            if sys.platform != "win32" and os.path.exists(address):
+                os.remove(address)
+            return Listener(address, authkey=authkey())
+
+
+def serve(address=None, warm=True):
+    """サーバーのメインループ（別プロセスで実行される）"""
+    address = address or default_address()
+    listener = _listen(address)
+    if listener is None:
+        return
+    if warm:
+        # 接続を受け付ける前にモデルを読み込んでおく
+        from windows.ocr import get_ocr_reader
+        get_ocr_reader()
+
+    server = _Server(listener)
+    threading.Thread(target=server.work_loop, daemon=True).start()
+    threading.Thread(target=server.accept_loop, daemon=True).start()
+    try:
+        while not server.idle():
+            time.sleep(5)
+    finally:
+        listener.close()
+
+
+# --- クライアント側 ---
+def _absolute(image):
+    """パスはサーバーの作業ディレクトリによらないよう絶対パスにして送る"""
+    if isinstance(image, (str, os.PathLike)):
+        return os.path.abspath(image)
+    return image
+
+
+def _spawn_server(address):
+    """
+    サーバーを起動元から切り離した別プロセスで起動する
+    起動したGUIやCLIが終了しても残り、次の起動からも使われる。終了は IDLE_TIMEOUT に任せる
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    options = {}
+    if sys.platform == "win32":
+        options["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        options["start_new_session"] = True
+    with open(os.path.join(runtime_dir(), "ocr-server.log"), "ab") as log:
+        return subprocess.Popen(
+            [sys.executable, "-m", "windows.ocr_server", address],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log, env=env, close_fds=True, **options,
+        )
+
+
+class OCRClient:
+    """
+    OCRサーバーへの接続。submit() はすぐに Future を返すので、複数の範囲を続けて投げられる
+    接続（必要ならサーバーの起動とモデル読み込み待ち）は送信スレッドで行うので、GUIスレッドは止まらない
+    """
+
+    def __init__(self, address=None, autostart=True):
+        self.address = address or default_address()
+        self.autostart = autostart
+        self.conn = None
+        self.process = None   # このクライアントが起動したサーバー（subprocess.Popen）
+        self.futures = {}
+        self.sent = {}        # 送信済みで結果待ちのジョブ -> 送った接続
+        self.ids = itertools.count()
+        self.outbox = queue.Queue()
+        self.lock = threading.Lock()
+        self.sender = None
+
+    def submit(self, kind, *args):
+        """ジョブを送って Future を返す"""
+        future = Future()
+        job_id = next(self.ids)
+        with self.lock:
+            self.futures[job_id] = future
+            if self.sender is None:
+                self.sender = threading.Thread(target=self._send_loop, daemon=True)
+                self.sender.start()
+        self.outbox.put((job_id, kind, args))
+        return future
+
+    def ocr(self, image, region=None, preprocess=None):
+        """image はパスまたはBGR配列。結果は行のリスト"""
+        return self.submit("ocr", _absolute(image), region, preprocess)
+
+    def ocr_timed(self, image, region=None, preprocess=None):
+        """結果は recognize_timed と同じ辞書（行・各段の時間・平均の信頼度）"""
+        return self.submit("ocr_timed", _absolute(image), region, preprocess)
+
+    def ocr_box(self, image, preprocess=None):
+        """検出済みのボックスを切り出した画像を認識器だけで読み直す"""
+        return self.submit("ocr_box", image, preprocess)
+
+    def warm_up(self):
+        """サーバーを起動してモデルを読み込ませておく（結果は待たない）"""
+        return self.submit("ping")
+
+    def pending(self):
+        """結果待ちのジョブ数"""
+        return len(self.futures)
+
+    def _send_loop(self):
+        while True:
+            job = self.outbox.get()
+            if job is None:
+                return
+            self._send(job)
+
+    def _send(self, job):
+        """1件送る。送る前か送っている途中で接続が切れていたら、つなぎ直して送り直す"""
+        job_id = job[0]
+        for _ in range(2):
+            conn = None
+            try:
+                conn = self._connection()
+                with self.lock:
+                    if self.conn is not conn:
+                        raise OSError("OCRサーバーとの接続が切れました")
+                    self.sent[job_id] = conn
+                conn.send(job)
+                return
+            except Exception as e:
+                error = e
+                with self.lock:
+                    self.sent.pop(job_id, None)
+                    if conn is not None and self.conn is conn:
+                        self.conn = None
+                if conn is None:
+                    break   # 接続もサーバーの起動もできなかった
+        self._fail(job_id, f"OCRサーバーに接続できません: {error}")
+
+    def _connection(self):
+        if self.conn is None:
+            try:
+                conn = _connect(self.address)
+            except OSError:
+                if not self.autostart:
+                    raise
+                conn = self._start_server()
+            with self.lock:
+                self.conn = conn
+            threading.Thread(target=self._receive_loop, args=(conn,), daemon=True).start()
+        return self.conn
+
+    def _start_server(self):
+        self.process = _spawn_server(self.address)
+        deadline = time.monotonic() + CONNECT_TIMEOUT
+        while True:
+            try:
+                return _connect(self.address)
+            except OSError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("OCRサーバーを起動できませんでした")
+                time.sleep(0.2)
+
+    def _take(self, job_id):
+        with self.lock:
+            self.sent.pop(job_id, None)
+            return self.futures.pop(job_id, None)
+
+    def _fail(self, job_id, message):
+        future = self._take(job_id)
+        if future is not None:
+            future.set_exception(RuntimeError(message))
+
+    def _receive_loop(self, conn):
+        try:
+            while True:
+                job_id, ok, payload = conn.recv()
+                if ok:
+                    future = self._take(job_id)
+                    if future is not None:
+                        future.set_result(payload)
+                else:
+                    self._fail(job_id, payload)
+        except (EOFError, OSError):
+            pass
+        # 切断された場合はこの接続で送ったジョブだけを失敗にする。
+        # まだ送っていないジョブは送信スレッドが次に取り出すときにつなぎ直して送る
+        with self.lock:
+            if self.conn is conn:
+                self.conn = None
+            lost = [job_id for job_id, sent_on in self.sent.items() if sent_on is conn]
+        for job_id in lost:
+            self._fail(job_id, "OCRサーバーとの接続が切れました")
+
+    def close(self):
+        self.outbox.put(None)
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+_client = None
+
+
+def get_client():
+    """プロセス内で共有するクライアント"""
+    global _client
+    if _client is None:
+        _client = OCRClient()
+    return _client
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,183 @@
+"""
+ページ全体のタイル分割OCR（Qtに依存しない）
+大きな画像を重なりのある帯（横に長すぎる場合はさらに列）に分け、複数のワーカープロセスで並列に認識する。
+タイルの継ぎ目で重複・分断した文字ボックスはまとめ、読み順（上の行から、行内は左から）に並べて返す。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+TILE_HEIGHT = 1024   # 帯の高さ。300dpiのA4（約2480x3508）で4〜5枚
+TILE_WIDTH = 4096    # これより幅が広い画像だけ横にも分ける（EasyOCRの行ボックスを切らないため）
+OVERLAP = 160        # 隣のタイルとの重なり。1行の高さより大きくしておく
+MAX_WORKERS = 4
+EDGE_MARGIN = 2      # タイルの内側の辺からこの距離以内のボックスは「切れている」とみなす
+DUPLICATE_RATIO = 0.5
+
+_pool = None
+_pool_workers = 0
+
+
+# --- タイル分割 ---
+def _spans(length, tile, overlap):
+    if length <= tile:
+        return [(0, length)]
+    step = tile - overlap
+    starts = list(range(0, length - tile, step)) + [length - tile]
+    return [(s, s + tile) for s in starts]
+
+
+def plan_tiles(height, width, tile_height=TILE_HEIGHT, tile_width=TILE_WIDTH, overlap=OVERLAP):
+    """(x1, y1, x2, y2) のリストを返す。上の帯から、帯の中は左から"""
+    return [
+        (x1, y1, x2, y2)
+        for y1, y2 in _spans(height, tile_height, overlap)
+        for x1, x2 in _spans(width, tile_width, overlap)
+    ]
+
+
+# --- ワーカー側 ---
+def _init_worker(threads):
+    # ワーカー同士でCPUを奪い合わないようにしてから、モデルを1回だけ読み込む
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from windows.ocr import get_ocr_reader
+    get_ocr_reader()
+
+
+def _ocr_tile(job):
+    """1枚のタイルを認識し、ページ座標のボックスのリストを返す"""
+    from windows.ocr import get_ocr_reader, READER_PARAMS
+    tile, (x1, y1, x2, y2), (page_w, page_h) = job
+    params = dict(READER_PARAMS, detail=1)
+    boxes = []
+    for points, text, conf in get_ocr_reader().readtext(tile, **params):
+        xs = [float(p[0]) + x1 for p in points]
+        ys = [float(p[1]) + y1 for p in points]
+        bx1, by1, bx2, by2 = min(xs), min(ys), max(xs), max(ys)
+        # 画像の外周ではない辺に接しているボックスは、隣のタイルに続きがある
+        clipped = (
+            (x1 > 0 and bx1 - x1 <= EDGE_MARGIN)
+            or (y1 > 0 and by1 - y1 <= EDGE_MARGIN)
+            or (x2 < page_w and x2 - bx2 <= EDGE_MARGIN)
+            or (y2 < page_h and y2 - by2 <= EDGE_MARGIN)
+        )
+        boxes.append({
+            "box": (bx1, by1, bx2, by2),
+            "text": str(text),
+            "conf": float(conf),
+            "clipped": clipped,
+        })
+    return boxes
+
+
+# --- 結果のまとめ ---
+def _area(box):
+    return max(0.0, box[2] - box[0]) * max(0.0, box[3] - box[1])
+
+
+def _overlap_ratio(a, b):
+    """重なり面積 / 小さい方の面積"""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    smaller = min(_area(a), _area(b))
+    return w * h / smaller if smaller else 0.0
+
+
+def merge_boxes(boxes, threshold=DUPLICATE_RATIO):
+    """
+    継ぎ目の重なり部分で2回認識されたボックスを1つにする
+    切れていないもの → 信頼度が高いもの → 大きいもの の順に優先して残す
+    """
+    ranked = sorted(boxes, key=lambda b: (b["clipped"], -b["conf"], -_area(b["box"])))
+    kept = []
+    for candidate in ranked:
+        if all(_overlap_ratio(candidate["box"], k["box"]) < threshold for k in kept):
+            kept.append(candidate)
+    return kept
+
+
+def reading_order(boxes):
+    """行ごとにまとめ、上の行から、行内は左から並べる"""
+    lines = []
+    for b in sorted(boxes, key=lambda b: (b["box"][1] + b["box"][3]) / 2):
+        x1, y1, x2, y2 = b["box"]
+        center, height = (y1 + y2) / 2, y2 - y1
+        if lines:
+            line = lines[-1]
+            # 直前の行と縦の中心が高さの半分以内なら同じ行
+            if abs(center - line["center"]) <= min(height, line["height"]) / 2:
+                line["boxes"].append(b)
+                n = len(line["boxes"])
+                line["center"] += (center - line["center"]) / n
+                line["height"] += (height - line["height"]) / n
+                continue
+        lines.append({"center": center, "height": height, "boxes": [b]})
+    return [b for line in lines for b in sorted(line["boxes"], key=lambda b: b["box"][0])]
+
+
+# --- 実行 ---
+def default_workers():
+    return max(1, min(MAX_WORKERS, os.cpu_count() or 1))
+
+
+def get_pool(workers=None):
+    """モデル読み込み済みのワーカーを使い回す（ワーカー数が変わったときだけ作り直す）"""
+    global _pool, _pool_workers
+    workers = workers or default_workers()
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        import multiprocessing
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads,),
+        )
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+
+def recognize_page_boxes(image, region=None, workers=None):
+    """
+    画像（パスまたはBGR配列）をタイルに分けて並列に認識し、読み順のボックスのリストを返す
+    ボックスは {"box": (x1, y1, x2, y2), "text", "conf", "clipped"}（座標は region 内）
+    同時にワーカーへ送るタイルはワーカー数の2倍までにして、メモリ使用量を抑える
+    """
+    from windows.ocr import load_image, crop_region
+    page = crop_region(load_image(image), region)
+    height, width = page.shape[:2]
+    pool = get_pool(workers)
+    limit = 2 * _pool_workers
+
+    boxes = []
+    in_flight = set()
+    for tile in plan_tiles(height, width):
+        x1, y1, x2, y2 = tile
+        in_flight.add(pool.submit(_ocr_tile, (page[y1:y2, x1:x2], tile, (width, height))))
+        if len(in_flight) >= limit:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                boxes.extend(future.result())
+    for future in in_flight:
+        boxes.extend(future.result())
+
+    return reading_order(merge_boxes(boxes))
+
+
+def recognize_page(image, region=None, workers=None):
+    """recognize と同じく行のリストを返す（タイル分割・並列版）"""
+    return [b["text"] for b in recognize_page_boxes(image, region, workers)]
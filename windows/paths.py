@@ -0,0 +1,18 @@
+"""
+入力ファイルの列挙（CLI と GUI の一括処理で共有）
+Qt には依存しない。
+"""
+import glob
+import os
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tiff", ".webp", ".heic", ".heif"}
+
+
+def iter_image_inputs(patterns):
+    """globパターン（** 可）やディレクトリから画像ファイルを列挙"""
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*")
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            if os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS:
+                yield path
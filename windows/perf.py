@@ -0,0 +1,192 @@
+"""
+処理時間の計測（Qtに依存しない）
+「デコード画面が遅い」と言われた時に、どの段階が遅いのかを数字で見るための軽い計測。
+- span(名前) / @timed(名前) で囲んだ区間の時間をリングバッファ（最新 RING_SIZE 件）に記録する
+- record(名前, 秒) で、別プロセスなどで測った時間をそのまま記録する
+- count(名前) は回数だけ数える（キャッシュのヒットなど）
+- summary() は段階ごとの件数・p50・p95・最大（ミリ秒）、write_chrome_trace() は
+  chrome://tracing / Perfetto で開ける JSON を書き出す
+
+既定では無効で、無効な間は span() が何もしない共有のオブジェクトを返すだけ（記録も時刻の取得もしない）。
+環境変数 GOODDOCTOR_PERF=1 で有効、GOODDOCTOR_TRACE=パス で有効にして終了時にトレースを書き出す。
+"""
+import atexit
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+RING_SIZE = 4096
+
+_enabled = os.environ.get("GOODDOCTOR_PERF", "").lower() in ("1", "on", "true")
+_trace_path = None
+_events = deque(maxlen=RING_SIZE)  # (名前, 開始時刻（秒）, 所要時間（秒）, スレッドID)
+_counters = {}
+_counter_lock = threading.Lock()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+
+def clear():
+    _events.clear()
+    with _counter_lock:
+        _counters.clear()
+
+
+# --- 記録 ---
+def record(name, seconds, start=None):
+    """所要時間 seconds の区間を記録する。start（perf_counter の値）が無ければ今終わったものとする"""
+    if not _enabled:
+        return
+    if start is None:
+        start = time.perf_counter() - seconds
+    # deque の append はスレッドセーフなのでロックは取らない
+    _events.append((name, start, seconds, threading.get_ident()))
+
+
+def count(name, n=1):
+    if not _enabled:
+        return
+    with _counter_lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _events.append((self.name, self.start, end - self.start, threading.get_ident()))
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """with perf.span("名前"): ... の区間を記録する（無効なら何もしない）"""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name):
+    """関数1回の呼び出しを span(name) で囲むデコレーター"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# --- 集計・書き出し ---
+def events():
+    return list(_events)
+
+
+def counters():
+    with _counter_lock:
+        return dict(_counters)
+
+
+def _percentile(sorted_values, q):
+    # 最近傍法（件数が少なくても実際に測った値を返す）
+    index = max(0, math.ceil(q * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summary():
+    """{段階名: {"count", "p50", "p95", "max"}}（時間はミリ秒）。リングバッファにある分だけを集計する"""
+    durations = {}
+    for name, _, seconds, _ in list(_events):
+        durations.setdefault(name, []).append(seconds * 1000)
+    result = {}
+    for name, values in durations.items():
+        values.sort()
+        result[name] = {
+            "count": len(values),
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "max": values[-1],
+        }
+    return result
+
+
+def format_summary(stats=None):
+    """オーバーレイ・ログ用の表（等幅フォント前提）"""
+    stats = summary() if stats is None else stats
+    lines = [f"{'stage':<30}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}"]
+    for name in sorted(stats):
+        s = stats[name]
+        lines.append(f"{name:<30}{s['count']:>6}{s['p50']:>10.2f}{s['p95']:>10.2f}")
+    for name, value in sorted(counters().items()):
+        lines.append(f"{name:<30}{value:>6}")
+    return "\n".join(lines)
+
+
+def chrome_trace():
+    """Chrome のトレース形式（Trace Event Format）の辞書"""
+    pid = os.getpid()
+    trace = [
+        {"name": name, "ph": "X", "ts": start * 1e6, "dur": seconds * 1e6, "pid": pid, "tid": tid}
+        for name, start, seconds, tid in list(_events)
+    ]
+    now = time.perf_counter() * 1e6
+    trace += [{"name": name, "ph": "C", "ts": now, "pid": pid, "args": {"value": value}}
+              for name, value in counters().items()]
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(), f, ensure_ascii=False)
+
+
+def set_trace_path(path):
+    """計測を有効にし、プロセスの終了時に path へトレースを書き出す"""
+    global _trace_path
+    if _trace_path is None:
+        atexit.register(_write_trace_at_exit)
+    _trace_path = path
+    enable()
+
+
+def _write_trace_at_exit():
+    if _trace_path:
+        try:
+            write_chrome_trace(_trace_path)
+        except OSError:
+            pass
+
+
+if os.environ.get("GOODDOCTOR_TRACE"):
+    set_trace_path(os.environ["GOODDOCTOR_TRACE"])